@@ -1,6 +1,16 @@
+import sys
+
 import fire
 
+from arxivmlrev import instrument
 from arxivmlrev.results import Results
+from arxivmlrev.server import serve
 
 if __name__ == '__main__':
-    fire.Fire(Results)
+    if sys.argv[1:2] == ['serve']:
+        # Note: The server isn't recorded as a run, as it runs indefinitely, with each refresh of the feed index being
+        # recorded as a run of its own.
+        fire.Fire(serve, sys.argv[2:])
+    else:
+        with instrument.run(sys.argv[1] if (len(sys.argv) > 1) else 'help'):
+            fire.Fire(Results)
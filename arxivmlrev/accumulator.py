@@ -0,0 +1,109 @@
+import datetime
+import heapq
+import logging
+import math
+import threading
+from typing import Dict, List, Set, Tuple, Union
+
+import pandas as pd
+
+from arxivmlrev import config
+from arxivmlrev.result import Result
+
+log = logging.getLogger(__name__)
+
+_HeapItem = Tuple[Tuple[datetime.datetime, datetime.datetime, str], Result]
+
+
+class ResultsAccumulator:
+    """Accumulator of results into per-column lists, from which a typed dataframe is built once.
+
+    Results are deduplicated by URL ID as they are added, keeping the highest version. If `max_results` is finite, only
+    that many of the most recently updated results are retained. Results can be added concurrently by multiple threads,
+    such as by the title and ID searches adding to a corpus.
+    """
+
+    def __init__(self, *, max_results: Union[int, float] = math.inf):
+        self._max_results = max_results
+        self._lock = threading.Lock()  # Keeps the rows of the columns aligned across concurrent adds.
+        self._sources: Dict[str, str] = {}  # URL ID to search type.
+        self._duplicated_url_ids: Set[str] = set()  # URL IDs returned by more than one search type.
+        # Used if max_results is infinite:
+        self._columns: Dict[str, list] = {c: [] for c in config.DATA_ARTICLES_COLUMNS}
+        self._row_indexes: Dict[str, int] = {}  # URL ID to row index.
+        # Used if max_results is finite:
+        self._heap: List[_HeapItem] = []  # Min-heap of the most recently updated results.
+        self._heap_results: Dict[str, Result] = {}  # URL ID to result in heap.
+
+    def __len__(self) -> int:
+        return len(self._heap) if math.isfinite(self._max_results) else len(self._row_indexes)
+
+    @staticmethod
+    def _row(result: Result) -> tuple:
+        return (result.url_id, result.version, result.published, result.updated, result.title,
+                result.title_whitelist_match, result.categories_str, result.abstract)
+
+    def _add_to_columns(self, result: Result) -> None:
+        row_index = self._row_indexes.get(result.url_id)
+        if row_index is None:
+            self._row_indexes[result.url_id] = len(self._columns['URL_ID'])
+            for column, value in zip(self._columns.values(), self._row(result)):
+                column.append(value)
+        elif result.version > self._columns['Version'][row_index]:
+            for column, value in zip(self._columns.values(), self._row(result)):
+                column[row_index] = value
+
+    def _add_to_heap(self, result: Result) -> None:
+        existing_result = self._heap_results.get(result.url_id)
+        if existing_result is not None:
+            if result.version <= existing_result.version:
+                return
+            self._heap = [item for item in self._heap if item[1] is not existing_result]
+            heapq.heapify(self._heap)
+        item = ((result.updated, result.published, result.url_id), result)
+        self._heap_results[result.url_id] = result
+        if len(self._heap) < self._max_results:
+            heapq.heappush(self._heap, item)
+        elif item[0] > self._heap[0][0]:
+            _, evicted_result = heapq.heapreplace(self._heap, item)
+            del self._heap_results[evicted_result.url_id]
+        else:
+            del self._heap_results[result.url_id]
+
+    def add(self, result: Result, *, source: str) -> None:
+        """Add the result which was returned by the given search type."""
+        url_id = result.url_id
+        with self._lock:
+            existing_source = self._sources.setdefault(url_id, source)
+            if existing_source != source:
+                self._duplicated_url_ids.add(url_id)
+            if math.isfinite(self._max_results):
+                self._add_to_heap(result)
+            else:
+                self._add_to_columns(result)
+
+    @property
+    def duplicated_url_ids(self) -> List[str]:
+        """Return the sorted URL IDs which were returned by more than one search type."""
+        return sorted(self._duplicated_url_ids)
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return a dataframe of the accumulated results, in no particular order."""
+        if math.isfinite(self._max_results):
+            rows = [self._row(result) for _, result in self._heap]
+            columns = dict(zip(config.DATA_ARTICLES_COLUMNS, map(list, zip(*rows)))) if rows else \
+                {c: [] for c in config.DATA_ARTICLES_COLUMNS}
+        else:
+            columns = self._columns
+        df = pd.DataFrame({
+            'URL_ID': pd.Series(columns['URL_ID'], dtype=object),
+            'Version': pd.Series(columns['Version'], dtype='int32'),
+            'Published': pd.to_datetime(pd.Series(columns['Published'], dtype=object), utc=True),
+            'Updated': pd.to_datetime(pd.Series(columns['Updated'], dtype=object), utc=True),
+            'Title': pd.Series(columns['Title'], dtype=object),
+            'Match': pd.Series(columns['Match'], dtype='category'),
+            'Categories': pd.Series(columns['Categories'], dtype='category'),
+            'Abstract': pd.Series(columns['Abstract'], dtype=object),
+        })
+        log.debug('Built dataframe of %s accumulated results.', len(df))
+        return df
@@ -0,0 +1,56 @@
+import logging
+from typing import Iterable, Iterator, Optional, Tuple, cast
+from xml.etree import ElementTree
+
+log = logging.getLogger(__name__)
+
+_ATOM = '{http://www.w3.org/2005/Atom}'
+_ARXIV = '{http://arxiv.org/schemas/atom}'
+_OPENSEARCH = '{http://a9.com/-/spec/opensearch/1.1/}'
+_ERROR_ID_PREFIX = 'http://arxiv.org/api/errors'
+
+
+class AtomFeedParser:
+    """Incremental parser of an Atom feed of the arXiv API.
+
+    Only the fields used by `Result` are extracted from each entry, into a dict having the same keys as a result of
+    the arxiv package. Each entry is yielded as soon as it is parsed, after which its element is cleared.
+    """
+
+    def __init__(self) -> None:
+        self.total_results: Optional[int] = None
+
+    @staticmethod
+    def _entry(element: ElementTree.Element) -> dict:
+        find = element.findtext
+        links = element.iterfind(f'{_ATOM}link')
+        alternate_links = [link.get('href') for link in links if link.get('rel') == 'alternate']
+        primary_category = element.find(f'{_ARXIV}primary_category')
+        return {
+            'id': find(f'{_ATOM}id'),
+            'arxiv_url': alternate_links[0] if alternate_links else find(f'{_ATOM}id'),
+            'title': (find(f'{_ATOM}title') or '').strip(),
+            'summary': (find(f'{_ATOM}summary') or '').strip(),
+            'published': find(f'{_ATOM}published'),
+            'updated': find(f'{_ATOM}updated'),
+            'tags': [{'term': category.get('term')} for category in element.iterfind(f'{_ATOM}category')],
+            'arxiv_primary_category': {'term': None if primary_category is None else primary_category.get('term')},
+        }
+
+    def parse(self, chunks: Iterable[bytes]) -> Iterator[dict]:
+        """Yield the entries of the feed as they are parsed from the given chunks of its bytes."""
+        parser: ElementTree.XMLPullParser = ElementTree.XMLPullParser(events=('end',))
+        for chunk in chunks:
+            parser.feed(chunk)
+            for _, element in cast(Iterator[Tuple[str, ElementTree.Element]], parser.read_events()):
+                tag = element.tag
+                if tag == f'{_ATOM}entry':
+                    entry = self._entry(element)
+                    element.clear()
+                    if (entry['id'] or '').startswith(_ERROR_ID_PREFIX):
+                        log.error('The arXiv API returned an error: %s', entry['summary'])
+                        continue
+                    yield entry
+                elif tag == f'{_OPENSEARCH}totalResults':
+                    self.total_results = int(element.text or 0)
+        parser.close()
@@ -1,13 +1,18 @@
+import csv
 import datetime
+import functools
 import json
 import logging.config
 import os
 from pathlib import Path
 import re
-from typing import Dict, List, Pattern
+import tempfile
+from typing import Any, Callable, Dict, List, Pattern, Set, TYPE_CHECKING
 
-import pandas as pd
-from ruamel.yaml import YAML
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from arxivmlrev.util.match import TermsMatcher
 
 
 def _terms_blacklist_regex(terms: List[str]) -> Pattern:
@@ -35,6 +40,87 @@ def _term_whitelist_regex(term: str, assertions: Dict[str, List[str]]) -> Patter
     return re.compile(pattern)
 
 
+def _config_articles() -> 'pd.DataFrame':
+    import pandas as pd  # Deferred, being slow to import.
+    return pd.read_csv(CONFIG_ARTICLES_PATH, dtype={'URL_ID': str})
+
+
+def _build_snapshot() -> Dict[str, Any]:
+    from ruamel.yaml import YAML  # Deferred, being slow to import.
+    terms = json.loads(json.dumps(YAML().load(TERMS_PATH)))
+    with CONFIG_ARTICLES_PATH.open(newline='') as file:
+        articles = [(int(row['Presence']), row['URL_ID']) for row in csv.DictReader(file)]
+    return {
+        'categories': sorted(set(CATEGORIES_PATH.read_text().strip().split('\n'))),
+        'terms': terms,
+        'terms_blacklist_pattern': _terms_blacklist_regex(terms['blacklist']).pattern,
+        'terms_whitelist_patterns': [_term_whitelist_regex(term, assertions).pattern
+                                     for term, assertions in terms['whitelist'].items()],
+        'url_id_blacklist': sorted(url_id for presence, url_id in articles if presence == 0),
+        'url_id_whitelist': sorted(url_id for presence, url_id in articles if presence == 1),
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def _snapshot() -> Dict[str, Any]:
+    """Return the values precomputed from the configuration files, reusing them from disk if the files are unchanged.
+
+    The snapshot is invalidated by a change to the modification time or size of any of the files or of this module.
+    """
+    log = logging.getLogger(__name__)
+    source_paths = (Path(__file__), CATEGORIES_PATH, CONFIG_ARTICLES_PATH, TERMS_PATH)
+    key = [[stat.st_mtime_ns, stat.st_size] for stat in (path.stat() for path in source_paths)]
+    try:
+        snapshot: Dict[str, Any] = json.loads(CONFIG_SNAPSHOT_PATH.read_text())
+    except (OSError, ValueError):
+        pass
+    else:
+        if snapshot.get('key') == key:
+            log.debug('Read config snapshot %s.', CONFIG_SNAPSHOT_PATH)
+            return snapshot
+
+    snapshot = {'key': key, **_build_snapshot()}
+    try:
+        CONFIG_SNAPSHOT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = CONFIG_SNAPSHOT_PATH.with_name(f'{CONFIG_SNAPSHOT_PATH.name}.{os.getpid()}.tmp')
+        temp_path.write_text(json.dumps(snapshot))
+        os.replace(temp_path, CONFIG_SNAPSHOT_PATH)
+    except OSError as exc:
+        log.warning('Unable to write config snapshot %s: %s', CONFIG_SNAPSHOT_PATH, exc)
+    else:
+        log.debug('Wrote config snapshot %s.', CONFIG_SNAPSHOT_PATH)
+    return snapshot
+
+
+def _terms_whitelist_matcher() -> 'TermsMatcher':
+    from arxivmlrev.util.match import TermsMatcher
+    return TermsMatcher(list(_snapshot()['terms']['whitelist']), __getattr__('TERMS_WHITELIST_REGEXES'))
+
+
+_LAZY_VALUES: Dict[str, Callable[[], Any]] = {
+    'CATEGORIES': lambda: _snapshot()['categories'],
+    'CONFIG_ARTICLES': _config_articles,
+    'TERMS': lambda: _snapshot()['terms'],
+    'TERMS_BLACKLIST': lambda: sorted(set(_snapshot()['terms']['blacklist'])),
+    'TERMS_WHITELIST': lambda: sorted(_snapshot()['terms']['whitelist']),
+    'TERMS_BLACKLIST_REGEX': lambda: re.compile(_snapshot()['terms_blacklist_pattern']),
+    'TERMS_WHITELIST_REGEXES': lambda: [re.compile(pattern) for pattern in _snapshot()['terms_whitelist_patterns']],
+    'TERMS_WHITELIST_MATCHER': _terms_whitelist_matcher,
+    'URL_ID_BLACKLIST': lambda: set(_snapshot()['url_id_blacklist']),
+    'URL_ID_WHITELIST': lambda: set(_snapshot()['url_id_whitelist']),
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Return the lazily computed value of the named attribute, memoising it as a module attribute."""
+    try:
+        compute = _LAZY_VALUES[name]
+    except KeyError:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}') from None
+    value = globals()[name] = compute()
+    return value
+
+
 def configure_logging() -> None:
     logging.config.dictConfig(LOGGING)
     log = logging.getLogger(__name__)
@@ -43,39 +129,98 @@ def configure_logging() -> None:
 
 CONFIG_DIR = Path(__file__).parent / '_config'
 DATA_DIR = Path(__file__).parents[1] / 'data'
+ON_SERVERLESS = bool(os.getenv('GCLOUD_PROJECT'))  # Approximation.
 PACKAGE_NAME = Path(__file__).parent.stem
+CACHE_DIR = (Path(tempfile.gettempdir()) / PACKAGE_NAME) if ON_SERVERLESS else (DATA_DIR / 'cache')
 
+ARXIV_API_URL = 'http://export.arxiv.org/api/query'
 CATEGORIES_PATH = CONFIG_DIR / 'categories.txt'
-CATEGORIES = sorted(set(CATEGORIES_PATH.read_text().strip().split('\n')))
 CONFIG_ARTICLES_PATH = CONFIG_DIR / 'articles.csv'
-CONFIG_ARTICLES = pd.read_csv(CONFIG_ARTICLES_PATH, dtype={'URL_ID': str})
+CONFIG_SNAPSHOT_PATH = CACHE_DIR / 'config_snapshot.json'
+CRAWL_CHECKPOINT_DIR = CACHE_DIR / 'crawl'
+CRAWL_FIRST_YEAR = 1991  # The year in which arXiv started.
+CRAWL_WORKERS = int(os.getenv('ARXIVMLREV_CRAWL_WORKERS', 2))  # Worker processes of a partitioned crawl.
 DATA_ARTICLES_COLUMNS = ['URL_ID', 'Version', 'Published', 'Updated', 'Title', 'Match', 'Categories', 'Abstract']
 DATA_ARTICLES_CSV_COLUMNS = [c for c in DATA_ARTICLES_COLUMNS if c != 'Abstract']
 DATA_ARTICLES_CSV_PATH = DATA_DIR / 'articles.csv'
+DATA_ARTICLES_INDEX_COLUMNS = ['URL_ID', 'Title', 'Abstract']
+DATA_ARTICLES_INDEX_PATH = DATA_DIR / 'articles.index'  # Full-text index of the articles of the store.
 DATA_ARTICLES_MD_PATH = DATA_DIR / 'articles.md'
+DATA_ARTICLES_STORE_MAX_PARTS = 32
+DATA_ARTICLES_STORE_PATH = DATA_DIR / 'articles.parquet'
+DATA_CORPUS_QUERY_PATH = DATA_DIR / 'corpus.query.json'  # Query terms which all articles of the corpus match.
+DATA_CORPUS_STORE_PATH = DATA_DIR / 'corpus.parquet'  # All searched articles, whether or not accepted.
+DUPLICATES_MIN_SIMILARITY = 0.85  # Jaccard similarity of the character shingles of near-duplicate titles.
+DUPLICATES_MINHASH_BANDS = 16
+DUPLICATES_MINHASH_ROWS = 4  # Per band. Titles having a similarity of 0.5 then share a band with a probability of 0.64.
+DUPLICATES_SHINGLE_LENGTH = 4
+DUPLICATES_SUPPRESSED = False  # Whether searches keep only one article of each cluster of near-duplicate titles.
 FEED_CACHE_TTL = datetime.timedelta(hours=23).total_seconds()
 FEED_DESCRIPTION = 'Review articles on machine learning and artificial intelligence that are on arXiv. ' \
                    'As a disclaimer, this feed has no affiliation with arXiv.'
+FEED_HTTP_MAX_AGE = datetime.timedelta(hours=1).total_seconds()
+FEED_INDEX_CACHE_PATH = CACHE_DIR / 'feed_index.parquet.cache'
+FEED_INDEX_NUM_ITEMS = 500  # The latest results searched by a single query page to update the stored feed articles.
+FEED_MAX_NUM_ITEMS = 100
 FEED_NUM_ITEMS = 30
+FEED_REFRESH_CHECK_INTERVAL = datetime.timedelta(minutes=10).total_seconds()
 FEED_TITLE = 'arXiv ML/AI reviews (unaffiliated)'
+FEED_VARIANT_CACHE_SIZE = 256  # Rendered feed variants cached in memory.
+GITHUB_API_URL = os.getenv('ARXIVMLREV_GITHUB_API_URL', 'https://api.github.com')
 GITHUB_MD_PUBLISH_PATH = 'Resources/ArticlesReview.md'
+GITHUB_PUBLISH_ARTIFACTS = {  # Local path -> Path in GitHub repo. Artifacts which don't exist locally are skipped.
+    DATA_ARTICLES_MD_PATH: GITHUB_MD_PUBLISH_PATH,
+    DATA_ARTICLES_CSV_PATH: 'Resources/ArticlesReview.csv',
+    DATA_DIR / 'feed.xml': 'Resources/ArticlesReview.xml',
+}
+GITHUB_PUBLISH_INDEX_PATH = CACHE_DIR / 'publish_index.json'
 GITHUB_PUBLISH_REPO = 'libera-machinelearning/libera-machinelearning.github.io'
+ID_QUERY_CHUNK_SIZE = 200  # This keeps the query URL to a few KB.
+ID_QUERY_MAX_WORKERS = 4
 LOGGING_CONF_PATH = CONFIG_DIR / 'logging.conf'
 MAX_RESULTS_PER_QUERY = 2000 - 2
 MAX_QUERY_ATTEMPTS = 10
-ON_SERVERLESS = bool(os.getenv('GCLOUD_PROJECT'))  # Approximation.
+METRICS_EXPORTERS = [e for e in os.getenv('ARXIVMLREV_METRICS_EXPORTERS', 'json').split(',') if e]  # json, prometheus
+METRICS_PROMETHEUS_DIR = Path(os.getenv('ARXIVMLREV_METRICS_PROMETHEUS_DIR', CACHE_DIR / 'metrics'))
+PAGE_CHECKPOINT_DIR = CACHE_DIR / 'pages'
+PAGE_CHECKPOINT_TTL = datetime.timedelta(hours=12).total_seconds()
+QUERY_BACKEND = os.getenv('ARXIVMLREV_QUERY_BACKEND', 'arxiv')  # Either arxiv or stream.
+QUERY_BACKOFF_BASE = 5  # Seconds.
+QUERY_BACKOFF_MAX = 120  # Seconds.
+QUERY_CACHE_DIR = CACHE_DIR / 'queries'
+QUERY_CACHE_MAX_SIZE = 256 * 1024 ** 2
+QUERY_CACHE_MODE = os.getenv('ARXIVMLREV_QUERY_CACHE', 'off' if ON_SERVERLESS else 'on')  # Either on, off, or replay.
+QUERY_CACHE_TTL = datetime.timedelta(hours=12).total_seconds()
 QUERY_INTERVAL = 3
+QUERY_PAGE_MIN_SIZE = 100
+QUERY_PAGE_TARGET_SECONDS = 30
+QUERY_RATE_LIMIT_PATH = CACHE_DIR / 'query_rate_limit'  # Shares the rate limit across processes.
+QUERY_TIMEOUT = 120
 REPO_URL = 'https://github.com/ml-feeds/arxiv-ml-reviews'
+RUN_REPORT_PATH = (CACHE_DIR if ON_SERVERLESS else DATA_DIR) / 'run_report.json'
+SERVER_HOST = os.getenv('ARXIVMLREV_SERVER_HOST', '0.0.0.0')
+SERVER_PORT = int(os.getenv('ARXIVMLREV_SERVER_PORT', 8080))
+SERVER_WORKERS = int(os.getenv('ARXIVMLREV_SERVER_WORKERS', 1))  # Worker processes of the standalone feed server.
 TERMS_PATH = CONFIG_DIR / 'terms.yml'
-TERMS = json.loads(json.dumps(YAML().load(TERMS_PATH)))
-TERMS_BLACKLIST = sorted(set(TERMS['blacklist']))
-TERMS_WHITELIST = sorted(TERMS['whitelist'])
-TERMS_BLACKLIST_REGEX = _terms_blacklist_regex(TERMS['blacklist'])
-TERMS_WHITELIST_REGEXES = [_term_whitelist_regex(term, assertions) for term, assertions in TERMS['whitelist'].items()]
-URL_ID_BLACKLIST = set(CONFIG_ARTICLES[CONFIG_ARTICLES['Presence'] == 0]['URL_ID'])
-URL_ID_WHITELIST = set(CONFIG_ARTICLES[CONFIG_ARTICLES['Presence'] == 1]['URL_ID'])
+TEXT_INDEX_BM25_B = 0.75
+TEXT_INDEX_BM25_K1 = 1.2
+TEXT_INDEX_MAX_SEGMENTS = 32
+TEXT_INDEX_TITLE_WEIGHT = 2  # The number of times the words of a title are counted, relative to those of an abstract.
+TITLE_QUERY_MAX_LENGTH = 2000  # A longer title query is partitioned, as arXiv can return incomplete results for it.
 URL_ID_WHITELIST_INTERSECTION_IGNORED = ['1707.08561', '1902.01724']
 
+# These are computed from the configuration files on their first access, by way of the module's __getattr__.
+CATEGORIES: List[str]
+CONFIG_ARTICLES: 'pd.DataFrame'
+TERMS: Dict[str, Any]
+TERMS_BLACKLIST: List[str]
+TERMS_WHITELIST: List[str]
+TERMS_BLACKLIST_REGEX: Pattern
+TERMS_WHITELIST_REGEXES: List[Pattern]
+TERMS_WHITELIST_MATCHER: 'TermsMatcher'
+URL_ID_BLACKLIST: Set[str]
+URL_ID_WHITELIST: Set[str]
+
 LOGGING = {  # Ref: https://docs.python.org/3/howto/logging.html#configuring-logging
     'version': 1,
     'formatters': {
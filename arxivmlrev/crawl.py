@@ -0,0 +1,155 @@
+"""Windows of a crawl of the title search which is partitioned by submission date, and checkpoints of crawls."""
+import datetime
+import gzip
+import json
+import logging
+import os
+from pathlib import Path
+import shutil
+import time
+from typing import List, NamedTuple, Optional, Tuple
+
+from arxivmlrev import config
+
+log = logging.getLogger(__name__)
+
+
+class Window(NamedTuple):
+    """Inclusive range of submission dates."""
+    first: datetime.date
+    last: datetime.date
+
+    @property
+    def name(self) -> str:
+        return f'{self.first:%Y%m%d}-{self.last:%Y%m%d}'
+
+    @property
+    def query(self) -> str:
+        return f'submittedDate:[{self.first:%Y%m%d}0000 TO {self.last:%Y%m%d}2359]'
+
+
+def yearly_windows(first_year: int = config.CRAWL_FIRST_YEAR, last_year: Optional[int] = None) -> List[Window]:
+    """Return a window for each year in the given range, with the last year being the current one by default."""
+    last_year = datetime.date.today().year if (last_year is None) else last_year
+    return [Window(datetime.date(year, 1, 1), datetime.date(year, 12, 31)) for year in range(first_year, last_year + 1)]
+
+
+class WindowCheckpoints:
+    """Checkpoints of the raw results, whether or not accepted, of the completed windows of a crawl.
+
+    The checkpoints are stored in a directory named by the fingerprint of the crawl, and so a change to the configured
+    categories, terms, or IDs doesn't reuse them.
+    """
+
+    def __init__(self, fingerprint: str, directory: Optional[Path] = None):
+        directory = directory or config.CRAWL_CHECKPOINT_DIR
+        self._root = directory
+        self._directory = directory / fingerprint
+
+    def _path(self, window: Window) -> Path:
+        return self._directory / f'{window.name}.json.gz'
+
+    def exists(self, window: Window) -> bool:
+        return self._path(window).exists()
+
+    def read(self, window: Window) -> List[dict]:
+        results: List[dict] = json.loads(gzip.decompress(self._path(window).read_bytes()))
+        return results
+
+    def write(self, window: Window, results: List[dict]) -> None:
+        path = self._path(window)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        temp_path.write_bytes(gzip.compress(json.dumps(results, default=str).encode()))
+        os.replace(temp_path, path)
+        log.info('Checkpointed %s results of window %s.', len(results), window.name)
+
+    def discard_stale(self) -> None:
+        """Delete the checkpoints of crawls having a different fingerprint."""
+        if not self._root.exists():
+            return
+        for path in self._root.iterdir():
+            if path.is_dir() and (path != self._directory):
+                shutil.rmtree(path, ignore_errors=True)
+                log.info('Discarded stale crawl checkpoints %s.', path)
+
+    def clear(self) -> None:
+        """Delete the checkpoints of this crawl."""
+        shutil.rmtree(self._directory, ignore_errors=True)
+        log.info('Deleted crawl checkpoints %s.', self._directory)
+
+
+class PageCheckpoint:
+    """Checkpoint of a paged query, holding the offset of its next page and the yielded raw results of its completed
+    pages.
+
+    The results of each completed page are appended to a JSON lines file, with a state file recording the fingerprint of
+    the query, the sort order, the offset of the next page, and the size of the results file which is valid. A
+    checkpoint of a different query, or which is older than `config.PAGE_CHECKPOINT_TTL`, is discarded.
+    """
+
+    def __init__(self, name: str, *, fingerprint: str, sort_by: str, directory: Optional[Path] = None):
+        directory = directory or config.PAGE_CHECKPOINT_DIR
+        self.name = name
+        self._fingerprint = fingerprint
+        self._sort_by = sort_by
+        self._state_path = directory / f'{name}.json'
+        self._results_path = directory / f'{name}.jsonl'
+        self._results_size = 0
+
+    def load(self) -> Tuple[int, List[dict]]:
+        """Return the offset of the next page and the checkpointed results, which are none if there is no checkpoint."""
+        try:
+            state = json.loads(self._state_path.read_text())
+        except FileNotFoundError:
+            return 0, []
+        except ValueError:
+            log.warning('Discarding invalid page checkpoint %s.', self.name)
+            self.clear()
+            return 0, []
+        if (state['fingerprint'] != self._fingerprint) or (state['sort_by'] != self._sort_by):
+            log.info('Discarding stale page checkpoint %s of a different query.', self.name)
+            self.clear()
+            return 0, []
+        if (time.time() - state['time']) > config.PAGE_CHECKPOINT_TTL:
+            log.info('Discarding expired page checkpoint %s.', self.name)
+            self.clear()
+            return 0, []
+
+        try:
+            with self._results_path.open('rb') as file:
+                data = file.read(state['results_size'])
+            if len(data) < state['results_size']:
+                raise ValueError(f'The results file has {len(data)} of {state["results_size"]} bytes.')
+            results = [json.loads(line) for line in data.splitlines()]
+        except (OSError, ValueError) as exc:
+            log.warning('Discarding page checkpoint %s having invalid results: %s', self.name, exc)
+            self.clear()
+            return 0, []
+        self._results_size = state['results_size']
+        log.info('Resuming query of page checkpoint %s at offset %s with %s checkpointed results.',
+                 self.name, state['next_start'], len(results))
+        return state['next_start'], results
+
+    def save(self, next_start: int, results: List[dict]) -> None:
+        """Append the accepted results of a completed page, and record the offset of the next page."""
+        self._state_path.parent.mkdir(parents=True, exist_ok=True)
+        data = b''.join(json.dumps(result, default=str).encode() + b'\n' for result in results)
+        with self._results_path.open('a+b') as file:
+            file.seek(self._results_size)
+            file.truncate()  # Removes any results which were appended after the last saved state.
+            file.write(data)
+        self._results_size += len(data)
+        state = {'fingerprint': self._fingerprint, 'sort_by': self._sort_by, 'next_start': next_start,
+                 'results_size': self._results_size, 'time': time.time()}
+        temp_path = self._state_path.with_name(f'{self._state_path.name}.{os.getpid()}.tmp')
+        temp_path.write_text(json.dumps(state))
+        os.replace(temp_path, self._state_path)
+        log.debug('Saved page checkpoint %s at offset %s.', self.name, next_start)
+
+    def clear(self) -> None:
+        for path in (self._state_path, self._results_path):
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
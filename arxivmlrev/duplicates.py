@@ -0,0 +1,156 @@
+"""Detection of near-duplicate titles by MinHash signatures of their character shingles, with locality-sensitive
+hashing.
+
+The shingles are hashed, and the signatures are computed, as whole numpy arrays. Only the pairs of titles sharing a band
+of their signatures are candidates, for which the exact Jaccard similarity of their shingles is then computed. This
+finds clusters of near-duplicates in near-linear time.
+"""
+import logging
+from typing import Dict, List, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from arxivmlrev import config
+from arxivmlrev.result import alphanumeric_title
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+log = logging.getLogger(__name__)
+
+_ESTIMATE_MARGIN = .25  # At least four standard deviations of a similarity as estimated by 64 hashes.
+_MAX_TITLE_BYTES = 512
+_SHINGLE_HASH_BASE = np.uint32(257)
+
+
+def _shingle_hashes(titles: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the 32-bit hashes of the character shingles of the titles, concatenated, along with the offset of the
+    shingles of each title.
+
+    A title shorter than a shingle is a single shingle, padded by null characters.
+    """
+    length = config.DUPLICATES_SHINGLE_LENGTH
+    padding = b'\0' * (length - 1)
+    encoded = [title.encode()[:_MAX_TITLE_BYTES] for title in titles]
+    chars = np.frombuffer(padding.join(encoded) + padding, dtype=np.uint8).astype(np.uint32)
+    lengths = np.array([len(title) for title in encoded], dtype=np.int64)
+    title_starts = np.cumsum(lengths + len(padding)) - (lengths + len(padding))
+
+    num_positions = len(chars) - length + 1
+    hashes = np.zeros(num_positions, dtype=np.uint32)
+    for offset in range(length):
+        hashes = hashes * _SHINGLE_HASH_BASE + chars[offset:offset + num_positions]  # Wraps around modulo 2^32.
+    num_shingles = np.maximum(lengths - length + 1, 1)
+    shingle_offsets = np.cumsum(num_shingles) - num_shingles
+    positions = np.arange(int(num_shingles.sum())) - np.repeat(shingle_offsets - title_starts, num_shingles)
+    return hashes[positions], shingle_offsets
+
+
+def _signatures(shingle_hashes: np.ndarray, shingle_offsets: np.ndarray) -> np.ndarray:
+    """Return the MinHash signatures of the shingles of the titles as a matrix having a row per title.
+
+    The number of hash functions is `config.DUPLICATES_MINHASH_BANDS * config.DUPLICATES_MINHASH_ROWS`, with each being
+    a multiply-shift hash of 64-bit values to 32 bits.
+    """
+    num_hashes = config.DUPLICATES_MINHASH_BANDS * config.DUPLICATES_MINHASH_ROWS
+    signatures = np.empty((len(shingle_offsets), num_hashes), dtype=np.uint32)
+    if not len(shingle_offsets):
+        return signatures
+    values = shingle_hashes.astype(np.uint64)
+    rng = np.random.default_rng(0)  # The hash functions are fixed, so that signatures are comparable across runs.
+    multipliers = rng.integers(1, np.iinfo(np.uint64).max, size=num_hashes, dtype=np.uint64) | np.uint64(1)
+    increments = rng.integers(0, np.iinfo(np.uint64).max, size=num_hashes, dtype=np.uint64)
+    shift = np.uint64(32)
+    for index, (multiplier, increment) in enumerate(zip(multipliers, increments)):
+        permuted = ((values * multiplier + increment) >> shift).astype(np.uint32)  # Wraps around modulo 2^64.
+        signatures[:, index] = np.minimum.reduceat(permuted, shingle_offsets)
+    return signatures
+
+
+def _candidate_pairs(signatures: np.ndarray) -> np.ndarray:
+    """Return the unique pairs of the positions of the titles which share a band of their signatures.
+
+    Within each bucket of a band, each title is paired with the first title of the bucket, and so the number of pairs is
+    linear in the number of titles.
+    """
+    if len(signatures) < 2:
+        return np.empty((0, 2), dtype=np.int64)
+    rows = config.DUPLICATES_MINHASH_ROWS
+    multipliers = np.random.default_rng(1).integers(1, np.iinfo(np.uint64).max, size=rows, dtype=np.uint64) | 1
+    pairs = [np.empty((0, 2), dtype=np.int64)]
+    for band in range(config.DUPLICATES_MINHASH_BANDS):
+        band_signatures = signatures[:, band * rows:(band + 1) * rows].astype(np.uint64)
+        keys = (band_signatures * multipliers).sum(axis=1)  # Wraps around modulo 2^64.
+        order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[order]
+        is_bucket_start = np.concatenate([[True], sorted_keys[1:] != sorted_keys[:-1]])
+        bucket_starts = np.maximum.accumulate(np.where(is_bucket_start, np.arange(len(order)), 0))
+        pairs.append(np.column_stack([order[bucket_starts], order])[~is_bucket_start])
+    pairs_ = np.sort(np.concatenate(pairs), axis=1)
+    keys = np.unique(pairs_[:, 0] * len(signatures) + pairs_[:, 1])
+    return np.column_stack([keys // len(signatures), keys % len(signatures)])
+
+
+def _similarities(shingle_hashes: np.ndarray, shingle_offsets: np.ndarray, pairs: np.ndarray) -> np.ndarray:
+    """Return the Jaccard similarities of the shingles of the given pairs of titles."""
+    bounds = np.append(shingle_offsets, len(shingle_hashes)).tolist()
+    shingle_sets = {position: set(shingle_hashes[bounds[position]:bounds[position + 1]].tolist())
+                    for position in np.unique(pairs).tolist()}
+    return np.array([len(shingle_sets[position1] & shingle_sets[position2]) /
+                     len(shingle_sets[position1] | shingle_sets[position2]) for position1, position2 in pairs.tolist()])
+
+
+def clusters(titles: Sequence[str]) -> List[List[int]]:
+    """Return the clusters of the positions of near-duplicate titles, each having at least two titles.
+
+    Titles are near-duplicates if the Jaccard similarity of their shingles is at least
+    `config.DUPLICATES_MIN_SIMILARITY`, with clusters being connected by such pairs. Titles without any alphanumeric
+    characters are ignored.
+    """
+    alphanum_titles = [alphanumeric_title(title).lower() for title in titles]
+    positions = np.array([position for position, title in enumerate(alphanum_titles) if title], dtype=np.int64)
+    shingle_hashes, shingle_offsets = _shingle_hashes([alphanum_titles[position] for position in positions])
+    signatures = _signatures(shingle_hashes, shingle_offsets)
+    pairs = _candidate_pairs(signatures)
+    # Pairs whose similarity, as estimated by their signatures, is far below the minimum aren't compared exactly.
+    estimates = (signatures[pairs[:, 0]] == signatures[pairs[:, 1]]).mean(axis=1)
+    pairs = pairs[estimates >= (config.DUPLICATES_MIN_SIMILARITY - _ESTIMATE_MARGIN)]
+    pairs = pairs[_similarities(shingle_hashes, shingle_offsets, pairs) >= config.DUPLICATES_MIN_SIMILARITY]
+    pairs = positions[pairs]
+    parents: Dict[int, int] = {}
+
+    def root(position: int) -> int:
+        parents.setdefault(position, position)
+        while parents[position] != position:
+            parents[position] = parents[parents[position]]
+            position = parents[position]
+        return position
+
+    for position1, position2 in pairs.tolist():
+        parents[root(position1)] = root(position2)
+    clusters_: Dict[int, List[int]] = {}
+    for position in sorted(parents):
+        clusters_.setdefault(root(position), []).append(position)
+    log.debug('Found %s clusters of near-duplicates among %s titles.', len(clusters_), len(titles))
+    return list(clusters_.values())
+
+
+def suppress(df: 'pd.DataFrame') -> 'pd.DataFrame':
+    """Return the articles without their near-duplicates.
+
+    Of each cluster of near-duplicate titles, any whitelisted articles are kept, and otherwise the most recently updated
+    article is kept.
+    """
+    is_whitelisted = df['URL_ID'].isin(config.URL_ID_WHITELIST).to_numpy()
+    updated = df['Updated'].to_numpy()
+    suppressed = []
+    for cluster in clusters(df['Title'].tolist()):
+        kept = [position for position in cluster if is_whitelisted[position]] or \
+            [max(cluster, key=lambda position: updated[position])]
+        for position in cluster:
+            if position not in kept:
+                suppressed.append(position)
+                log.info('Suppressed near-duplicate %s "%s" of %s.', df['URL_ID'].iat[position],
+                         df['Title'].iat[position], ', '.join(df['URL_ID'].iloc[kept]))
+    log.info('Suppressed %s near-duplicates of %s articles.', len(suppressed), len(df))
+    return df.drop(df.index[suppressed]).reset_index(drop=True)
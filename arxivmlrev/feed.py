@@ -1,64 +1,224 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 import logging
+import threading
+import time
+from typing import Mapping, NamedTuple, Optional, TYPE_CHECKING
 
-from cachetools.func import ttl_cache
-from feedgen.feed import FeedGenerator
-from humanize import naturalsize
-import pandas as pd
+from arxivmlrev import config, instrument
+from arxivmlrev.feed_cache import FeedArtifact, FeedCache, FileFeedCache
 
-from arxivmlrev import config
-from arxivmlrev.result import versioned_url_id_to_url
-from arxivmlrev.search import Searcher
+if TYPE_CHECKING:
+    import pandas as pd
+
+    from arxivmlrev.feed_index import FeedIndex
+    from arxivmlrev.search import Searcher
 
 log = logging.getLogger(__name__)
 
 
+class FeedParams(NamedTuple):
+    """Parameters of a feed variant, with each filter being optional.
+
+    If there is a query, the articles having any of its words are ranked by their relevance to it.
+    """
+    category: Optional[str] = None
+    term: Optional[str] = None
+    year: Optional[int] = None
+    query: Optional[str] = None
+    num_items: int = config.FEED_NUM_ITEMS
+
+    @property
+    def title(self) -> str:
+        filters = [str(f) for f in (self.category, self.term, self.year) if f is not None]
+        if self.query is not None:
+            filters.append(f'"{self.query}"')
+        return f'{config.FEED_TITLE}: {", ".join(filters)}' if filters else config.FEED_TITLE
+
+
 class Feed:
-    def __init__(self) -> None:
-        self._searcher = Searcher(max_results=config.FEED_NUM_ITEMS)
+    """Feeds of the search results, with variants being selected from a shared index by `FeedParams`.
+
+    The index is created from the stored articles, as updated by a single search of the latest results, and so the
+    filters of a variant select from all results, not only the latest. It is cached for all processes. The rendered
+    feed of each variant is cached in memory until the index is refreshed.
+    """
+
+    ARGS = ('category', 'term', 'year', 'q', 'count')
+
+    class ParamsInvalid(Exception):
+        pass
+
+    def __init__(self, cache: Optional[FeedCache] = None) -> None:
+        self._searcher: Optional['Searcher'] = None  # Created on first search, keeping its imports off cold starts.
+        self._cache = cache or FileFeedCache()
+        self._refresh_lock = threading.Lock()
+        self._refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='feed-refresh')
+        self._refresh_future: Optional[Future] = None
+        self._refresh_future_lock = threading.Lock()
+        self._index: Optional['FeedIndex'] = None
+        self._index_generated: Optional[float] = None
+        self._variants: 'OrderedDict[FeedParams, FeedArtifact]' = OrderedDict()
+        self._variants_lock = threading.Lock()
+
+    @classmethod
+    def params(cls, args: Mapping[str, str]) -> FeedParams:
+        """Return the parameters of the feed variant of the query arguments of a request."""
+        unknown_args = sorted(set(args) - set(cls.ARGS))
+        if unknown_args:
+            raise cls.ParamsInvalid(f'The query arguments {", ".join(unknown_args)} are unknown. '
+                                    f'The supported arguments are {", ".join(cls.ARGS)}.')
+        try:
+            year = int(args['year']) if args.get('year') else None
+            num_items = int(args['count']) if args.get('count') else config.FEED_NUM_ITEMS
+        except ValueError:
+            raise cls.ParamsInvalid('The query arguments year and count must be integers.')
+        if not (1 <= num_items <= config.FEED_MAX_NUM_ITEMS):
+            raise cls.ParamsInvalid(f'The query argument count must be between 1 and {config.FEED_MAX_NUM_ITEMS}.')
+        query = ' '.join(args.get('q', '').split()) or None
+        if query is not None:
+            from arxivmlrev.text_index import tokenize
+            if not tokenize(query):
+                raise cls.ParamsInvalid('The query argument q must have an alphanumeric word.')
+        return FeedParams(category=args.get('category', '').strip() or None,
+                          term=' '.join(args.get('term', '').split()) or None, year=year, query=query,
+                          num_items=num_items)
 
     @staticmethod
-    def _init_feed() -> FeedGenerator:
-        feed = FeedGenerator()
-        feed.title(config.FEED_TITLE)
-        feed.link(href=config.REPO_URL, rel='self')
-        feed.description(config.FEED_DESCRIPTION)
-        return feed
-
-    def _output(self, results: pd.DataFrame) -> bytes:
-        feed = self._init_feed()
-        for _, result in results.iterrows():
-            entry = feed.add_entry(order='append')
-
-            # Add title
-            primary_category = result.Categories.split(', ', 1)[0]
-            years = result.Published.year if (result.Published.year == result.Updated.year) else \
-                f'{result.Published.year}-{result.Updated.year}'
-            title = f'{result.Title} ({years}) ({primary_category})'
-            entry.title(title)
-
-            # Add link
-            link = versioned_url_id_to_url(result.URL_ID, result.Version)
-            entry.link(href=link)
-            entry.guid(link, permalink=True)
-
-            entry.description(result.Abstract)
-            entry.published(result.Updated)  # Intentionally not result.Published.
-            for category in result.Categories.split(', '):
-                entry.category(term=category)
-            log.debug('Added: %s (%s). It matched %s.', title, result.Updated, repr(result.Match))
-
-        text_: bytes = feed.rss_str(pretty=True)
-        return text_
-
-    @ttl_cache(maxsize=1, ttl=config.FEED_CACHE_TTL)
-    def feed(self) -> bytes:
-        log.info('Requesting %s results.', config.FEED_NUM_ITEMS)
-        results = self._searcher.search()
-        log.debug('Received %s results.', len(results))
-        text = self._output(results)
-        log.info('XML output has %s items and size %s.', text.count(b'<item>'), humanize_len(text))
-        return text
+    def _output(results: 'pd.DataFrame', *, generated: float, title: str = config.FEED_TITLE) -> bytes:
+        from arxivmlrev.render import rss
+        if log.isEnabledFor(logging.DEBUG):
+            for title_, updated, match in zip(results['Title'], results['Updated'], results['Match']):
+                log.debug('Adding: %s (%s). It matched %s.', title_, updated, repr(match))
+        return rss(results, generated=generated, title=title)
+
+    def _search(self) -> bytes:
+        """Return the serialized index of the stored articles updated with the latest search results."""
+        from arxivmlrev import store
+        from arxivmlrev.feed_index import FeedIndex
+        if self._searcher is None:
+            from arxivmlrev.search import Searcher
+            self._searcher = Searcher(max_results=config.FEED_INDEX_NUM_ITEMS)
+        log.info('Requesting %s results.', config.FEED_INDEX_NUM_ITEMS)
+        with instrument.run('feed'):
+            results = self._searcher.search()
+            log.debug('Received %s results.', len(results))
+            with instrument.stage('read') as stage:
+                stored = store.read_articles()
+                stage.count('rows', len(stored))
+            results = store.merge(stored, results)
+            with instrument.stage('serialize') as stage:
+                data = FeedIndex.to_bytes(results)
+                stage.count('rows', len(results))
+        log.info('Serialized feed index has %s results and size %s.', len(results), humanize_len(data))
+        return data
+
+    @property
+    def index_generated(self) -> Optional[float]:
+        """Return the generation time of the index which is loaded in memory, if any."""
+        return self._index_generated
+
+    def _current_index(self, artifact: FeedArtifact) -> 'FeedIndex':
+        """Return the index of the cached artifact, loading it and discarding the cached variants if it is new."""
+        from arxivmlrev.feed_index import FeedIndex
+        with self._variants_lock:
+            if (self._index is None) or (self._index_generated != artifact.generated):
+                self._index = FeedIndex.from_bytes(artifact.body)
+                self._index_generated = artifact.generated
+                self._variants.clear()
+            return self._index
+
+    def _refresh_in_background(self) -> Future:
+        """Return the future of the single in-flight background refresh, starting it if there isn't one."""
+        with self._refresh_future_lock:
+            if (self._refresh_future is None) or self._refresh_future.done():
+                log.info('Starting background refresh of feed index.')
+                self._refresh_future = self._refresh_executor.submit(self.refresh, max_age=config.FEED_CACHE_TTL)
+            return self._refresh_future
+
+    def _index_artifact(self) -> FeedArtifact:
+        """Return the cached index artifact, even if stale, in which case it is refreshed in the background.
+
+        If the index isn't cached, all callers wait for the single in-flight refresh.
+        """
+        artifact = self._cache.get()
+        if artifact is None:
+            log.info('Feed index is not cached.')
+            artifact_: FeedArtifact = self._refresh_in_background().result()
+            return artifact_
+        if artifact.age >= config.FEED_CACHE_TTL:
+            log.info('Cached feed index is stale, having age %.0fs.', artifact.age)
+            self._refresh_in_background()
+        return artifact
+
+    def artifact(self, params: Optional[FeedParams] = None) -> FeedArtifact:
+        """Return the rendered feed variant of the given parameters, which are the defaults if unspecified.
+
+        The variant is generated at the time its index was generated, and so all processes render the same bytes, and
+        the same entity tag, for the same index.
+        """
+        params = params or FeedParams()
+        index_artifact = self._index_artifact()
+        index = self._current_index(index_artifact)
+        with self._variants_lock:
+            artifact = self._variants.get(params)
+            if (artifact is not None) and (self._index_generated == index_artifact.generated):
+                self._variants.move_to_end(params)
+                return artifact
+        with instrument.stage('render') as stage:
+            results = index.select(params)
+            body = self._output(results, generated=index_artifact.generated, title=params.title)
+            artifact = FeedArtifact(body=body, generated=index_artifact.generated)
+            stage.count('rss_items', len(results))
+        log.info('Rendered feed for %s with %s items and size %s.', params, len(results), humanize_len(artifact.body))
+        with self._variants_lock:
+            if self._index_generated == index_artifact.generated:
+                self._variants[params] = artifact
+                while len(self._variants) > config.FEED_VARIANT_CACHE_SIZE:
+                    self._variants.popitem(last=False)
+        return artifact
+
+    def feed(self, params: Optional[FeedParams] = None) -> bytes:
+        return self.artifact(params).body
+
+    def refresh(self, *, max_age: float = 0) -> FeedArtifact:
+        """Search for and cache the feed index, unless the cached index is younger than the given age in seconds.
+
+        Only one thread of one process searches at a time. Others wait for it, and then use its cached index.
+        """
+        with self._refresh_lock, self._cache.lock():
+            artifact = self._cache.get()
+            if (artifact is not None) and (artifact.age < max_age):
+                return artifact
+            artifact = FeedArtifact(body=self._search(), generated=time.time())
+            self._cache.set(artifact)
+            return artifact
+
+
+class FeedRefresher(threading.Thread):
+    """Background thread which periodically refreshes the cached feed index once it is older than its time-to-live.
+
+    If `preload` is true, the cached index is also loaded into memory after each check, along with the rendered default
+    feed, so that requests don't wait for them.
+    """
+
+    def __init__(self, feed: Feed, *, interval: float = config.FEED_REFRESH_CHECK_INTERVAL, preload: bool = False):
+        super().__init__(name='feed-refresher', daemon=True)
+        self._feed = feed
+        self._interval = interval
+        self._preload = preload
+
+    def run(self) -> None:
+        while True:
+            try:
+                self._feed.refresh(max_age=config.FEED_CACHE_TTL)
+                if self._preload:
+                    self._feed.artifact()
+            except Exception:
+                log.exception('Failed to refresh the feed index.')
+            time.sleep(self._interval)
 
 
 def humanize_len(text: bytes) -> str:
+    from humanize import naturalsize
     return naturalsize(len(text), gnu=True, format='%.0f')
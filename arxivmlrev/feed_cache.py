@@ -0,0 +1,101 @@
+from abc import ABC, abstractmethod
+import contextlib
+from dataclasses import dataclass
+import fcntl
+from functools import cached_property
+import hashlib
+import logging
+import os
+from pathlib import Path
+import struct
+import threading
+import time
+from typing import ContextManager, Iterator, Optional, Tuple
+
+from arxivmlrev import config
+
+log = logging.getLogger(__name__)
+
+_HEADER = struct.Struct('!d')  # Generation time in seconds since the epoch.
+
+
+@dataclass(frozen=True)
+class FeedArtifact:
+    body: bytes
+    generated: float  # Seconds since the epoch.
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.generated
+
+    @cached_property
+    def etag(self) -> str:
+        """Return a strong entity tag of the body, as a quoted string. It is computed once per artifact."""
+        return f'"{hashlib.sha256(self.body).hexdigest()[:32]}"'
+
+
+class FeedCache(ABC):
+    """Cache of the serialized feed index, which can be shared by multiple processes."""
+
+    @abstractmethod
+    def get(self) -> Optional[FeedArtifact]:
+        """Return the cached artifact, if any, regardless of its age."""
+
+    @abstractmethod
+    def set(self, artifact: FeedArtifact) -> None:
+        """Cache the artifact."""
+
+    def lock(self) -> ContextManager[None]:
+        """Return a context manager which excludes other processes from refreshing the feed index at the same time."""
+        return contextlib.nullcontext()
+
+
+class FileFeedCache(FeedCache):
+    """Cache of the serialized feed index in a local file, which is shared by all processes on the host.
+
+    It is not shared across hosts. On serverless, the file is in the temporary directory of an instance, and so each
+    instance searches and refreshes the index on its own.
+
+    The artifact which was last read is kept in memory, and the file is read again only once it is replaced, as per its
+    inode, size, and modification time.
+    """
+
+    def __init__(self, path: Path = config.FEED_INDEX_CACHE_PATH):
+        self._path = path
+        self._artifact: Optional[Tuple[Tuple[int, int, int], FeedArtifact]] = None  # Version of file, and artifact.
+        self._artifact_lock = threading.Lock()
+
+    def get(self) -> Optional[FeedArtifact]:
+        with self._artifact_lock:
+            try:
+                with self._path.open('rb') as file:
+                    stat = os.fstat(file.fileno())
+                    version = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+                    if (self._artifact is not None) and (self._artifact[0] == version):
+                        return self._artifact[1]
+                    data = file.read()
+            except FileNotFoundError:
+                self._artifact = None
+                return None
+            generated, = _HEADER.unpack_from(data)
+            artifact = FeedArtifact(body=data[_HEADER.size:], generated=generated)
+            self._artifact = version, artifact
+            log.debug('Read feed index generated at %s from %s.', generated, self._path)
+            return artifact
+
+    def set(self, artifact: FeedArtifact) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        path_tmp = self._path.with_name(f'{self._path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        path_tmp.write_bytes(_HEADER.pack(artifact.generated) + artifact.body)
+        os.replace(path_tmp, self._path)
+        log.debug('Cached feed index generated at %s to %s.', artifact.generated, self._path)
+
+    @contextlib.contextmanager
+    def lock(self) -> Iterator[None]:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        with self._path.with_name(f'{self._path.name}.lock').open('w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
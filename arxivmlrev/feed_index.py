@@ -0,0 +1,81 @@
+from collections import defaultdict
+from functools import cached_property
+import io
+import logging
+from typing import Dict, Iterable, List, Optional, TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+
+from arxivmlrev.text_index import TextIndex
+
+if TYPE_CHECKING:
+    from arxivmlrev.feed import FeedParams
+
+log = logging.getLogger(__name__)
+
+
+def _positions(keys: Iterable[Iterable[str]]) -> Dict[str, np.ndarray]:
+    """Return the ascending positions of the rows having each key."""
+    positions: Dict[str, List[int]] = defaultdict(list)
+    for position, row_keys in enumerate(keys):
+        for key in row_keys:
+            positions[key].append(position)
+    return {key: np.array(key_positions, dtype=np.int64) for key, key_positions in positions.items()}
+
+
+class FeedIndex:
+    """In-memory index of the articles of the feeds, sorted by their last updated date.
+
+    Secondary indexes hold the positions of the articles by lowercase category, lowercase matched term, and published
+    year. A feed variant is selected by intersecting the positions of its filters. A full-text index of the titles and
+    abstracts, which is created on the first query, ranks the articles matching a query.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self._df = df.reset_index(drop=True)
+        categories = self._df['Categories'].astype(str).str.lower().str.split(', ')
+        self._by_category = _positions(categories)
+        matches = self._df['Match'].astype(object).where(self._df['Match'].notna(), None)
+        self._by_term = _positions(([' '.join(m.lower().split())] if m else []) for m in matches)
+        self._by_year = _positions([str(year)] for year in self._df['Published'].dt.year)
+        log.info('Indexed %s articles by %s categories, %s terms, and %s years.',
+                 len(self._df), len(self._by_category), len(self._by_term), len(self._by_year))
+
+    def __len__(self) -> int:
+        return len(self._df)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'FeedIndex':
+        return cls(pd.read_parquet(io.BytesIO(data)))
+
+    @staticmethod
+    def to_bytes(df: pd.DataFrame) -> bytes:
+        """Return the serialized articles from which an index can be created by `from_bytes`."""
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=False)
+        return buffer.getvalue()
+
+    @cached_property
+    def _text_index(self) -> TextIndex:
+        return TextIndex.from_frame(self._df)
+
+    def select(self, params: 'FeedParams') -> pd.DataFrame:
+        """Return the articles matching the parameters, being the most relevant ones if there is a query, and otherwise
+        the most recently updated ones."""
+        empty = np.empty(0, dtype=np.int64)
+        selected: Optional[np.ndarray] = None
+        for index, key in ((self._by_category, params.category), (self._by_term, params.term),
+                           (self._by_year, params.year)):
+            if key is None:
+                continue
+            positions = index.get(str(key).lower(), empty)
+            selected = positions if (selected is None) else np.intersect1d(selected, positions, assume_unique=True)
+        if params.query is not None:
+            scores = self._text_index.scores(params.query)
+            matches = np.flatnonzero(scores > 0)
+            selected = matches if (selected is None) else np.intersect1d(selected, matches, assume_unique=True)
+            selected = selected[np.argsort(-scores[selected], kind='stable')]  # Ties are kept in order of recency.
+        if selected is None:
+            return self._df.head(params.num_items)
+        return self._df.take(selected[:params.num_items])
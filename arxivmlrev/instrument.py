@@ -0,0 +1,254 @@
+"""Instrumentation of the stages of a run, such as a refresh of the results or a render of the feed.
+
+Stages are recorded into the current run, if one was started, with a run report being exported when it finishes. The
+current run is that of the context of a thread, and so concurrent runs, such as a background refresh of the feed index
+while requests are served, are recorded separately. Threads of a `ContextThreadPoolExecutor` record into the current run
+of the thread which submitted their tasks.
+"""
+from abc import ABC, abstractmethod
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+import contextlib
+import contextvars
+import datetime
+import functools
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Mapping, Optional, Type, TypeVar, cast
+
+from arxivmlrev import config
+from arxivmlrev.util.resource import resident_set_size
+
+log = logging.getLogger(__name__)
+
+_Function = TypeVar('_Function', bound=Callable[..., Any])
+
+
+class Stage:
+    """Handle of a running stage, for recording the bytes it received and the counts of what it processed."""
+
+    __slots__ = ('bytes_received', 'counts')
+
+    def __init__(self) -> None:
+        self.bytes_received = 0
+        self.counts: Counter = Counter()
+
+    def add_bytes(self, num_bytes: int) -> None:
+        self.bytes_received += num_bytes
+
+    def count(self, name: str, num: int = 1) -> None:
+        self.counts[name] += num
+
+
+class StageStats:
+    """Totals of all recorded executions of a stage."""
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.rss_delta_bytes = 0
+        self.bytes_received = 0
+        self.counts: Counter = Counter()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'calls': self.calls, 'wall_seconds': round(self.wall_seconds, 6),
+                'cpu_seconds': round(self.cpu_seconds, 6), 'rss_delta_bytes': self.rss_delta_bytes,
+                'bytes_received': self.bytes_received, 'counts': dict(sorted(self.counts.items()))}
+
+
+class Run:
+    """Thread-safe record of the stages of a run."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = time.time()
+        self._start_perf_counter = time.perf_counter()
+        self._stages: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+
+    def record(self, name: str, *, wall_seconds: float, cpu_seconds: float = 0.0, rss_delta_bytes: int = 0,
+               bytes_received: int = 0, counts: Optional[Mapping[str, int]] = None) -> None:
+        """Add an execution of the named stage to its totals."""
+        with self._lock:
+            stats = self._stages.get(name)
+            if stats is None:
+                stats = self._stages[name] = StageStats()
+            stats.calls += 1
+            stats.wall_seconds += wall_seconds
+            stats.cpu_seconds += cpu_seconds
+            stats.rss_delta_bytes += rss_delta_bytes
+            stats.bytes_received += bytes_received
+            if counts:
+                stats.counts.update(counts)
+
+    def report(self, *, status: str) -> Dict[str, Any]:
+        with self._lock:
+            stages = {name: stats.to_dict() for name, stats in self._stages.items()}
+        return {
+            'run': self.name,
+            'status': status,
+            'started': datetime.datetime.fromtimestamp(self.started, datetime.timezone.utc).isoformat(),
+            'wall_seconds': round(time.perf_counter() - self._start_perf_counter, 6),
+            'rss_bytes': resident_set_size(),
+            'stages': stages,
+        }
+
+
+class Exporter(ABC):
+    """Exporter of run reports."""
+
+    @abstractmethod
+    def export(self, report: Mapping[str, Any]) -> None:
+        pass
+
+
+class JSONFileExporter(Exporter):
+    """Exporter which writes the report of the latest run to a JSON file."""
+
+    def __init__(self, path: Path = config.RUN_REPORT_PATH):
+        self._path = path
+
+    def export(self, report: Mapping[str, Any]) -> None:
+        _write_atomically(self._path, json.dumps(report, indent=2) + '\n')
+        log.info('Wrote run report to %s.', self._path)
+
+
+class PrometheusTextFileExporter(Exporter):
+    """Exporter which writes the metrics of the latest run of each name to a file in the Prometheus text format.
+
+    The file can be collected by the textfile collector of the Prometheus node exporter. Runs of different names are
+    written to different files, as configured by `METRICS_PROMETHEUS_DIR`.
+    """
+
+    def __init__(self, directory: Path = config.METRICS_PROMETHEUS_DIR):
+        self._directory = directory
+
+    @staticmethod
+    def _format(report: Mapping[str, Any]) -> str:
+        prefix = config.PACKAGE_NAME
+        run_labels = f'run="{report["run"]}"'
+        lines = [
+            f'# TYPE {prefix}_run_timestamp_seconds gauge',
+            f'{prefix}_run_timestamp_seconds{{{run_labels}}} '
+            f'{datetime.datetime.fromisoformat(report["started"]).timestamp()}',
+            f'# TYPE {prefix}_run_success gauge',
+            f'{prefix}_run_success{{{run_labels}}} {int(report["status"] == "ok")}',
+            f'# TYPE {prefix}_run_wall_seconds gauge',
+            f'{prefix}_run_wall_seconds{{{run_labels}}} {report["wall_seconds"]}',
+            f'# TYPE {prefix}_run_rss_bytes gauge',
+            f'{prefix}_run_rss_bytes{{{run_labels}}} {report["rss_bytes"]}',
+        ]
+        for metric in ('calls', 'wall_seconds', 'cpu_seconds', 'rss_delta_bytes', 'bytes_received'):
+            lines.append(f'# TYPE {prefix}_stage_{metric} gauge')
+            for stage, stats in report['stages'].items():
+                lines.append(f'{prefix}_stage_{metric}{{{run_labels},stage="{stage}"}} {stats[metric]}')
+        lines.append(f'# TYPE {prefix}_stage_count gauge')
+        for stage, stats in report['stages'].items():
+            for name, count in stats['counts'].items():
+                lines.append(f'{prefix}_stage_count{{{run_labels},stage="{stage}",name="{name}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, report: Mapping[str, Any]) -> None:
+        path = self._directory / f'{config.PACKAGE_NAME}_{report["run"]}.prom'
+        _write_atomically(path, self._format(report))
+        log.info('Wrote run metrics to %s.', path)
+
+
+EXPORTERS: Dict[str, Type[Exporter]] = {'json': JSONFileExporter, 'prometheus': PrometheusTextFileExporter}
+
+_current_run: contextvars.ContextVar[Optional[Run]] = contextvars.ContextVar('_current_run', default=None)
+
+
+class ContextThreadPoolExecutor(ThreadPoolExecutor):
+    """Thread pool executor which runs each task in a copy of the context of the thread which submitted it, and so in
+    its current run."""
+
+    def submit(self, fn: Callable[..., Any], /, *args: Any, **kwargs: Any) -> Future:
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+def _write_atomically(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    temp_path.write_text(text)
+    os.replace(temp_path, path)
+
+
+def configured_exporters() -> List[Exporter]:
+    """Return the exporters named by `METRICS_EXPORTERS`."""
+    exporters = []
+    for name in config.METRICS_EXPORTERS:
+        try:
+            exporters.append(EXPORTERS[name]())
+        except KeyError:
+            log.error('Ignoring metrics exporter "%s" which is not one of: %s', name, ', '.join(EXPORTERS))
+    return exporters
+
+
+def record(name: str, **kwargs: Any) -> None:
+    """Add an execution of the named stage to the current run, if any. Refer to `Run.record` for the arguments."""
+    run_ = _current_run.get()
+    if run_ is not None:
+        run_.record(name, **kwargs)
+
+
+@contextlib.contextmanager
+def run(name: str, *, exporters: Optional[List[Exporter]] = None) -> Iterator[Run]:
+    """Record a run, making it the current one, and export its report when it finishes, even if by an exception.
+
+    The configured exporters are used by default. An exporter error is logged, and not raised. A run started while
+    another is current is merged into it.
+    """
+    current_run = _current_run.get()
+    if current_run is not None:
+        yield current_run
+        return
+    run_ = Run(name)
+    token = _current_run.set(run_)
+    status = 'error'
+    try:
+        yield run_
+        status = 'ok'
+    finally:
+        _current_run.reset(token)
+        report = run_.report(status=status)
+        for exporter in (configured_exporters() if exporters is None else exporters):
+            try:
+                exporter.export(report)
+            except Exception:
+                log.exception('Failed to export run report using %s.', exporter.__class__.__name__)
+
+
+@contextlib.contextmanager
+def stage(name: str) -> Iterator[Stage]:
+    """Measure the wall time, the CPU time of the thread, and the change in RSS of a stage of the current run, if any.
+
+    The yielded handle can be used to record the bytes received and the counts of what was processed.
+    """
+    stage_ = Stage()
+    if _current_run.get() is None:
+        yield stage_
+        return
+    rss_start, cpu_start, wall_start = resident_set_size(), time.thread_time(), time.perf_counter()
+    try:
+        yield stage_
+    finally:
+        record(name, wall_seconds=time.perf_counter() - wall_start, cpu_seconds=time.thread_time() - cpu_start,
+               rss_delta_bytes=resident_set_size(rss_start), bytes_received=stage_.bytes_received,
+               counts=stage_.counts)
+
+
+def staged(name: str) -> Callable[[_Function], _Function]:
+    """Return a decorator which records each call of the decorated function as an execution of the named stage."""
+    def decorator(func: _Function) -> _Function:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with stage(name):
+                return func(*args, **kwargs)
+        return cast(_Function, wrapper)
+    return decorator
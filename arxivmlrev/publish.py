@@ -0,0 +1,124 @@
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+from github import Github, InputGitTreeElement
+from github.Repository import Repository
+
+from arxivmlrev import config, instrument
+
+log = logging.getLogger(__name__)
+
+
+def git_blob_sha(content: bytes) -> str:
+    """Return the SHA which git assigns to a blob having the given content."""
+    return hashlib.sha1(b'blob %d\0' % len(content) + content).hexdigest()
+
+
+class PublishIndex:
+    """Local index of the content hash and git blob SHA of each artifact as of its last successful publish."""
+
+    def __init__(self, path: Path = config.GITHUB_PUBLISH_INDEX_PATH):
+        self._path = path
+
+    def read(self) -> Dict[str, Dict[str, str]]:
+        try:
+            index: Dict[str, Dict[str, str]] = json.loads(self._path.read_text())
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            log.warning('Ignoring invalid publish index %s.', self._path)
+            return {}
+        return index
+
+    def write(self, index: Mapping[str, Mapping[str, str]]) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self._path.with_name(f'{self._path.name}.{os.getpid()}.tmp')
+        temp_path.write_text(json.dumps(index, indent=2, sort_keys=True))
+        os.replace(temp_path, self._path)
+
+
+class GitHubPublisher:
+    """Publish artifacts to a GitHub repo in a single commit, skipping those which are unchanged.
+
+    An artifact whose content hash matches the local publish index is skipped without any GitHub request.
+    Otherwise its git blob SHA is compared with the one in the tree of the head commit of the branch, and so the remote
+    content is never downloaded.
+    The remaining artifacts are committed together using the git data API.
+    """
+
+    def __init__(self, repo_name: str = config.GITHUB_PUBLISH_REPO, *, branch: Optional[str] = None,
+                 index: Optional[PublishIndex] = None, repo: Optional[Repository] = None):
+        self._repo_name = repo_name
+        self._branch = branch
+        self._index = index or PublishIndex()
+        self._repo = repo
+
+    def _get_repo(self) -> Repository:
+        if self._repo is None:
+            github_token = os.environ['GITHUB_ACCESS_TOKEN'].strip()
+            log.debug('GitHub access token was read.')
+            self._repo = Github(github_token, base_url=config.GITHUB_API_URL).get_repo(self._repo_name)
+            log.info('GitHub access token was validated.')
+        return self._repo
+
+    def _index_key(self, remote_path: str) -> str:
+        return f'{self._repo_name}/{remote_path}'
+
+    @instrument.staged('publish')
+    def publish(self, artifacts: Mapping[str, bytes], *, message: str = 'Refresh reviews',
+                force: bool = False) -> Optional[str]:
+        """Publish the given artifacts, keyed by their path in the repo, and return the SHA of the commit, if any.
+
+        If `force` is true, the local publish index is not used to skip artifacts.
+        """
+        index = self._index.read()
+        hashes = {path: hashlib.sha256(content).hexdigest() for path, content in artifacts.items()}
+        changed = {path: content for path, content in artifacts.items()
+                   if force or (index.get(self._index_key(path), {}).get('sha256') != hashes[path])}
+        if not changed:
+            log.info('All %s artifacts are unchanged since they were last published.', len(artifacts))
+            return None
+        log.info('%s of %s artifacts changed since they were last published: %s',
+                 len(changed), len(artifacts), ', '.join(changed))
+
+        repo = self._get_repo()
+        branch = repo.get_branch(self._branch or repo.default_branch)
+        head_commit = repo.get_git_commit(branch.commit.sha)
+        remote_blob_shas = {element.path: element.sha for element in
+                            repo.get_git_tree(head_commit.tree.sha, recursive=True).tree if element.type == 'blob'}
+        log.debug('Read tree of head commit %s of branch %s.', head_commit.sha, branch.name)
+
+        blob_shas = {path: git_blob_sha(content) for path, content in changed.items()}
+        outdated = [path for path in changed if remote_blob_shas.get(path) != blob_shas[path]]
+        commit_sha = None
+        if outdated:
+            elements = [InputGitTreeElement(path, '100644', 'blob', content=changed[path].decode())
+                        for path in outdated]
+            tree = repo.create_git_tree(elements, base_tree=head_commit.tree)
+            commit = repo.create_git_commit(message, tree, [head_commit])
+            repo.get_git_ref(f'heads/{branch.name}').edit(commit.sha)
+            commit_sha = commit.sha
+            log.info('Published %s artifacts to GitHub in commit %s: %s',
+                     len(outdated), commit_sha, ', '.join(outdated))
+        else:
+            log.info('Changed artifacts are already up to date on GitHub.')
+
+        for path in changed:
+            index[self._index_key(path)] = {'blob_sha': blob_shas[path], 'sha256': hashes[path]}
+        self._index.write(index)
+        return commit_sha
+
+
+def read_artifacts(paths: Mapping[Path, str]) -> Dict[str, bytes]:
+    """Return the contents of the existing local artifacts, keyed by their configured path in the repo."""
+    artifacts = {}
+    for local_path, remote_path in paths.items():
+        try:
+            artifacts[remote_path] = local_path.read_bytes()
+        except FileNotFoundError:
+            log.warning('Local artifact %s does not exist, and so it will not be published.', local_path)
+    return artifacts
@@ -0,0 +1,284 @@
+import gzip
+import json
+import logging
+import random
+import struct
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from xml.etree import ElementTree
+
+import arxiv
+import feedparser
+import requests
+
+from arxivmlrev import config, instrument
+from arxivmlrev.atom import AtomFeedParser
+from arxivmlrev.util.cache import DiskCache
+from arxivmlrev.util.ratelimit import RateLimiter
+from arxivmlrev.util.time import verbose_sleep
+
+log = logging.getLogger(__name__)
+
+_GZIP_MAGIC = b'\x1f\x8b'
+_TOTAL = struct.Struct('!q')  # Total number of results reported by arXiv, or -1 if unknown, preceding a payload.
+
+
+class QueryCache:
+    """Persistent cache of the results of arXiv API queries.
+
+    Its mode is one of:
+    * on: Cached results are used if unexpired, and new results are cached.
+    * off: The cache is neither read nor written.
+    * replay: Cached results are used even if expired, and the network is never used.
+
+    The results are cached by the offset of the query, and not by its number of requested results, as the page size of
+    a paged query is adapted. A cached page is used for any number of requested results, being truncated to it if
+    longer, and so a rerun follows the pages of the cached run even if its page sizes differ.
+    """
+
+    MODES = ('on', 'off', 'replay')
+
+    class ModeInvalid(Exception):
+        pass
+
+    def __init__(self, mode: str = config.QUERY_CACHE_MODE):
+        if mode not in self.MODES:
+            msg = f'The query cache mode "{mode}" is invalid. It must be one of {", ".join(self.MODES)}.'
+            log.error(msg)
+            raise self.ModeInvalid(msg)
+        self.mode = mode
+        self._cache = DiskCache(config.QUERY_CACHE_DIR, max_size=config.QUERY_CACHE_MAX_SIZE,
+                                ttl=config.QUERY_CACHE_TTL)
+
+    @staticmethod
+    def _key(*, query: str, id_list: Sequence[str], start: int, sort_by: str) -> str:
+        return json.dumps([query, list(id_list), start, sort_by])
+
+    def get(self, *, refresh: bool = False, **kwargs: Any) -> List[dict]:
+        """Return the results of the query, using the cache per its mode.
+
+        If `refresh` is true, a cached result is not used unless in replay mode.
+        """
+        return self.get_with_total(refresh=refresh, **kwargs)[0]
+
+    @staticmethod
+    def _decode(value: bytes) -> Tuple[Optional[int], bytes]:
+        """Return the total number of results and the payload of a cached value.
+
+        A value cached before the total was cached with it is only a payload, with the total being unknown.
+        """
+        if value[:2] == _GZIP_MAGIC:
+            return None, value
+        total, = _TOTAL.unpack_from(value)
+        return (None if (total < 0) else total), value[_TOTAL.size:]
+
+    def get_with_total(self, *, refresh: bool = False, **kwargs: Any) -> Tuple[List[dict], Optional[int]]:
+        """Return the results of the query along with the total number of results reported by arXiv, if known, as per
+        `get`."""
+        if self.mode == 'off':
+            return _query(**kwargs)
+
+        key = self._key(query=kwargs['query'], id_list=kwargs['id_list'], start=kwargs['start'],
+                        sort_by=kwargs['sort_by'])
+        cached = None if (refresh and self.mode != 'replay') else \
+            self._cache.get(key, ignore_expiration=(self.mode == 'replay'))
+        if cached is not None:
+            with instrument.stage('query_cache') as stage:
+                total, payload = self._decode(cached)
+                results: List[dict] = json.loads(gzip.decompress(payload))[:kwargs['max_results']]
+                stage.count('hits')
+                stage.count('results', len(results))
+            log.debug('Read %s results of query at offset %s from cache.', len(results), kwargs['start'])
+            return results, total
+        if self.mode == 'replay':
+            log.warning('Query at offset %s is not cached. It is considered to have no results.', kwargs['start'])
+            return [], None
+
+        results, total = _query(**kwargs)
+        if results:  # Note: An empty list is also returned for an HTTP error, and so it is not cached.
+            payload = gzip.compress(json.dumps(results, default=str).encode())
+            self._cache.set(key, _TOTAL.pack(-1 if (total is None) else total) + payload)
+        return results, total
+
+
+class _ArxivSearch(arxiv.Search):
+    """Search of the arxiv package which also records the total number of results reported by arXiv."""
+
+    total_results: Optional[int] = None
+
+    def _parse(self, url: str) -> List[dict]:
+        # Note: This is as per `arxiv.Search._parse` of the pinned version of the arxiv package.
+        result = feedparser.parse(url)
+        if result.get('status') != 200:
+            log.error('HTTP Error %s in query', result.get('status', 'no status'))
+            return []
+        total = result['feed'].get('opensearch_totalresults')
+        self.total_results = None if (total is None) else int(total)
+        entries: List[dict] = result['entries']
+        return entries
+
+
+def _counted_chunks(chunks: Iterable[bytes], stage: instrument.Stage) -> Iterator[bytes]:
+    for chunk in chunks:
+        stage.add_bytes(len(chunk))
+        yield chunk
+
+
+def _query(*, query: str, id_list: Sequence[str], start: int, max_results: int, sort_by: str) \
+        -> Tuple[List[dict], Optional[int]]:
+    """Return the results of an arXiv API query along with the total number of results reported by arXiv, if known."""
+    if config.QUERY_BACKEND == 'stream':
+        parser = AtomFeedParser()
+        results = list(_stream_query(query=query, id_list=id_list, start=start, max_results=max_results,
+                                     sort_by=sort_by, parser=parser))
+        return results, parser.total_results
+    with RATE_LIMITER:
+        with instrument.stage('fetch') as stage:
+            search = _ArxivSearch(query=query, id_list=','.join(id_list), max_results=max_results, start=start,
+                                  sort_by=sort_by, sort_order='descending', max_chunk_results=1000)
+            results = search.download()
+            stage.count('queries')
+            stage.count('results', len(results))
+    return results, search.total_results
+
+
+def _stream_query(*, query: str, id_list: Sequence[str], start: int, max_results: int, sort_by: str,
+                  parser: AtomFeedParser) -> Iterator[dict]:
+    """Yield the results of an arXiv API query as they are parsed from its streamed response by the given parser.
+
+    As with the arxiv package, an HTTP error is logged, and no further results are then yielded. Closing the iterator
+    early closes the response. The recorded fetch stage includes the time spent by the consumer of the results.
+
+    The rate limiter is held only until the response starts, and so not while the results are yielded, as it is also
+    locked by other threads and processes.
+    """
+    params: Dict[str, Union[int, str]] = {'search_query': query, 'id_list': ','.join(id_list), 'start': start,
+                                          'max_results': max_results, 'sortBy': sort_by, 'sortOrder': 'descending'}
+    try:
+        with instrument.stage('fetch') as stage:
+            stage.count('queries')
+            with RATE_LIMITER:
+                response = requests.get(config.ARXIV_API_URL, params=params, stream=True,
+                                        timeout=config.QUERY_TIMEOUT)
+            with response:
+                response.raise_for_status()
+                chunks = _counted_chunks(response.iter_content(chunk_size=64 * 1024), stage)
+                for result in parser.parse(chunks):
+                    stage.count('results')
+                    yield result
+    except (requests.RequestException, ElementTree.ParseError) as exc:
+        log.error('Streamed query at offset %s failed: %s', start, exc)
+
+
+def _query_total(*, id_list: Sequence[str]) -> Optional[int]:
+    """Return the total number of results of an arXiv API query of a list of IDs as reported by its response, which
+    counts only the IDs which exist, or None if the query fails."""
+    params: Dict[str, Union[int, str]] = {'id_list': ','.join(id_list), 'max_results': 0}
+    parser = AtomFeedParser()
+    with RATE_LIMITER:
+        try:
+            with instrument.stage('fetch') as stage:
+                stage.count('queries')
+                response = requests.get(config.ARXIV_API_URL, params=params, timeout=config.QUERY_TIMEOUT)
+                response.raise_for_status()
+                for _ in parser.parse([response.content]):
+                    pass
+        except (requests.RequestException, ElementTree.ParseError) as exc:
+            log.error('Query of the total number of results of %s IDs failed: %s', len(id_list), exc)
+            return None
+    return parser.total_results
+
+
+def iter_query(*, query: str = '', id_list: Sequence[str] = (), start: int = 0, max_results: int,
+               sort_by: str) -> Iterator[dict]:
+    """Yield the results of an arXiv API query.
+
+    With the stream query backend and the query cache off, the results are yielded as they are parsed, and closing the
+    iterator early stops reading the response. Otherwise, this is equivalent to iterating over the results of `query`.
+    """
+    if (config.QUERY_BACKEND != 'stream') or (_QUERY_CACHE.mode != 'off'):
+        yield from _QUERY_CACHE.get(query=query, id_list=id_list, start=start, max_results=max_results, sort_by=sort_by)
+        return
+    yield from _stream_query(query=query, id_list=id_list, start=start, max_results=max_results, sort_by=sort_by,
+                             parser=AtomFeedParser())
+
+
+def backoff_delay(attempt: int) -> float:
+    """Return a jittered exponential backoff delay in seconds to wait after the given failed attempt number."""
+    # Ref: https://aws.amazon.com/blogs/architecture/exponential-backoff-and-jitter/ (full jitter)
+    return random.uniform(0, min(config.QUERY_BACKOFF_MAX, config.QUERY_BACKOFF_BASE * 2 ** (attempt - 1)))
+
+
+def max_query_attempts() -> int:
+    """Return the maximum number of attempts of a query, which is one if the query cache is in replay mode."""
+    return 1 if (_QUERY_CACHE.mode == 'replay') else config.MAX_QUERY_ATTEMPTS
+
+
+def query(*, query: str = '', id_list: Sequence[str] = (), start: int = 0, max_results: int, sort_by: str,
+          refresh: bool = False) -> List[dict]:
+    """Return the results of an arXiv API query."""
+    return _QUERY_CACHE.get(query=query, id_list=id_list, start=start, max_results=max_results, sort_by=sort_by,
+                            refresh=refresh)
+
+
+def query_with_total(*, query: str = '', start: int = 0, max_results: int, sort_by: str, refresh: bool = False) \
+        -> Tuple[List[dict], Optional[int]]:
+    """Return the results of an arXiv API query along with the total number of results reported by arXiv, if known."""
+    return _QUERY_CACHE.get_with_total(query=query, id_list=(), start=start, max_results=max_results, sort_by=sort_by,
+                                       refresh=refresh)
+
+
+def query_id_list(id_list: Sequence[str], *, sort_by: str, chunk_size: int = config.ID_QUERY_CHUNK_SIZE) -> List[dict]:
+    """Return the results of an arXiv API query of a list of IDs of any length.
+
+    The IDs are queried in chunks by a bounded pool of workers, subject to the shared rate limit. A chunk which fails or
+    returns fewer results than its number of IDs is retried on its own after a backoff, up to
+    `config.MAX_QUERY_ATTEMPTS` times. A short chunk is however accepted if arXiv reports that its missing IDs don't
+    exist, such as if they are withdrawn. The merged results are sorted in descending order if `sort_by` is
+    lastUpdatedDate or submittedDate.
+    """
+    chunks = [id_list[i:i + chunk_size] for i in range(0, len(id_list), chunk_size)]
+    num_chunks = len(chunks)
+
+    max_attempts = max_query_attempts()
+
+    def _query_chunk(chunk_num: int, chunk: Sequence[str]) -> List[dict]:
+        results: List[dict] = []
+        for attempt in range(1, max_attempts + 1):
+            if attempt > 1:
+                verbose_sleep(backoff_delay(attempt - 1))
+            try:
+                results = query(id_list=chunk, max_results=len(chunk), sort_by=sort_by, refresh=(attempt > 1))
+            except Exception as exc:
+                log.warning('Attempt %s of ID query chunk %s/%s failed: %s', attempt, chunk_num, num_chunks, exc)
+                results = []
+                continue
+            if len(results) >= len(chunk):
+                break
+            log.warning('Attempt %s of ID query chunk %s/%s returned %s results for %s IDs.',
+                        attempt, chunk_num, num_chunks, len(results), len(chunk))
+            if _QUERY_CACHE.mode != 'replay':
+                total = _query_total(id_list=chunk)
+                if (total is not None) and (total <= len(results)):
+                    log.info('Accepting ID query chunk %s/%s, as arXiv reports that only %s of its %s IDs exist.',
+                             chunk_num, num_chunks, total, len(chunk))
+                    break
+        else:
+            log.error('ID query chunk %s/%s returned %s results for %s IDs after %s attempts.',
+                      chunk_num, num_chunks, len(results), len(chunk), max_attempts)
+        return results
+
+    log.info('Querying %s IDs in %s chunks of up to %s IDs.', len(id_list), num_chunks, chunk_size)
+    with instrument.ContextThreadPoolExecutor(max_workers=config.ID_QUERY_MAX_WORKERS, thread_name_prefix='ID-query') \
+            as executor:
+        chunks_results = list(executor.map(_query_chunk, range(1, num_chunks + 1), chunks))
+    results = [result for chunk_results in chunks_results for result in chunk_results]
+
+    sort_key = {'lastUpdatedDate': 'updated', 'submittedDate': 'published'}.get(sort_by)
+    if sort_key:
+        results.sort(key=lambda r: r[sort_key], reverse=True)
+    log.info('Queried %s IDs, returning %s results.', len(id_list), len(results))
+    return results
+
+
+RATE_LIMITER = RateLimiter(config.QUERY_INTERVAL, path=config.QUERY_RATE_LIMIT_PATH)  # Shared by all arXiv queries.
+_QUERY_CACHE = QueryCache()
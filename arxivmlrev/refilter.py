@@ -0,0 +1,120 @@
+"""Offline reapplication of the configured ID and term rules to the stored corpus of searched articles."""
+import json
+import logging
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from arxivmlrev import config
+from arxivmlrev.result import alphanumeric_title
+
+log = logging.getLogger(__name__)
+
+
+def evaluate(df: pd.DataFrame) -> pd.DataFrame:
+    """Return the given articles with the columns Match, Accepted, and Cause, per the configured rules.
+
+    The rules are those of `Searcher._filter_results`, which are applied here to whole columns. The cause is the rule
+    which accepted or rejected the article.
+    """
+    df = df.copy()
+    alphanum_titles = df['Title'].map(alphanumeric_title)
+    df['Match'] = config.TERMS_WHITELIST_MATCHER.match_many(alphanum_titles)
+    is_id_whitelisted = df['URL_ID'].isin(config.URL_ID_WHITELIST).to_numpy()
+    is_id_blacklisted = df['URL_ID'].isin(config.URL_ID_BLACKLIST).to_numpy()
+    is_matched = df['Match'].notna().to_numpy()
+
+    # The blacklist is searched only in the titles to which it can apply, as the whitelist is faster to match.
+    blacklist_regex = config.TERMS_BLACKLIST_REGEX
+    to_search = ~is_id_whitelisted & ~is_id_blacklisted & is_matched
+    blacklist_matches = pd.Series(None, index=df.index, dtype=object)
+    blacklist_matches[to_search] = [(match.group() if match else None) for match in
+                                    map(blacklist_regex.search, alphanum_titles[to_search])]
+    is_blacklisted = blacklist_matches.notna().to_numpy()
+
+    df['Accepted'] = is_id_whitelisted | (to_search & ~is_blacklisted)
+    df['Cause'] = np.select(
+        [is_id_whitelisted, is_id_blacklisted, is_blacklisted, ~is_matched],
+        ['whitelisted ID', 'blacklisted ID', 'blacklisted term "' + blacklist_matches.astype(str) + '"',
+         'no whitelisted term'],
+        'whitelisted term "' + df['Match'].astype(str) + '"')
+    return df
+
+
+def diff(df_results: pd.DataFrame, df_evaluated: pd.DataFrame) -> List[str]:
+    """Return the lines of the diff of the results with the accepted evaluated articles, with the cause of each change.
+
+    Added, removed, and rematched articles are prefixed by +, -, and ~ respectively.
+    """
+    df_old = df_results.set_index('URL_ID')
+    df_evaluated = df_evaluated.sort_values(['Updated', 'URL_ID'], ascending=False)
+    is_old = df_evaluated['URL_ID'].isin(df_old.index)
+    is_accepted = df_evaluated['Accepted']
+    df_added = df_evaluated[is_accepted & ~is_old]
+    df_removed = df_evaluated[~is_accepted & is_old]
+    df_kept = df_evaluated[is_accepted & is_old]
+    old_matches = df_old['Match'].astype(object).fillna('').reindex(df_kept['URL_ID']).to_numpy()
+    df_rematched = df_kept[df_kept['Match'].fillna('').to_numpy() != old_matches]
+
+    lines = [f'+ {row.URL_ID} {row.Title} ({row.Cause})' for row in df_added.itertuples()]
+    lines += [f'- {row.URL_ID} {row.Title} ({row.Cause})' for row in df_removed.itertuples()]
+    lines += [f'~ {row.URL_ID} {row.Title} (whitelisted term "{df_old.at[row.URL_ID, "Match"]}" -> "{row.Match}")'
+              for row in df_rematched.itertuples()]
+    log.info('Reapplying the rules adds %s, removes %s, and rematches %s of %s results.',
+             len(df_added), len(df_removed), len(df_rematched), len(df_old))
+    return lines
+
+
+def query_terms() -> Dict[str, List[str]]:
+    """Return the configured categories and terms of the search query."""
+    return {'categories': sorted(config.CATEGORIES), 'whitelisted terms': config.TERMS_WHITELIST,
+            'blacklisted terms': config.TERMS_BLACKLIST}
+
+
+def read_corpus_query_terms() -> Optional[Dict[str, List[str]]]:
+    """Return the query terms which all articles of the corpus match, or None if they are unknown."""
+    path = config.DATA_CORPUS_QUERY_PATH
+    if not path.exists():
+        return None
+    terms: Dict[str, List[str]] = json.loads(path.read_text())
+    return terms
+
+
+def write_corpus_query_terms(*, full: bool) -> None:
+    """Write the query terms which all articles of the corpus match after a refresh with the configured terms.
+
+    A full refresh searches all articles matching the configured terms. An incremental refresh instead narrows the
+    preexisting terms to those which are also configured, as it searches only the recently updated articles.
+    """
+    terms = query_terms()
+    if not full:
+        corpus_terms = read_corpus_query_terms()
+        if corpus_terms is None:
+            return
+        terms = {'categories': sorted(set(corpus_terms['categories']) & set(terms['categories'])),
+                 'whitelisted terms': sorted(set(corpus_terms['whitelisted terms']) & set(terms['whitelisted terms'])),
+                 'blacklisted terms': sorted(set(corpus_terms['blacklisted terms']) | set(terms['blacklisted terms']))}
+    config.DATA_CORPUS_QUERY_PATH.write_text(json.dumps(terms, indent=2) + '\n')
+
+
+def query_warnings(corpus_terms: Optional[Dict[str, List[str]]]) -> List[str]:
+    """Return the lines of the warnings of the configured query terms which would return articles not in the corpus.
+
+    The articles which only the widened search query would return cannot be evaluated, and so their addition is not in
+    the diff. The warnings are prefixed by !.
+    """
+    if corpus_terms is None:
+        return ['! The query terms of the corpus are unknown, and so articles which would be added may be missing from '
+                'the diff. The corpus is completed by running refresh --full.']
+    terms = query_terms()
+    widenings = {'category': set(terms['categories']) - set(corpus_terms['categories']),
+                 'whitelisted term': set(terms['whitelisted terms']) - set(corpus_terms['whitelisted terms']),
+                 'blacklisted term': set(corpus_terms['blacklisted terms']) - set(terms['blacklisted terms'])}
+    lines = []
+    for kind, values in widenings.items():
+        change = 'removed' if kind.startswith('blacklisted') else 'added'
+        lines += [f'! The {change} {kind} "{value}" widens the search query beyond the corpus, and so the articles '
+                  'which only it would add are missing from the diff. They are searched by running refresh --full.'
+                  for value in sorted(values)]
+    return lines
@@ -0,0 +1,95 @@
+import datetime
+from email.utils import format_datetime
+import re
+from typing import List
+from xml.sax.saxutils import escape
+
+import pandas as pd
+
+from arxivmlrev import config
+
+_ESCAPED_ENTITIES = {'"': '&quot;'}
+_INVALID_XML_CHARS_REGEX = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')  # These aren't allowed in XML 1.0.
+_RSS_DATE_FORMAT = '%a, %d %b %Y %H:%M:%S +0000'  # RFC 822 date in UTC.
+
+
+def _escape(texts: pd.Series) -> pd.Series:
+    """Return the texts escaped for use as XML character data, as by `_escape_text`."""
+    return texts.str.replace(_INVALID_XML_CHARS_REGEX, '', regex=True).str.replace('&', '&amp;', regex=False) \
+        .str.replace('<', '&lt;', regex=False).str.replace('>', '&gt;', regex=False)
+
+
+def _escape_text(text: str) -> str:
+    """Return the text escaped for use as XML character data, without any characters which aren't allowed in XML."""
+    return escape(_INVALID_XML_CHARS_REGEX.sub('', text))
+
+
+def _linked_categories(categories: pd.Series) -> pd.Series:
+    return '[' + categories + '](https://arxiv.org/list/' + categories + '/recent)'
+
+
+def _primary_categories(df: pd.DataFrame) -> pd.Series:
+    return df['Categories'].astype(str).str.split(', ', n=1).str[0].astype(str)
+
+
+def _years(df: pd.DataFrame) -> pd.Series:
+    """Return the published year, or the published and updated years if they differ, of each row."""
+    published_years = df['Published'].dt.year.astype(str)
+    updated_years = df['Updated'].dt.year.astype(str)
+    return published_years.where(published_years == updated_years, published_years + '-' + updated_years)
+
+
+def linked_category(category: str) -> str:
+    return f'[{category}](https://arxiv.org/list/{category}/recent)'
+
+
+def markdown_list(df: pd.DataFrame) -> str:
+    """Return the markdown list of the articles, with one line per article."""
+    if df.empty:
+        return ''
+    url_ids = df['URL_ID'].astype(str)
+    lines = '* [' + df['Title'].astype(str) + ' (' + _years(df) + ')](https://arxiv.org/abs/' + url_ids + \
+        ') │ [pdf](https://arxiv.org/pdf/' + url_ids + ') │ ' + _linked_categories(_primary_categories(df))
+    return '\n'.join(lines.tolist()) + '\n'
+
+
+def rss(df: pd.DataFrame, *, generated: float, title: str = config.FEED_TITLE) -> bytes:
+    """Return the RSS 2.0 feed of the articles, in their given order, built at the given time in seconds since the
+    epoch.
+
+    The same articles and time always result in the same bytes.
+    """
+    url_links = 'http://arxiv.org/abs/' + df['URL_ID'].astype(str) + 'v' + df['Version'].astype(str)
+    titles = _escape(df['Title'].astype(str) + ' (' + _years(df) + ') (' + _primary_categories(df) + ')')
+    descriptions = _escape(df['Abstract'].fillna('').astype(str))
+    pub_dates = df['Updated'].dt.tz_convert(datetime.timezone.utc).dt.strftime(_RSS_DATE_FORMAT)
+    # Note: The updated date is intentionally used as the publication date, rather than the published date.
+    categories = [''.join(f'\n      <category>{escape(c)}</category>' for c in cats.split(', '))
+                  for cats in df['Categories'].astype(str).tolist()]
+
+    link = escape(config.REPO_URL, _ESCAPED_ENTITIES)
+    parts: List[str] = [
+        "<?xml version='1.0' encoding='UTF-8'?>\n"
+        '<rss xmlns:atom="http://www.w3.org/2005/Atom" xmlns:content="http://purl.org/rss/1.0/modules/content/" '
+        'version="2.0">\n'
+        '  <channel>\n'
+        f'    <title>{_escape_text(title)}</title>\n'
+        f'    <link>{link}</link>\n'
+        f'    <description>{escape(config.FEED_DESCRIPTION)}</description>\n'
+        f'    <atom:link href="{link}" rel="self"/>\n'
+        '    <docs>http://www.rssboard.org/rss-specification</docs>\n'
+        f'    <generator>{config.PACKAGE_NAME}</generator>\n'
+        f'    <lastBuildDate>{format_datetime(datetime.datetime.fromtimestamp(generated, datetime.timezone.utc))}'
+        '</lastBuildDate>\n'
+    ]
+    for item in zip(titles.tolist(), url_links.tolist(), descriptions.tolist(), categories, pub_dates.tolist()):
+        title, url_link, description, item_categories, pub_date = item
+        parts.append('    <item>\n'
+                     f'      <title>{title}</title>\n'
+                     f'      <link>{url_link}</link>\n'
+                     f'      <description>{description}</description>\n'
+                     f'      <guid isPermaLink="true">{url_link}</guid>{item_categories}\n'
+                     f'      <pubDate>{pub_date}</pubDate>\n'
+                     '    </item>\n')
+    parts.append('  </channel>\n</rss>\n')
+    return ''.join(parts).encode()
@@ -0,0 +1,75 @@
+from email.utils import formatdate, parsedate_to_datetime
+import logging
+from typing import Dict, Mapping, Tuple
+
+from arxivmlrev import config
+from arxivmlrev.feed import Feed
+from arxivmlrev.feed_cache import FeedArtifact
+
+log = logging.getLogger(__name__)
+
+Response = Tuple[bytes, int, Dict[str, str]]
+
+
+def _is_etag_matched(if_none_match: str, etag: str) -> bool:
+    """Return whether the If-None-Match header value matches the entity tag, using weak comparison."""
+    if if_none_match.strip() == '*':
+        return True
+    etags = (e.strip() for e in if_none_match.split(','))
+    return any(e.removeprefix('W/') == etag for e in etags)
+
+
+def _is_unmodified_since(if_modified_since: str, generated: float) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return int(generated) <= since.timestamp()
+
+
+def feed_response(artifact: FeedArtifact, request_headers: Mapping[str, str]) -> Response:
+    """Return the body, status code, and headers of a response with the feed, honoring conditional request headers.
+
+    A 304 response without a body is returned if the If-None-Match header matches the ETag of the feed, or, in the
+    absence of If-None-Match, if the feed was not modified after the If-Modified-Since header.
+    """
+    etag = artifact.etag
+    headers = {
+        'Cache-Control': f'public, max-age={config.FEED_HTTP_MAX_AGE:.0f}',
+        'ETag': etag,
+        'Last-Modified': formatdate(artifact.generated, usegmt=True),
+    }
+    if_none_match = request_headers.get('If-None-Match')
+    if_modified_since = request_headers.get('If-Modified-Since')
+    if if_none_match is not None:
+        is_unmodified = _is_etag_matched(if_none_match, etag)
+    elif if_modified_since is not None:
+        is_unmodified = _is_unmodified_since(if_modified_since, artifact.generated)
+    else:
+        is_unmodified = False
+    if is_unmodified:
+        log.info('Feed is unmodified for the conditional request.')
+        return b'', 304, headers
+    headers['Content-Type'] = 'text/xml; charset=utf-8'
+    return artifact.body, 200, headers
+
+
+def text_response(message: str, status: int = 200) -> Response:
+    """Return the body, status code, and headers of a plain text response."""
+    return f'{message}\n'.encode(), status, {'Content-Type': 'text/plain; charset=utf-8'}
+
+
+def error_response(message: str, status: int) -> Response:
+    """Return the body, status code, and headers of a plain text error response."""
+    return text_response(message, status)
+
+
+def feed_request_response(feed: Feed, args: Mapping[str, str], request_headers: Mapping[str, str]) -> Response:
+    """Return the body, status code, and headers of a response to a request for the feed variant of the query
+    arguments, with an invalid argument being answered with status 400."""
+    try:
+        params = Feed.params(args)
+    except Feed.ParamsInvalid as exc:
+        log.info('Invalid request: %s', exc)
+        return error_response(str(exc), 400)
+    return feed_response(feed.artifact(params), request_headers)
@@ -1,52 +1,59 @@
-from dataclasses import dataclass
 import datetime
 import logging
 import re
-from typing import Any, Dict, List, Optional
-
-from dateutil.parser import parse as dateutil_parse
+from typing import Any, Dict, Optional, Tuple
 
 from arxivmlrev import config
+from arxivmlrev.util.time import parse_datetime
 
 _REGEX_NOT_ALPHANUM = re.compile(r'\W+')
+_UNSET: Any = object()
 _URL_BASE = 'http://arxiv.org/abs/'
 
 log = logging.getLogger(__name__)
 
 
-@dataclass
 class Result:
-    result: dict
-
-    @property
-    def _alphanum_title(self) -> str:
-        return _REGEX_NOT_ALPHANUM.sub(' ', self.title).strip()
+    """Parsed result of the arXiv API.
+
+    All fields are parsed once from the raw result dict. The raw result dict is retained as `result` only if
+    `keep_raw` is true.
+    """
+
+    __slots__ = ('_alphanum_title', '_title_whitelist_match', 'abstract_multiline', 'categories', 'published', 'result',
+                 'title', 'updated', 'url_id', 'version')
+
+    def __init__(self, result: dict, *, keep_raw: bool = False):
+        self.result: Optional[dict] = result if keep_raw else None
+        url_id, version = result['arxiv_url'].replace(_URL_BASE, '', 1).rsplit('v', 1)
+        self.url_id: str = url_id
+        # Note: Unlike result['id'], this version-agnostic URL ID is actually unique, especially for results older than
+        # 2007.
+        self.version: int = int(version)
+        self.published: datetime.datetime = parse_datetime(result['published'])  # tz aware
+        self.updated: datetime.datetime = parse_datetime(result['updated'])  # tz aware
+        self.title: str = result['title'].replace('\n ', '')
+        self.abstract_multiline: str = result['summary']
+        self.categories: Tuple[str, ...] = self._parse_categories(result)
+        self._alphanum_title = alphanumeric_title(self.title)
+        self._title_whitelist_match: Optional[str] = _UNSET
+
+    def __repr__(self) -> str:
+        return f'{self.__class__.__name__}({self.url_id_versioned!r}, {self.title!r})'
+
+    @staticmethod
+    def _parse_categories(result: dict) -> Tuple[str, ...]:
+        """Return the categories, with the primary category first and the others sorted."""
+        primary = result['arxiv_primary_category']['term']
+        categories = {tag['term'] for tag in result['tags']}
+        categories = {c for c in categories if ' ' not in c}  # Example of invalid category: 'A.1; I.2.7'
+        categories.discard(primary)
+        return (primary, *sorted(categories))
 
     @property
     def abstract(self) -> str:
         return self.abstract_multiline.replace('\n', ' ')
 
-    @property
-    def abstract_multiline(self) -> str:
-        """Return a multiline abstract."""
-        return self.result['summary']
-
-    @property
-    def categories(self) -> List[str]:
-        categories = [tag['term'] for tag in self.result['tags']]
-        categories = [c for c in categories if ' ' not in c]  # Example of invalid category: 'A.1; I.2.7'
-        categories.sort()
-
-        # Ensure primary category is first
-        primary = self.category
-        try:
-            categories.remove(primary)
-        except ValueError:
-            pass
-        categories.insert(0, primary)
-
-        return categories
-
     @property
     def categories_str(self) -> str:
         return ', '.join(self.categories)
@@ -54,7 +61,7 @@ class Result:
     @property
     def category(self) -> str:
         """Return the primary category."""
-        return self.result['arxiv_primary_category']['term']
+        return self.categories[0]
 
     @property
     def is_id_blacklisted(self) -> bool:
@@ -73,26 +80,9 @@ class Result:
     @property
     def title_whitelist_match(self) -> Optional[str]:
         """Return the matching string, if any, of the title against the regular expressions of the whitelisted terms."""
-        title = self._alphanum_title
-        regexes = config.TERMS_WHITELIST_REGEXES
-        for regex in regexes:
-            match = regex.search(title)
-            if match:
-                return match.group()
-        return None
-
-    @property
-    def title(self) -> str:
-        return self.result['title'].replace('\n ', '')
-
-    @property
-    def url_id(self) -> str:
-        """Return the unique version-agnostic URL ID.
-
-        Unlike `self.result['id']`, this version-agnostic URL ID is actually unique, especially for results older than
-        2007.
-        """
-        return self.url_id_versioned.rsplit('v', 1)[0]
+        if self._title_whitelist_match is _UNSET:
+            self._title_whitelist_match = config.TERMS_WHITELIST_MATCHER.match(self._alphanum_title)
+        return self._title_whitelist_match
 
     @property
     def url_id_versioned(self) -> str:
@@ -100,19 +90,7 @@ class Result:
 
         Unlike `self.result['id']`, this versioned URL ID is actually unique, especially for results older than 2007.
         """
-        return self.result['arxiv_url'].replace(_URL_BASE, '', 1)
-
-    @property
-    def version(self) -> int:
-        return int(self.url_id_versioned.rsplit('v', 1)[1])
-
-    @property
-    def published(self) -> datetime.datetime:
-        return dateutil_parse(self.result['published'])  # tz aware
-
-    @property
-    def updated(self) -> datetime.datetime:
-        return dateutil_parse(self.result['updated'])  # tz aware
+        return f'{self.url_id}v{self.version}'
 
     @property
     def published_year(self) -> int:
@@ -130,5 +108,10 @@ class Result:
                 }
 
 
+def alphanumeric_title(title: str) -> str:
+    """Return the title with each run of non-alphanumeric characters replaced by a single space, for matching."""
+    return _REGEX_NOT_ALPHANUM.sub(' ', title).strip()
+
+
 def versioned_url_id_to_url(url_id: str, version: int) -> str:
     return f'{_URL_BASE}{url_id}v{version}'
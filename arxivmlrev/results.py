@@ -1,13 +1,17 @@
 from datetime import date
 import logging
-import os
+from typing import Optional
 
-from github import Github
 import pandas as pd
 
-from arxivmlrev import config
+from arxivmlrev import config, duplicates, instrument, refilter, store
+from arxivmlrev.accumulator import ResultsAccumulator
 from arxivmlrev.feed import Feed
+from arxivmlrev.publish import GitHubPublisher, read_artifacts
+from arxivmlrev.render import linked_category, markdown_list
 from arxivmlrev.search import Searcher
+from arxivmlrev.store import ArticlesStore
+from arxivmlrev.text_index import TextIndexStore
 from arxivmlrev.util.string import readable_list
 
 log = logging.getLogger(__name__)
@@ -15,18 +19,70 @@ log = logging.getLogger(__name__)
 
 class Results:
     def __init__(self):
-        self._df_results = pd.read_csv(config.DATA_ARTICLES_CSV_PATH, parse_dates=['Published', 'Updated'])
+        self._store = ArticlesStore()
+        self._text_index = TextIndexStore()
+        self._df_results = store.read_articles(config.DATA_ARTICLES_CSV_COLUMNS)
 
+    @instrument.staged('index')
+    def _update_text_index(self, df_results_new: Optional[pd.DataFrame] = None) -> None:
+        """Index the given new or updated results if the text index exists, or otherwise reindex all stored results."""
+        if (df_results_new is not None) and self._text_index.exists():
+            self._text_index.append(df_results_new)
+        else:
+            self._text_index.write(self._store.read(config.DATA_ARTICLES_INDEX_COLUMNS))
+
+    @instrument.staged('write_csv')
     def _write_csv(self) -> None:
         df = self._df_results[config.DATA_ARTICLES_CSV_COLUMNS]
         df.to_csv(config.DATA_ARTICLES_CSV_PATH, index=False, date_format="%Y-%m-%d")
         log.info('Finished writing CSV file with %s rows.', len(df))
 
-    def refresh(self) -> int:
-        """Refresh search results locally."""
+    def refresh(self, full: bool = False, partitioned: bool = False,
+                suppress_duplicates: bool = config.DUPLICATES_SUPPRESSED) -> int:
+        """Refresh search results locally.
+
+        By default, only the results updated since the most recently updated preexisting result are searched for, and
+        these are merged into the preexisting results. This assumes an unchanged configuration. If `full` is true, or
+        if there are no preexisting results, the full search is instead rerun.
+
+        If `partitioned` is true, the title search of a full search is crawled in windows of submission dates, using
+        worker processes, with each completed window being checkpointed for a rerun after a failure.
+
+        If `suppress_duplicates` is true, only one result of each cluster of near-duplicate titles is kept, with any
+        whitelisted results being kept.
+        """
         df_results_old = self._df_results
-        log.info('Preexisting CSV data file has %s rows.', len(df_results_old))
-        df_results_new = self._df_results = Searcher().search()
+        log.info('Preexisting results have %s rows.', len(df_results_old))
+        corpus = ResultsAccumulator()
+        is_full = full or df_results_old.empty
+        if is_full:
+            log.info('Running a full search.')
+            df_results_new = Searcher(partitioned=partitioned, corpus=corpus,
+                                      suppress_duplicates=suppress_duplicates).search()
+            self._store.write(df_results_new)
+            self._update_text_index()
+        else:
+            updated_since = df_results_old['Updated'].max().date()
+            log.info('Running an incremental search for results updated since %s.', updated_since)
+            df_results_updated = Searcher(updated_since=updated_since, corpus=corpus,
+                                          suppress_duplicates=suppress_duplicates).search()
+            is_store_current = self._store.exists() and self._store.matches(df_results_old)
+            # Note: The store is not current if the preexisting results were read from the CSV data file instead.
+            df_results_new = store.merge(self._store.read() if is_store_current else df_results_old, df_results_updated)
+            if suppress_duplicates:  # This suppresses duplicates of the preexisting results too.
+                with instrument.stage('deduplicate') as stage:
+                    df_results_new = duplicates.suppress(df_results_new)
+                    stage.count('rows', len(df_results_new))
+            url_ids_appended = set(df_results_old['URL_ID']) | set(df_results_updated['URL_ID'])
+            if is_store_current and (set(df_results_new['URL_ID']) == url_ids_appended):
+                self._store.append(df_results_updated)
+                self._update_text_index(df_results_updated)
+            else:  # The store is either to be created, or to be replaced, or to have results removed.
+                self._store.write(df_results_new)
+                self._update_text_index()
+        ArticlesStore(config.DATA_CORPUS_STORE_PATH).append(corpus.to_frame())
+        refilter.write_corpus_query_terms(full=is_full)
+        self._df_results = df_results_new
         num_increase = len(df_results_new) - len(df_results_old)
         logger = log.info if num_increase >= 0 else log.error
         logger('Updated dataframe has %s rows. This is a difference of %+d rows since the last update.',
@@ -36,31 +92,90 @@ class Results:
         log.info('Any newly written data files can be checked into the remote repository.')
         return num_increase
 
-    def refresh_and_publish(self) -> None:
+    def refilter(self) -> None:
+        """Print the diff of the results which would be caused by reapplying the configured ID and term rules offline.
+
+        The rules are reapplied to the corpus of all articles which were previously returned by arXiv, and also to the
+        preexisting results. Each added, removed, or rematched result is printed with the rule which caused it.
+
+        A warning is printed first for each configured category or term which widens the search query beyond the query
+        of the corpus, as the articles which only the widened query would return are not in the corpus.
+        """
+        columns = ['URL_ID', 'Version', 'Updated', 'Title']
+        corpus_store = ArticlesStore(config.DATA_CORPUS_STORE_PATH)
+        df_corpus = corpus_store.read(columns) if corpus_store.exists() else pd.DataFrame(columns=columns)
+        if df_corpus.empty:
+            log.warning('The corpus does not exist, and so only the removal of preexisting results can be evaluated. '
+                        'It is stored by a refresh.')
+        df_corpus = pd.concat([df_corpus, self._df_results[columns]], ignore_index=True)
+        df_corpus.sort_values('Version', ascending=False, inplace=True, kind='stable')
+        df_corpus.drop_duplicates('URL_ID', inplace=True)  # Keeps the highest version.
+        log.info('Reapplying the rules to a corpus of %s articles.', len(df_corpus))
+        for line in refilter.query_warnings(refilter.read_corpus_query_terms()):
+            print(line)
+        for line in refilter.diff(self._df_results, refilter.evaluate(df_corpus)):
+            print(line)
+
+    def duplicates(self) -> None:
+        """Print the clusters of results having near-duplicate titles, with whitelisted IDs being marked.
+
+        A cluster having both a whitelisted ID and another result can indicate a reposted article, or an unnecessary
+        whitelisted ID.
+        """
+        df = self._df_results
+        with instrument.stage('deduplicate') as stage:
+            clusters = duplicates.clusters(df['Title'].tolist())
+            stage.count('clusters', len(clusters))
+        for cluster_num, cluster in enumerate(clusters, start=1):
+            print(f'Cluster {cluster_num}/{len(clusters)}:')
+            for row in df.iloc[cluster].itertuples():
+                marker = ' (whitelisted ID)' if (row.URL_ID in config.URL_ID_WHITELIST) else ''
+                print(f'  {row.URL_ID}v{row.Version} {row.Updated:%Y-%m-%d} {row.Title}{marker}')
+        log.info('Found %s clusters of near-duplicate titles having %s of %s results.',
+                 len(clusters), sum(len(cluster) for cluster in clusters), len(df))
+
+    @staticmethod
+    def find(query: str, count: int = 10) -> None:
+        """Print the stored results which best match the words of the query, as ranked by BM25 over their titles and
+        abstracts.
+
+        The text index is created from the stored results if it doesn't exist, and is otherwise updated by each refresh.
+        """
+        text_index = TextIndexStore()
+        if not text_index.exists():
+            log.info('The text index does not exist, and so it is being created from the stored results.')
+            text_index.write(store.read_articles(config.DATA_ARTICLES_INDEX_COLUMNS))
+        with instrument.stage('find') as stage:
+            hits = text_index.load().search(str(query), limit=count)
+            stage.count('hits', len(hits))
+        for hit in hits:
+            print(f'{hit.score:6.2f} {hit.url_id} {hit.title}')
+
+    def refresh_and_publish(self, full: bool = False, partitioned: bool = False,
+                            suppress_duplicates: bool = config.DUPLICATES_SUPPRESSED) -> None:
         """Refresh search results locally, and conditionally publish them."""
-        num_increase = self.refresh()
+        num_increase = self.refresh(full=full, partitioned=partitioned, suppress_duplicates=suppress_duplicates)
         if num_increase >= 0:
-            self.publish_md()
+            self.publish()
         else:
-            msg = 'Considering the difference in the number of rows is negative, the updated markdown file ' \
-                  'is not being published to GitHub.'
+            msg = 'Considering the difference in the number of rows is negative, the updated artifacts ' \
+                  'are not being published to GitHub.'
             log.error(msg)
 
     @staticmethod
     def write_feed() -> bytes:
         """Return the XML of a RSS feed of the most recently updated search results."""
-        feed = Feed().feed()
+        feed = Feed()
+        feed.refresh()
+        text = feed.feed()
         feed_path = config.DATA_DIR / 'feed.xml'
-        feed_path.write_bytes(feed)
+        feed_path.write_bytes(text)
         log.info('Feed was written to %s.', feed_path)
-        return feed
+        return text
 
     def write_md(self) -> None:
         """Write the search results to a markdown file locally."""
-        def _linked_category(cat: str) -> str:
-            return f'[{cat}](https://arxiv.org/list/{cat}/recent)'
-
-        categories = readable_list(_linked_category(cat) for cat in sorted(config.CATEGORIES))
+        categories = readable_list(linked_category(cat) for cat in sorted(config.CATEGORIES))
         prologue = f"""
         This is a mostly auto-generated list of review articles on machine learning and artificial intelligence that \
         are on [arXiv](https://arxiv.org/). \
@@ -79,46 +194,23 @@ class Results:
         An auto-updated [RSS feed](https://us-east1-ml-feeds.cloudfunctions.net/arxiv-ml-reviews) is however available.
         """.strip()
 
-        with config.DATA_ARTICLES_MD_PATH.open('w') as md:
-            md.write(f'# Review articles\n{prologue}\n')
-            for _, row in self._df_results.iterrows():
-                primary_category = row.Categories.split(', ', 1)[0]
-                primary_category = _linked_category(primary_category)
-                years = row.Published.year if (row.Published.year == row.Updated.year) else \
-                    f'{row.Published.year}-{row.Updated.year}'
-                link_abs = f'https://arxiv.org/abs/{row.URL_ID}'
-                link_pdf = f'https://arxiv.org/pdf/{row.URL_ID}'
-                md.write(f'* [{row.Title} ({years})]({link_abs}) │ [pdf]({link_pdf}) │ {primary_category}\n')
+        with instrument.stage('render') as stage, config.DATA_ARTICLES_MD_PATH.open('w') as md:
+            md.write(f'# Review articles\n{prologue}\n{markdown_list(self._df_results)}')
+            stage.count('markdown_items', len(self._df_results))
         log.info('Finished writing markdown file with %s entries.', len(self._df_results))
 
     @staticmethod
-    def publish_md() -> None:
+    def publish(force: bool = False) -> None:
+        """Conditionally publish the markdown file, CSV data file, and feed file, if they exist, to GitHub."""
+        log.info('The currently existing artifacts will conditionally be published to GitHub repo "%s".',
+                 config.GITHUB_PUBLISH_REPO)
+        GitHubPublisher().publish(read_artifacts(config.GITHUB_PUBLISH_ARTIFACTS), force=force)
+
+    @staticmethod
+    def publish_md(force: bool = False) -> None:
         """Conditionally publish the markdown file to GitHub."""
         log.info('The currently existing markdown file will conditionally be published to GitHub.')
-        github_token = os.environ['GITHUB_ACCESS_TOKEN'].strip()
-        log.debug('GitHub access token was read.')
         log.info('The target GitHub repo is "%s" and markdown file path is "%s".',
                  config.GITHUB_PUBLISH_REPO, config.GITHUB_MD_PUBLISH_PATH)
-
-        github = Github(github_token)
-        repo = github.get_repo(config.GITHUB_PUBLISH_REPO)
-        log.info('GitHub access token was validated.')
-        content_new = config.DATA_ARTICLES_MD_PATH.read_text()
-
-        try:
-            log.debug('Attempting to read existing markdown file on GitHub.')
-            contents = repo.get_contents(path=config.GITHUB_MD_PUBLISH_PATH)
-            log.info('Read existing GitHub file.')
-        except github.GithubException.UnknownObjectException:
-            log.info('Unable to read existing markdown file on GitHub.')
-            log.debug('Creating new markdown file on GitHub.')
-            repo.create_file(path=config.GITHUB_MD_PUBLISH_PATH, message='Publish reviews', content=content_new)
-            log.info('Created new GitHub markdown file on GitHub.')
-        else:
-            if contents.decoded_content.decode() != content_new:
-                log.debug('Updating existing markdown file on GitHub.')
-                repo.update_file(path=config.GITHUB_MD_PUBLISH_PATH, message='Refresh reviews', content=content_new,
-                                 sha=contents.sha)
-                log.info('Updated existing markdown file on GitHub.')
-            else:
-                log.info('Existing markdown file on GitHub is already up to date.')
+        artifacts = read_artifacts({config.DATA_ARTICLES_MD_PATH: config.GITHUB_MD_PUBLISH_PATH})
+        GitHubPublisher().publish(artifacts, force=force)
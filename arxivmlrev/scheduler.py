@@ -0,0 +1,102 @@
+import logging
+import time
+from typing import List, NamedTuple, Optional, Set
+
+from arxivmlrev import config
+from arxivmlrev.query import backoff_delay, max_query_attempts, query_with_total
+from arxivmlrev.util.time import verbose_sleep
+
+log = logging.getLogger(__name__)
+
+
+class Page(NamedTuple):
+    start: int
+    size: int  # Requested number of results.
+    results: List[dict]
+    total: Optional[int] = None  # Total number of results of the query reported by arXiv, if known.
+
+    @property
+    def is_short(self) -> bool:
+        """Return whether the page has fewer results than requested."""
+        return len(self.results) < self.size
+
+    @property
+    def is_last(self) -> bool:
+        """Return whether there are no results after the page, as per the total number of results reported by arXiv.
+
+        An empty page is also the last page, as it was either confirmed to be past the end of the results or it is the
+        last attempt of a failed page. If the total is unknown, a short page is not the last page, as arXiv can return
+        short pages in the middle of the results, and so the end of the results is confirmed by the next page.
+        """
+        if not self.results:
+            return True
+        return (self.total is not None) and (self.start + len(self.results) >= self.total)
+
+
+class QueryScheduler:
+    """Scheduler of the pages of a paged arXiv API query, which retries failed or empty pages and adapts the page size.
+
+    A page is attempted up to `config.MAX_QUERY_ATTEMPTS` times if its attempts fail, or if it is empty without being
+    past the end of the results, as arXiv transiently returns such pages. Retries wait for a jittered exponential
+    backoff. The end of the results is as per the total number of results reported by arXiv. If the total is unknown,
+    an empty page at the offset following a short page confirms the end without being retried, and so does an empty
+    first page if the query may have no results, such as a query of a window of submission dates.
+
+    The page size is halved after a failed attempt or a page slower than `config.QUERY_PAGE_TARGET_SECONDS`, and is
+    otherwise increased by half, within `config.QUERY_PAGE_MIN_SIZE` and the given maximum page size.
+    """
+
+    def __init__(self, *, query: str, sort_by: str, max_page_size: int, may_be_empty: bool = False):
+        self.query = query
+        self._sort_by = sort_by
+        self._max_page_size = max_page_size
+        self._min_page_size = min(config.QUERY_PAGE_MIN_SIZE, max_page_size)
+        self._may_be_empty = may_be_empty
+        self._short_page_ends: Set[int] = set()  # Offsets following short pages having an unknown total.
+        self.page_size = max_page_size
+
+    def _adapt_page_size(self, *, is_slow_or_failed: bool) -> None:
+        page_size = max(self._min_page_size, self.page_size // 2) if is_slow_or_failed else \
+            min(self._max_page_size, int(self.page_size * 1.5))
+        if page_size != self.page_size:
+            log.info('Changing page size from %s to %s.', self.page_size, page_size)
+            self.page_size = page_size
+
+    def _is_past_end(self, start: int, total: Optional[int]) -> bool:
+        """Return whether an empty page at the offset is past the end of the results."""
+        if total is not None:
+            return start >= total
+        if start == 0:
+            return self._may_be_empty
+        return start in self._short_page_ends
+
+    def fetch(self, start: int) -> Page:
+        """Return the page of results at the given offset, retrying it as necessary."""
+        max_attempts = max_query_attempts()
+        for attempt in range(1, max_attempts + 1):
+            size = self.page_size
+            attempt_start = time.monotonic()
+            try:
+                results, total = query_with_total(query=self.query, start=start, max_results=size,
+                                                  sort_by=self._sort_by, refresh=(attempt > 1))
+            except Exception as exc:
+                log.warning('Attempt %s of query at offset %s failed: %s', attempt, start, exc)
+                results, total = [], None
+                is_failed = True
+            else:
+                is_failed = (not results) and not self._is_past_end(start, total)
+            duration = time.monotonic() - attempt_start
+
+            page = Page(start=start, size=size, results=results, total=total)
+            if not is_failed:
+                if not page.is_short:
+                    self._adapt_page_size(is_slow_or_failed=(duration > config.QUERY_PAGE_TARGET_SECONDS))
+                elif results and (total is None):
+                    self._short_page_ends.add(start + len(results))
+                return page
+            self._adapt_page_size(is_slow_or_failed=True)
+            log.warning('Attempt %s of query at offset %s returned no results.', attempt, start)
+            if attempt < max_attempts:
+                verbose_sleep(backoff_delay(attempt))
+        log.error('Query at offset %s returned no results after %s attempts.', start, max_attempts)
+        return page
@@ -1,16 +1,23 @@
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+import datetime
+import hashlib
+import json
 import logging
 import math
+import multiprocessing
 import time
-from typing import Iterable, List, Set, Tuple, Union
+from typing import Generator, Iterable, List, Optional, Set, Tuple, Union
 
-import arxiv
 import pandas as pd
 
-from arxivmlrev import config
+from arxivmlrev import config, duplicates, instrument
+from arxivmlrev.accumulator import ResultsAccumulator
+from arxivmlrev.crawl import PageCheckpoint, Window, WindowCheckpoints, yearly_windows
+from arxivmlrev.query import iter_query, query_id_list
 from arxivmlrev.util.resource import humanized_rss, resident_set_size
 from arxivmlrev.util.string import readable_list
-from arxivmlrev.util.time import verbose_sleep
 from arxivmlrev.result import Result
+from arxivmlrev.scheduler import Page, QueryScheduler
 
 log = logging.getLogger(__name__)
 
@@ -25,12 +32,28 @@ class Searcher:
     class ArxivResultsInsufficient(Exception):
         pass
 
-    def __init__(self, *, max_results: Union[int, float] = math.inf):
-        self._title_query = self._form_title_query()
+    def __init__(self, *, max_results: Union[int, float] = math.inf, updated_since: Optional[datetime.date] = None,
+                 partitioned: bool = False, corpus: Optional[ResultsAccumulator] = None,
+                 suppress_duplicates: bool = config.DUPLICATES_SUPPRESSED):
+        """If a corpus is given, all results returned by arXiv and processed in this process, whether or not they are
+        accepted, are added to it.
+
+        If `suppress_duplicates` is true, only one result of each cluster of near-duplicate titles is kept, as per
+        `duplicates.suppress`.
+        """
+        self._title_queries = self._form_title_queries()
         self._max_results = max_results
-        self._sort_by = 'lastUpdatedDate' if math.isfinite(self._max_results) else 'submittedDate'
+        self._updated_since = updated_since
+        is_incremental = updated_since is not None
+        self._partitioned = partitioned and math.isinf(max_results) and not is_incremental
+        self._corpus = corpus
+        self._suppress_duplicates = suppress_duplicates
+        if partitioned and not self._partitioned:
+            log.warning('A partitioned crawl is supported only for a full search, and so it will not be used.')
+        self._sort_by = 'lastUpdatedDate' if (math.isfinite(self._max_results) or is_incremental) else 'submittedDate'
         # Note: Using lastUpdatedDate as the sort order when max_results is inf prevents the oldest 80 or so results
-        # from being returned. This condition is prevented above by then using submittedDate as the sort order.
+        # from being returned. This condition is prevented above by then using submittedDate as the sort order. It
+        # doesn't matter for an incremental search which stops paging long before reaching the oldest results.
 
         self._max_results_per_query = int(min(config.MAX_RESULTS_PER_QUERY,
                                               self._max_results * math.e  # This allows ample room for filtering.
@@ -39,25 +62,38 @@ class Searcher:
         self._log_state()
 
     @staticmethod
-    def _filter_results(results: List[dict]) -> Iterable[dict]:
-        log.debug('Processing %s results.', len(results))
-        num_yielded = 0
+    def _filter_results(results: Iterable[dict], *, keep_raw: bool = False,
+                        corpus: Optional[ResultsAccumulator] = None) -> Generator[Result, None, None]:
+        num_processed, num_yielded = 0, 0
+        parse_seconds, filter_seconds = 0.0, 0.0  # These exclude the time spent by the consumer of this generator.
+        clock = time.perf_counter
         try:
             for result_dict in results:
-                result = Result(result_dict)
+                num_processed += 1
+                start = clock()
+                result = Result(result_dict, keep_raw=keep_raw)
+                parsed = clock()
+                parse_seconds += parsed - start
+                if corpus is not None:
+                    corpus.add(result, source='corpus')
                 if not result.is_id_whitelisted:
                     if result.is_id_blacklisted or result.title_blacklist_match or (not result.title_whitelist_match):
                         # log.debug('Skipped result: %s (v%s) (%s) (%s)',
                         #           result.title, result.version, result.updated, result.categories_str)
+                        filter_seconds += clock() - parsed
                         continue
                 num_yielded += 1
-                yield result.to_dict
+                filter_seconds += clock() - parsed
+                yield result
         finally:
-            log.debug('Yielded %s of %s results.', num_yielded, len(results))
+            log.debug('Yielded %s of %s processed results.', num_yielded, num_processed)
+            instrument.record('parse', wall_seconds=parse_seconds, counts={'results': num_processed})
+            instrument.record('filter', wall_seconds=filter_seconds,
+                              counts={'processed': num_processed, 'yielded': num_yielded})
 
-    def _form_title_query(self) -> str:
-        category_query = self._list_to_query(config.CATEGORIES, 'cat')
-        title_whitelist_query = self._list_to_query(config.TERMS_WHITELIST, 'ti')
+    def _form_title_query(self, categories: List[str], whitelisted_terms: List[str]) -> str:
+        category_query = self._list_to_query(categories, 'cat')
+        title_whitelist_query = self._list_to_query(whitelisted_terms, 'ti')
         title_blacklist_query = self._list_to_query(config.TERMS_BLACKLIST, 'ti')
         # Note: Title blacklist has precedence over title whitelist in the query below.
         query = f'''
@@ -65,16 +101,51 @@ class Searcher:
             AND {title_whitelist_query}
             ANDNOT {title_blacklist_query}
         '''.strip('\n')
-        log.debug('Title search query (unsubmitted multiline version):\n%s', query)
         query = query.strip().replace('\n', ' ')
         while '  ' in query:
             query = query.replace('  ', ' ')
         query = query.replace('( ', '(').replace(' )', ')')
-        # Note: A sufficiently longer query can very possibly lead to arXiv returning incomplete results.
-        # log.debug('Title search query (actual single-line version):\n%s', query)
-        log.debug('Title search query length is %s characters.', len(query))
         return query
 
+    def _form_title_queries(self) -> List[str]:
+        """Return the title queries, which are partitioned by whitelisted term, and if necessary also by category, so
+        that each query is no longer than `config.TITLE_QUERY_MAX_LENGTH`.
+
+        The results of multiple queries are merged and deduplicated by the accumulator.
+        """
+        # Note: A sufficiently longer query can very possibly lead to arXiv returning incomplete results.
+        max_length = config.TITLE_QUERY_MAX_LENGTH
+        terms = config.TERMS_WHITELIST
+        categories_partitions = [config.CATEGORIES]
+        if any(len(self._form_title_query(config.CATEGORIES, [term])) > max_length for term in terms):
+            categories_partitions = [[category] for category in config.CATEGORIES]
+
+        queries = []
+        for categories in categories_partitions:
+            terms_partition: List[str] = []
+            for term in terms:
+                if terms_partition and (len(self._form_title_query(categories, terms_partition + [term])) > max_length):
+                    queries.append(self._form_title_query(categories, terms_partition))
+                    terms_partition = []
+                terms_partition.append(term)
+            queries.append(self._form_title_query(categories, terms_partition))
+
+        for query_num, query in enumerate(queries, start=1):
+            log.debug('Title search query %s/%s has length %s characters:\n%s', query_num, len(queries), len(query),
+                      query)
+            if len(query) > max_length:
+                log.warning('Title search query %s/%s has length %s characters, exceeding the maximum of %s.',
+                            query_num, len(queries), len(query), max_length)
+        if len(queries) > 1:
+            log.info('The title search is partitioned into %s queries.', len(queries))
+        return queries
+
+    def _is_past_updated_since(self, results: List[dict]) -> bool:
+        """Return whether the results, as sorted by lastUpdatedDate, have crossed the updated since date."""
+        if (self._updated_since is None) or (not results):
+            return False
+        return Result(results[-1]).updated.date() < self._updated_since
+
     def _log_memory(self, level: int = logging.INFO) -> None:
         log.log(level, 'Additional memory used since initialization of searcher is %s. Total memory used is %s.',
                 humanized_rss(self._rss_start), humanized_rss())
@@ -89,51 +160,199 @@ class Searcher:
         log.debug('The number of search IDs whitelisted and blacklisted are %s and %s respectively.',
                   len(config.URL_ID_WHITELIST), len(config.URL_ID_BLACKLIST))
         log.debug('Max results requested is %s.', self._max_results)
+        log.debug('Results updated since %s are requested.', self._updated_since or 'any date')
         log.debug('Max results per query is set to %s.', self._max_results_per_query)
+        log.debug('The number of title search queries is %s.', len(self._title_queries))
+        log.debug('The title search is %s.', 'partitioned by submission date' if self._partitioned else 'unpartitioned')
+        log.debug('Near-duplicate titles are %s.', 'suppressed' if self._suppress_duplicates else 'not suppressed')
         self._log_memory(logging.DEBUG)
 
-    def _run_query(self, *, query_type: str, start: int) -> List[dict]:
+    def _run_query(self, *, query_type: str, start: int, scheduler: QueryScheduler) -> Page:
         log.info('Starting %s query at offset %s.', query_type, start)
         if query_type == 'title':
-            results = arxiv.query(query=self._title_query, start=start,
-                                  max_results=self._max_results_per_query, sort_by=self._sort_by)
+            page = scheduler.fetch(start)
         elif query_type == 'ID':
-            if config.URL_ID_WHITELIST:
-                results = arxiv.query(id_list=sorted(config.URL_ID_WHITELIST), start=start,
-                                      max_results=self._max_results_per_query, sort_by=self._sort_by)
-            else:
-                results = []
+            results = query_id_list(sorted(config.URL_ID_WHITELIST), sort_by=self._sort_by) if (start == 0) else []
+            page = Page(start=start, size=len(results), results=results)
         else:
             msg = f'The query type "{query_type}" is invalid.'
             log.error(msg)
             raise self.QueryTypeInvalid(msg)
-        log.info('The %s query at offset %s returned %s results.', query_type, start, len(results))
-        return results
+        log.info('The %s query at offset %s returned %s results.', query_type, start, len(page.results))
+        return page
+
+    def _iter_title_query(self, title_query: str, *, start: int, results: List[dict]) -> Generator[dict, None, None]:
+        """Yield the results of the title query as they are parsed, also appending them to the given list."""
+        log.info('Starting streamed title query at offset %s.', start)
+        for result in iter_query(query=title_query, start=start, max_results=self._max_results_per_query,
+                                 sort_by=self._sort_by):
+            results.append(result)
+            yield result
+        log.info('The streamed title query at offset %s returned %s results.', start, len(results))
+
+    def _is_last_page(self, results: List[dict], *, search_type: str) -> bool:
+        # Note: All whitelisted IDs are queried at once, in chunks, and so there is only a single page.
+        return (search_type == 'ID') or self._is_past_updated_since(results)
+
+    def _is_final_page(self, page: Page, *, search_type: str) -> bool:
+        """Return whether there are no further pages of an unlimited query after the given page."""
+        return page.is_last or self._is_last_page(page.results, search_type=search_type)
 
-    def _run_search(self, *, search_type: str) -> Iterable[dict]:
+    def _run_search(self, *, search_type: str) -> Iterable[Result]:
+        if search_type != 'title':
+            yield from self._run_pages(search_type=search_type)
+            return
+        if self._partitioned:
+            yield from self._run_partitioned_search()
+            return
+        # Note: If max_results is finite, each title query yields up to max_results results, as the union of these
+        # contains the overall latest results, which are then selected by the accumulator.
+        for query_num, title_query in enumerate(self._title_queries, start=1):
+            if len(self._title_queries) > 1:
+                log.info('Starting title query %s/%s.', query_num, len(self._title_queries))
+            yield from self._run_pages(search_type=search_type, title_query=title_query,
+                                       checkpoint_name=f'title-{query_num}')
+
+    def _run_pages(self, *, search_type: str, title_query: str = '', keep_raw: bool = False,
+                   checkpoint_name: Optional[str] = None, may_be_empty: bool = False,
+                   is_filtered: bool = True) -> Iterable[Result]:
+        """Yield the filtered results of the pages of the query, or all of its results if `is_filtered` is false.
+
+        If a checkpoint name is given for a full search, a checkpoint of the query is saved after each page, and the
+        query is resumed from it. The checkpoint is deleted once the query is completed.
+
+        If `may_be_empty` is false, an empty first page is retried as per `QueryScheduler`.
+        """
         max_results = self._max_results
-        start, num_yielded, num_successive_empty_results = 0, 0, 0
+        start, num_yielded = 0, 0
+        checkpoint: Optional[PageCheckpoint] = None
+        if (checkpoint_name is not None) and math.isinf(max_results) and (self._updated_since is None):
+            checkpoint = PageCheckpoint(checkpoint_name, fingerprint=self._fingerprint(title_query),
+                                        sort_by=self._sort_by)
+            start, checkpointed_results = checkpoint.load()
+            for result_dict in checkpointed_results:
+                num_yielded += 1
+                yield Result(result_dict, keep_raw=keep_raw)
+            keep_raw = True  # This allows the raw yielded results to be checkpointed.
+        is_streamed = (config.QUERY_BACKEND == 'stream') and (search_type == 'title') and math.isfinite(max_results)
+        # Note: If max_results is finite, a streamed title query is read only until enough results are yielded.
+        scheduler = QueryScheduler(query=title_query, sort_by=self._sort_by, max_page_size=self._max_results_per_query,
+                                   may_be_empty=may_be_empty)
         rss_search_start = resident_set_size()
         self._log_memory()
-        while True:
-            results = self._run_query(query_type=search_type, start=start)
-            query_completion_time = time.monotonic()
-            num_successive_empty_results = 0 if results else (num_successive_empty_results + 1)
-            for result in self._filter_results(results):
-                num_yielded += 1
-                yield result
-                if num_yielded == max_results:
-                    break
+        with instrument.ContextThreadPoolExecutor(max_workers=1, thread_name_prefix=f'{search_type}-query') as executor:
+            future: Optional[Future] = None
+            while True:
+                page: Page
+                results: List[dict]
+                entries: Generator[dict, None, None]
+                if is_streamed:
+                    results = []
+                    entries = self._iter_title_query(title_query, start=start, results=results)
+                    page = Page(start=start, size=self._max_results_per_query, results=results)
+                    # Note: The results of the page are appended to as they are yielded by the entries.
+                else:
+                    if future is None:
+                        future = executor.submit(self._run_query, query_type=search_type, start=start,
+                                                 scheduler=scheduler)
+                    page = future.result()
+                    results = page.results
+                    entries = (result for result in results)
+                    future = None
+
+                    # Prefetch the next page while the current one is filtered
+                    if math.isinf(max_results) and not self._is_final_page(page, search_type=search_type):
+                        future = executor.submit(self._run_query, query_type=search_type, start=start + len(results),
+                                                 scheduler=scheduler)
+                    # Note: If max_results is finite, the next page is not prefetched because it is usually unnecessary.
 
-            log.info('Additional memory used since start of %s queries, with %s results yielded, is %s.',
-                     search_type, num_yielded, humanized_rss(rss_search_start))
-            if (num_yielded >= max_results) or (num_successive_empty_results >= 3):
-                log.info('Completed all %s queries, yielding %s results.', search_type, num_yielded)
+                filtered_results = (self._filter_results(entries, keep_raw=keep_raw, corpus=self._corpus)
+                                    if is_filtered else (Result(entry, keep_raw=keep_raw) for entry in entries))
+                yielded_results: List[dict] = []
+                for result in filtered_results:
+                    num_yielded += 1
+                    if checkpoint is not None:
+                        assert result.result is not None
+                        yielded_results.append(result.result)
+                    yield result
+                    if num_yielded == max_results:
+                        break
+                filtered_results.close()
+                entries.close()  # Stops reading the response of a streamed query.
+                start += len(results)
+
+                log.info('Additional memory used since start of %s queries, with %s results yielded, is %s.',
+                         search_type, num_yielded, humanized_rss(rss_search_start))
+                if (num_yielded >= max_results) or page.is_last:
+                    log.info('Completed all %s queries, yielding %s results.', search_type, num_yielded)
+                elif self._is_past_updated_since(results):
+                    log.info('Completed all %s queries for results updated since %s, yielding %s results.',
+                             search_type, self._updated_since, num_yielded)
+                elif self._is_last_page(results, search_type=search_type):
+                    log.info('Completed the single %s query, yielding %s results.', search_type, num_yielded)
+                else:
+                    if checkpoint is not None:
+                        checkpoint.save(start, yielded_results)
+                    continue
+                if checkpoint is not None:
+                    checkpoint.clear()
                 return
-            start += len(results)
 
-            sleep_time = max(0., config.QUERY_INTERVAL - (time.monotonic() - query_completion_time))
-            verbose_sleep(sleep_time)
+    def _fingerprint(self, *queries: str) -> str:
+        """Return a fingerprint of the given queries, the sort order, and the configuration which determines the
+        accepted results.
+        """
+        state = [queries, self._sort_by, config.TERMS, sorted(config.URL_ID_BLACKLIST), sorted(config.URL_ID_WHITELIST)]
+        return hashlib.sha256(json.dumps(state, sort_keys=True).encode()).hexdigest()[:16]
+
+    def crawl_window(self, window: Window) -> List[dict]:
+        """Return the raw results of the title search which were submitted in the given window, whether or not they
+        are accepted.
+
+        The results are filtered once they are read from the checkpoint of the window, and so the rejected ones can be
+        added to the corpus.
+        """
+        results: List[dict] = []
+        for query_num, title_query in enumerate(self._title_queries, start=1):
+            window_query = f'{window.query} AND {title_query}'
+            for result in self._run_pages(search_type='title', title_query=window_query, keep_raw=True,
+                                          checkpoint_name=f'{window.name}-{query_num}', may_be_empty=True,
+                                          is_filtered=False):
+                assert result.result is not None
+                results.append(result.result)
+        log.info('Crawled %s results in window %s.', len(results), window.name)
+        return results
+
+    def _run_partitioned_search(self) -> Iterable[Result]:
+        """Yield the results of the title search, crawling its windows of submission dates in worker processes.
+
+        Each window is checkpointed as it is completed, and so a rerun after a failure crawls only the windows which
+        were not completed. The checkpoints are deleted once all results are yielded.
+        """
+        checkpoints = WindowCheckpoints(self._fingerprint(*self._title_queries))
+        checkpoints.discard_stale()
+        windows = yearly_windows()
+        pending_windows = [window for window in windows if not checkpoints.exists(window)]
+        log.info('Crawling %s of %s windows of submission dates, with the others being checkpointed.',
+                 len(pending_windows), len(windows))
+        with instrument.stage('crawl') as stage:
+            stage.count('windows', len(pending_windows))
+            num_workers = min(config.CRAWL_WORKERS, len(pending_windows))
+            if num_workers <= 1:
+                for window in pending_windows:
+                    checkpoints.write(window, self.crawl_window(window))
+            else:
+                # Note: The workers share the rate limit of arXiv queries with this process by way of a locked file.
+                with ProcessPoolExecutor(max_workers=num_workers, mp_context=multiprocessing.get_context('spawn')) \
+                        as executor:
+                    futures = [executor.submit(_crawl_window, window, checkpoints) for window in pending_windows]
+                    for future in as_completed(futures):
+                        future.result()
+                    # Note: If a window fails, the executor waits for the other windows to be checkpointed.
+
+        for window in windows:
+            yield from self._filter_results(checkpoints.read(window), corpus=self._corpus)
+        checkpoints.clear()
 
     @staticmethod
     def _list_to_query(params: List[str], prefix: str) -> str:
@@ -142,39 +361,66 @@ class Searcher:
         query = ' OR '.join(f'{prefix}:{s}' for s in params)
         return f'({query})'
 
-    def _search(self, *, search_type: str) -> pd.DataFrame:
-        columns = config.DATA_ARTICLES_COLUMNS
-        results = self._run_search(search_type=search_type)
-        df = pd.DataFrame(results)
-        return pd.DataFrame(columns=columns) if df.empty else df[columns]
+    def _accumulate(self, accumulator: ResultsAccumulator, *, search_type: str) -> int:
+        """Add the results of the search to the accumulator, returning the number of results added."""
+        num_results = 0
+        for result in self._run_search(search_type=search_type):
+            accumulator.add(result, source=search_type)
+            num_results += 1
+        return num_results
 
-    def search(self) -> pd.DataFrame:
-        df_results_for_title_search = df_results = self._search(search_type='title')
-        if len(df_results) >= self._max_results:
-            log.debug('Skipped whitelisted ID search.')
+    def _search_into(self, accumulator: ResultsAccumulator) -> None:
+        """Add the results of the title and ID searches to the accumulator."""
+        if math.isfinite(self._max_results):
+            num_results_for_title_search = self._accumulate(accumulator, search_type='title')
+            if len(accumulator) >= self._max_results:
+                log.debug('Skipped whitelisted ID search.')
+                num_results_for_id_search = None
+            else:
+                num_results_for_id_search = self._accumulate(accumulator, search_type='ID')
         else:
-            df_results_for_id_search = self._search(search_type='ID')
-
-            mask = df_results_for_title_search['URL_ID'].isin(df_results_for_id_search['URL_ID'])
-            unnecessary_whitelisted_ids = df_results_for_title_search['URL_ID'][mask]
-            mask = ~unnecessary_whitelisted_ids.isin(config.URL_ID_WHITELIST_INTERSECTION_IGNORED)
-            unnecessary_whitelisted_ids = unnecessary_whitelisted_ids[mask]
-            # Note: df_results_for_title_search doesn't reliably include URL_ID_WHITELIST_INTERSECTION_IGNORED. The
-            # reason for this unpredictability is unknown.
-            if not unnecessary_whitelisted_ids.empty:
-                csv = unnecessary_whitelisted_ids.to_csv(header=False, index=False).rstrip().replace('\n', ', ')
+            # Run the title and ID searches concurrently, with their queries being rate limited together
+            with instrument.ContextThreadPoolExecutor(max_workers=1, thread_name_prefix='ID-search') as executor:
+                future = executor.submit(lambda: list(self._run_search(search_type='ID')))
+                num_results_for_title_search = self._accumulate(accumulator, search_type='title')
+                results_for_id_search = future.result()
+            for result in results_for_id_search:
+                accumulator.add(result, source='ID')
+            num_results_for_id_search = len(results_for_id_search)
+
+        if num_results_for_id_search is not None:
+            unnecessary_whitelisted_ids = [url_id for url_id in accumulator.duplicated_url_ids
+                                           if url_id not in config.URL_ID_WHITELIST_INTERSECTION_IGNORED]
+            # Note: The title search results don't reliably include URL_ID_WHITELIST_INTERSECTION_IGNORED. The reason
+            # for this unpredictability is unknown.
+            if unnecessary_whitelisted_ids:
                 log.warning('URL ID whitelist has %s unnecessary IDs which are already present in the title search '
-                            'results: %s', len(unnecessary_whitelisted_ids), csv)
+                            'results: %s', len(unnecessary_whitelisted_ids), ', '.join(unnecessary_whitelisted_ids))
+            log.info('Accumulated %s title and %s ID search results into %s unique results.',
+                     num_results_for_title_search, num_results_for_id_search, len(accumulator))
 
-            df_results = pd.concat([df_results_for_title_search, df_results_for_id_search], ignore_index=True)
-            df_results.drop_duplicates('URL_ID', inplace=True)  # In case duplicated from ID whitelist.
-            log.info('Concatenated %s title and %s ID search results dataframes into a single dataframe with %s '
-                     'results.',
-                     len(df_results_for_title_search), len(df_results_for_id_search), len(df_results))
+    def search(self) -> pd.DataFrame:
+        accumulator = ResultsAccumulator(max_results=self._max_results)
+        self._search_into(accumulator)
 
-        df_results.sort_values(['Updated', 'Published', 'URL_ID'], ascending=False, inplace=True)
+        with instrument.stage('frame') as stage:
+            df_results = accumulator.to_frame()
+            stage.count('rows', len(df_results))
+        with instrument.stage('sort') as stage:
+            df_results.sort_values(['Updated', 'Published', 'URL_ID'], ascending=False, inplace=True, ignore_index=True)
+            stage.count('rows', len(df_results))
+        if self._suppress_duplicates:
+            with instrument.stage('deduplicate') as stage:
+                df_results = duplicates.suppress(df_results)
+                stage.count('rows', len(df_results))
         if len(df_results) > self._max_results:
             df_results = df_results.head(self._max_results)
             log.info('Limited search results dataframe to %s results.', len(df_results))
         self._log_memory()
         return df_results
+
+
+def _crawl_window(window: Window, checkpoints: WindowCheckpoints) -> None:
+    """Crawl and checkpoint the window in a worker process."""
+    checkpoints.write(window, Searcher().crawl_window(window))
+
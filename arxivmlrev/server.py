@@ -0,0 +1,176 @@
+"""Standalone HTTP server of the feed, for hosts of its own, such as behind a load balancer.
+
+Each worker process answers requests from its in-memory feed index, with a thread per connection. The index is
+preloaded at startup, and is reloaded after each background refresh. The worker processes share the listening socket
+and the cached index file, and so only one of them searches at a time.
+"""
+from email.utils import formatdate
+import http.server
+import importlib
+import logging
+import os
+import signal
+import threading
+from typing import Any, Dict, Optional, Set
+import urllib.parse
+
+from arxivmlrev import config
+from arxivmlrev.feed import Feed, FeedRefresher
+from arxivmlrev.response import Response, feed_request_response, text_response
+
+log = logging.getLogger(__name__)
+
+_FEED_PATH = '/'
+_HEALTH_PATH = '/healthz'
+_READINESS_PATH = '/readyz'
+
+
+class FeedServer(http.server.ThreadingHTTPServer):
+    """Threaded HTTP server of the feed, with its feed being created in each worker process."""
+
+    daemon_threads = True
+    request_queue_size = 1024  # The default of 5 drops connections under load.
+
+    def __init__(self, address: Any):
+        super().__init__(address, FeedRequestHandler)
+        self.socket.setblocking(False)  # Otherwise, a worker process blocks if another one accepts a connection first.
+        self.feed: Optional[Feed] = None
+        self.is_stopping = False
+
+    def stop(self) -> None:
+        """Stop serving, being safe to call from a signal handler of the thread which is serving."""
+        self.is_stopping = True
+        threading.Thread(target=self.shutdown, name='server-shutdown').start()
+
+
+class FeedRequestHandler(http.server.BaseHTTPRequestHandler):
+    """Handler of the requests of the feed, its health, and its readiness, using persistent connections."""
+
+    disable_nagle_algorithm = True  # Otherwise, writing the headers and the body separately delays responses by 40ms.
+    protocol_version = 'HTTP/1.1'
+    server: FeedServer
+    server_version = config.PACKAGE_NAME
+
+    def _readiness_response(self) -> Response:
+        """Return a response with status 200 if the feed index is loaded and the server isn't stopping, and otherwise
+        with status 503."""
+        if self.server.is_stopping:
+            return text_response('The server is stopping.', 503)
+        feed = self.server.feed
+        generated = feed.index_generated if (feed is not None) else None
+        if generated is None:
+            return text_response('The feed index is not loaded.', 503)
+        return text_response(f'The feed index generated at {formatdate(generated, usegmt=True)} is loaded.')
+
+    def _response(self) -> Response:
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == _HEALTH_PATH:
+            return text_response('The server is running.')
+        if url.path == _READINESS_PATH:
+            return self._readiness_response()
+        if url.path != _FEED_PATH:
+            return text_response(f'The path {url.path} is not found.', 404)
+        assert self.server.feed is not None
+        args: Dict[str, str] = {}
+        for name, value in urllib.parse.parse_qsl(url.query, keep_blank_values=True):
+            args.setdefault(name, value)  # As with Flask, the first value of an argument is used.
+        headers = {name.title(): value for name, value in self.headers.items()}
+        return feed_request_response(self.server.feed, args, headers)
+
+    def _respond(self, *, include_body: bool) -> None:
+        try:
+            body, status, headers = self._response()
+        except Exception:
+            log.exception('Failed to respond to request for %s.', self.path)
+            body, status, headers = text_response('The server failed to respond.', 500)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if include_body:
+            self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        self._respond(include_body=True)
+
+    def do_HEAD(self) -> None:
+        self._respond(include_body=False)
+
+    def log_request(self, code: Any = '-', size: Any = '-') -> None:
+        # Note: Successful requests aren't logged, as that would slow their responses, and the load balancer logs them.
+        if isinstance(code, int) and (code >= 400):
+            super().log_request(code, size)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        log.info('%s %s', self.address_string(), format % args)
+
+
+def _run_worker(server: FeedServer) -> None:
+    """Serve requests in this process until it is sent SIGTERM or SIGINT."""
+    server.feed = Feed()
+    FeedRefresher(server.feed, preload=True).start()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: server.stop())
+    log.info('Worker process %s is serving.', os.getpid())
+    server.serve_forever()
+    log.info('Worker process %s stopped serving.', os.getpid())
+
+
+def serve(*, host: str = config.SERVER_HOST, port: int = config.SERVER_PORT,
+          workers: int = config.SERVER_WORKERS) -> None:
+    """Serve the feed over HTTP, along with its health and readiness, until sent SIGTERM or SIGINT.
+
+    The feed is served at /, with the query arguments of `Feed.params`. /healthz always has status 200, and /readyz has
+    status 200 only once the feed index is loaded. If `workers` is greater than one, that many worker processes are
+    forked, with a worker process which exits unexpectedly being replaced.
+    """
+    for name in ('CATEGORIES', 'TERMS', 'TERMS_BLACKLIST_REGEX', 'TERMS_WHITELIST_MATCHER', 'URL_ID_BLACKLIST',
+                 'URL_ID_WHITELIST'):
+        getattr(config, name)
+    for module in ('arxivmlrev.feed_index', 'arxivmlrev.render'):
+        importlib.import_module(module)  # This is done once, before any worker processes are forked.
+    server = FeedServer((host, port))
+    log.info('Serving the feed at http://%s:%s%s with %s worker processes.', host, server.server_port, _FEED_PATH,
+             workers)
+    if workers <= 1:
+        _run_worker(server)
+        server.server_close()
+        return
+
+    pids: Set[int] = set()
+    is_stopping = False
+
+    def stop(*_: Any) -> None:
+        nonlocal is_stopping
+        is_stopping = True
+        for pid_ in pids:
+            os.kill(pid_, signal.SIGTERM)
+
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, stop)
+    while True:
+        while (not is_stopping) and (len(pids) < workers):
+            pid = os.fork()
+            if pid == 0:
+                for signum in (signal.SIGINT, signal.SIGTERM):
+                    signal.signal(signum, signal.SIG_DFL)
+                exit_code = 0
+                try:
+                    _run_worker(server)
+                except BaseException:
+                    log.exception('Worker process %s failed.', os.getpid())
+                    exit_code = 1
+                finally:
+                    os._exit(exit_code)
+            pids.add(pid)
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        pids.discard(pid)
+        if not is_stopping:
+            log.error('Worker process %s exited with status %s, and so it is replaced.', pid, status)
+    server.server_close()
+    log.info('Stopped serving the feed.')
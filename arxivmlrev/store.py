@@ -0,0 +1,149 @@
+import logging
+from pathlib import Path
+import time
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from arxivmlrev import config, instrument
+
+log = logging.getLogger(__name__)
+
+_SORT_COLUMNS = ['Updated', 'Published', 'URL_ID']
+
+
+class ArticlesStore:
+    """Columnar store of the articles, including their abstracts, as a directory of Parquet files.
+
+    A write replaces all files with a single file, whereas an append adds a file with only the new articles. An append
+    of articles which are already stored instead rewrites all files, so that no article is in more than one file. The
+    files are compacted into one when their number exceeds `config.DATA_ARTICLES_STORE_MAX_PARTS`.
+    """
+
+    def __init__(self, path: Path = config.DATA_ARTICLES_STORE_PATH):
+        self._path = path
+
+    @property
+    def _parts(self) -> List[Path]:
+        """Return the paths of the Parquet files, from the oldest to the newest."""
+        return sorted(self._path.glob('part-*.parquet'))
+
+    @staticmethod
+    def _typed(df: pd.DataFrame) -> pd.DataFrame:
+        df = df[config.DATA_ARTICLES_COLUMNS].copy()
+        df['URL_ID'] = df['URL_ID'].astype(str)
+        df['Version'] = df['Version'].astype('int32')
+        for column in ('Published', 'Updated'):
+            df[column] = pd.to_datetime(df[column], utc=True)
+        for column in ('Match', 'Categories'):
+            df[column] = df[column].astype('category')
+        return df
+
+    def _write_part(self, df: pd.DataFrame) -> Path:
+        self._path.mkdir(parents=True, exist_ok=True)
+        path = self._path / f'part-{time.time_ns()}.parquet'
+        path_tmp = path.with_suffix('.tmp')
+        self._typed(df).to_parquet(path_tmp, index=False)
+        path_tmp.replace(path)
+        return path
+
+    @staticmethod
+    def _csv_row_hashes(df: pd.DataFrame) -> np.ndarray:
+        """Return the sorted hashes of the rows of the articles as written to the CSV data file."""
+        rows = df[config.DATA_ARTICLES_CSV_COLUMNS].copy()
+        for column in ('Published', 'Updated'):
+            rows[column] = pd.to_datetime(rows[column], utc=True).dt.strftime('%Y-%m-%d')
+        return np.sort(pd.util.hash_pandas_object(rows.astype(str), index=False).to_numpy())
+
+    def exists(self) -> bool:
+        return bool(self._parts)
+
+    def matches(self, df: pd.DataFrame) -> bool:
+        """Return whether the stored articles are the given ones, as per the columns of the CSV data file."""
+        return np.array_equal(self._csv_row_hashes(self.read(config.DATA_ARTICLES_CSV_COLUMNS)),
+                              self._csv_row_hashes(df))
+
+    def read(self, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """Return the articles, sorted by their last updated date, with only the given columns if specified."""
+        parts = self._parts
+        columns = list(columns or config.DATA_ARTICLES_COLUMNS)
+        read_columns = columns + [c for c in ['URL_ID', *_SORT_COLUMNS] if c not in columns]
+        dfs = [pd.read_parquet(path, columns=read_columns, memory_map=True) for path in reversed(parts)]
+        if not dfs:
+            return pd.DataFrame(columns=columns)
+        df = pd.concat(dfs, ignore_index=True) if (len(dfs) > 1) else dfs[0]
+        if len(dfs) > 1:
+            df.drop_duplicates('URL_ID', inplace=True)  # Keeps the article in the newest part, as of an older store.
+        df.sort_values(_SORT_COLUMNS, ascending=False, inplace=True, ignore_index=True)
+        log.debug('Read %s articles from %s parts of %s.', len(df), len(parts), self._path)
+        return df[columns]
+
+    def write(self, df: pd.DataFrame) -> None:
+        """Replace all stored articles with the given ones."""
+        parts = self._parts
+        path = self._write_part(df)
+        for part in parts:
+            part.unlink()
+        log.info('Wrote %s articles to %s.', len(df), path)
+
+    def append(self, df: pd.DataFrame) -> None:
+        """Store the given new or updated articles."""
+        if df.empty:
+            log.info('No articles were appended to %s.', self._path)
+            return
+        if self.exists() and self.read(['URL_ID'])['URL_ID'].isin(df['URL_ID']).any():
+            df = pd.concat([self._typed(df), self.read()], ignore_index=True)
+            df.drop_duplicates('URL_ID', inplace=True)  # Keeps the given version of a stored article.
+            df.sort_values(_SORT_COLUMNS, ascending=False, inplace=True, ignore_index=True)
+            log.info('Some appended articles are already stored in %s, and so all articles are rewritten.', self._path)
+            self.write(df)
+            return
+        path = self._write_part(df)
+        log.info('Appended %s articles to %s.', len(df), path)
+        if len(self._parts) > config.DATA_ARTICLES_STORE_MAX_PARTS:
+            self.write(self.read())
+
+
+def read_csv(path: Path = config.DATA_ARTICLES_CSV_PATH) -> pd.DataFrame:
+    """Return the articles of the CSV data file, which doesn't have their abstracts."""
+    df = pd.read_csv(path, dtype={'URL_ID': str}, parse_dates=['Published', 'Updated'])
+    for column in ('Published', 'Updated'):
+        df[column] = df[column].dt.tz_localize('UTC')
+    return df
+
+
+def read_articles(columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Return the stored articles, sorted by their last updated date, with only the given columns if specified.
+
+    They are read from the articles store if it exists and matches the CSV data file, and otherwise from the CSV data
+    file, in which case their abstracts are missing. The CSV data file, which is checked into the repository, can have
+    changed since the store was written, such as by a pull.
+    """
+    store = ArticlesStore(config.DATA_ARTICLES_STORE_PATH)
+    if store.exists() and not config.DATA_ARTICLES_CSV_PATH.exists():
+        return store.read(columns)
+    df = read_csv(config.DATA_ARTICLES_CSV_PATH)
+    if not store.exists():
+        log.info('The articles store does not exist, and so the CSV data file is read instead.')
+    elif store.matches(df):
+        return store.read(columns)
+    else:
+        log.warning('The articles store does not match the CSV data file, which has changed since the store was '
+                    'written, and so the CSV data file is read instead.')
+    return df if (columns is None) else df.reindex(columns=columns)
+
+
+@instrument.staged('merge')
+def merge(df_old: pd.DataFrame, df_new: pd.DataFrame) -> pd.DataFrame:
+    """Return the preexisting articles updated with the given new or re-versioned articles, without any blacklisted
+    articles, sorted by their last updated date."""
+    df = pd.concat([df_new, df_old], ignore_index=True)
+    for column in ('Published', 'Updated'):
+        df[column] = pd.to_datetime(df[column], utc=True)
+    df.drop_duplicates('URL_ID', inplace=True)  # Keeps the new version of a preexisting article.
+    df = df[~df['URL_ID'].isin(config.URL_ID_BLACKLIST)]
+    df.sort_values(_SORT_COLUMNS, ascending=False, inplace=True, ignore_index=True)
+    log.info('Merged %s new or updated articles into %s preexisting articles, yielding %s articles.',
+             len(df_new), len(df_old), len(df))
+    return df
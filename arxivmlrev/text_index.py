@@ -0,0 +1,269 @@
+"""Full-text inverted index of the titles and abstracts of articles, with BM25 ranking.
+
+The index is stored as a directory of segments, each being a directory of numpy arrays. An incremental update adds a
+segment of only the new or updated articles. Searching memory-maps the arrays, and so it neither reads the whole index
+nor imports pandas.
+"""
+from array import array
+import logging
+import os
+from pathlib import Path
+import re
+import shutil
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple, TYPE_CHECKING
+
+import numpy as np
+
+from arxivmlrev import config
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+log = logging.getLogger(__name__)
+
+_TOKEN_REGEX = re.compile(r'[^\W_]+')
+_TERM_SHIFT = 32  # The bits of a posting key holding its doc ID, below those holding its term rank.
+
+
+def tokenize(text: str) -> List[str]:
+    """Return the lowercase alphanumeric words of the text."""
+    return _TOKEN_REGEX.findall(text.lower())
+
+
+def _doc_id_dtype(num_docs: int) -> type:
+    return np.uint16 if (num_docs <= np.iinfo(np.uint16).max) else np.uint32
+
+
+class Hit(NamedTuple):
+    url_id: str
+    title: str
+    score: float
+
+
+class Segment(NamedTuple):
+    """Inverted index of a set of articles as arrays.
+
+    The postings of the term `terms[i]` are the ascending doc IDs `doc_ids[offsets[i]:offsets[i + 1]]`, along with their
+    term frequencies, in which the words of the title are counted `config.TEXT_INDEX_TITLE_WEIGHT` times. The doc IDs
+    use the smallest sufficient unsigned integer type, and the frequencies are capped at 255, beyond which BM25 scores
+    barely change.
+    """
+    terms: np.ndarray  # Sorted.
+    offsets: np.ndarray
+    doc_ids: np.ndarray
+    tfs: np.ndarray
+    lengths: np.ndarray  # Weighted number of words of each article.
+    url_ids: np.ndarray
+    titles: np.ndarray  # UTF-8 bytes of the concatenated titles.
+    title_offsets: np.ndarray
+
+    @classmethod
+    def _from_postings(cls, terms: np.ndarray, keys: np.ndarray, tfs: np.ndarray, *, lengths: np.ndarray,
+                       url_ids: Sequence[str], titles: Sequence[str]) -> 'Segment':
+        """Return the segment of the given sorted posting keys, dropping any terms without postings."""
+        counts = np.bincount(keys >> _TERM_SHIFT, minlength=len(terms))
+        has_postings = counts > 0
+        encoded_titles = [title.encode() for title in titles]
+        return cls(terms=terms[has_postings], offsets=np.concatenate([[0], np.cumsum(counts[has_postings])]),
+                   doc_ids=(keys & ((1 << _TERM_SHIFT) - 1)).astype(_doc_id_dtype(len(lengths))),
+                   tfs=np.minimum(tfs, np.iinfo(np.uint8).max).astype(np.uint8), lengths=lengths.astype(np.uint32),
+                   url_ids=np.array(url_ids, dtype=str),
+                   titles=np.frombuffer(b''.join(encoded_titles), dtype=np.uint8),
+                   title_offsets=np.concatenate([[0], np.cumsum([len(t) for t in encoded_titles], dtype=np.int64)]))
+
+    @classmethod
+    def build(cls, url_ids: Sequence[str], titles: Sequence[str], abstracts: Sequence[str]) -> 'Segment':
+        """Return the segment of the given articles, in which the doc ID of an article is its position."""
+        vocabulary: Dict[str, int] = {}
+        token_ids = array('q')
+        lengths = np.empty(len(url_ids), dtype=np.int64)
+        for doc_id, (title, abstract) in enumerate(zip(titles, abstracts)):
+            tokens = tokenize(title) * config.TEXT_INDEX_TITLE_WEIGHT + tokenize(abstract)
+            token_ids.extend([vocabulary.setdefault(token, len(vocabulary)) for token in tokens])
+            lengths[doc_id] = len(tokens)
+
+        terms = np.array(list(vocabulary), dtype=str)
+        order = np.argsort(terms)
+        ranks = np.empty_like(order)
+        ranks[order] = np.arange(len(order))
+        doc_ids = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+        keys, tfs = np.unique((ranks[np.frombuffer(token_ids, dtype=np.int64)] << _TERM_SHIFT) | doc_ids,
+                              return_counts=True)
+        return cls._from_postings(terms[order], keys, tfs, lengths=lengths, url_ids=url_ids, titles=titles)
+
+    @classmethod
+    def load(cls, path: Path) -> 'Segment':
+        return cls(**{name: np.load(path / f'{name}.npy', mmap_mode='r') for name in cls._fields})
+
+    def save(self, path: Path) -> None:
+        path.mkdir(parents=True)
+        for name, values in self._asdict().items():
+            np.save(path / f'{name}.npy', values)
+
+    @property
+    def num_docs(self) -> int:
+        return len(self.lengths)
+
+    def postings(self, term: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the doc IDs and term frequencies of the articles having the term."""
+        index = int(np.searchsorted(self.terms, term))
+        if (index == len(self.terms)) or (self.terms[index] != term):
+            return self.doc_ids[:0], self.tfs[:0]
+        start, stop = self.offsets[index], self.offsets[index + 1]
+        return self.doc_ids[start:stop], self.tfs[start:stop]
+
+    def title(self, doc_id: int) -> str:
+        return self.titles[self.title_offsets[doc_id]:self.title_offsets[doc_id + 1]].tobytes().decode()
+
+
+class TextIndex:
+    """Queryable full-text index of one or more segments, from the oldest to the newest.
+
+    The position of an article is its doc ID offset by the number of articles in the preceding segments. An article
+    in a segment is superseded by any article having the same URL ID in a newer segment, with superseded articles
+    having no score and not counting in the corpus statistics of BM25.
+    """
+
+    def __init__(self, segments: Sequence[Segment]):
+        self._segments = list(segments)
+        self._bases = np.cumsum([0] + [segment.num_docs for segment in self._segments])
+        self._live: List[Optional[np.ndarray]] = []  # None if all articles of the segment are live.
+        newer_url_ids = np.array([], dtype=str)
+        for segment in reversed(self._segments):
+            live = ~np.isin(segment.url_ids, newer_url_ids)
+            self._live.insert(0, None if live.all() else live)
+            newer_url_ids = np.concatenate([newer_url_ids, segment.url_ids])
+        self._lengths = np.concatenate([[]] + [segment.lengths for segment in self._segments]).astype(np.float32)
+        live_lengths = np.concatenate([[]] + [segment.lengths if (live is None) else segment.lengths[live]
+                                              for segment, live in zip(self._segments, self._live)])
+        self._num_live = len(live_lengths)
+        self._avg_length = float(live_lengths.mean()) if self._num_live else 0.
+        log.debug('Loaded text index of %s segments with %s live articles.', len(self._segments), self._num_live)
+
+    def __len__(self) -> int:
+        return int(self._bases[-1])
+
+    @classmethod
+    def from_frame(cls, df: 'pd.DataFrame') -> 'TextIndex':
+        """Return the in-memory index of the articles of the dataframe, with the position of each being its row."""
+        return cls([build_segment(df)])
+
+    def compacted(self) -> Segment:
+        """Return a single segment of the live articles of all segments."""
+        terms = np.unique(np.concatenate([np.array([], dtype=str)] + [segment.terms for segment in self._segments]))
+        keys, tfs, lengths = [], [], []
+        url_ids: List[str] = []
+        titles: List[str] = []
+        num_docs = 0
+        for segment, live in zip(self._segments, self._live):
+            live = np.ones(segment.num_docs, dtype=bool) if (live is None) else live
+            new_doc_ids = np.cumsum(live) - 1 + num_docs
+            posting_ranks = np.repeat(np.searchsorted(terms, segment.terms), np.diff(segment.offsets))
+            is_live_posting = live[segment.doc_ids]
+            keys.append((posting_ranks[is_live_posting].astype(np.int64) << _TERM_SHIFT) |
+                        new_doc_ids[segment.doc_ids[is_live_posting]])
+            tfs.append(segment.tfs[is_live_posting])
+            lengths.append(segment.lengths[live])
+            url_ids.extend(segment.url_ids[live].tolist())
+            titles.extend(segment.title(int(doc_id)) for doc_id in np.flatnonzero(live))
+            num_docs += int(live.sum())
+        all_keys = np.concatenate([np.array([], dtype=np.int64)] + keys)
+        order = np.argsort(all_keys)
+        return Segment._from_postings(terms, all_keys[order], np.concatenate([np.array([], np.uint8)] + tfs)[order],
+                                      lengths=np.concatenate([np.array([], np.uint32)] + lengths), url_ids=url_ids,
+                                      titles=titles)
+
+    def scores(self, query: str) -> np.ndarray:
+        """Return the BM25 score of each article for the words of the query, being zero if it has none of them."""
+        scores = np.zeros(len(self), dtype=np.float32)
+        k1, b = config.TEXT_INDEX_BM25_K1, config.TEXT_INDEX_BM25_B
+        for term in set(tokenize(query)):
+            postings = []
+            for segment, base, live in zip(self._segments, self._bases, self._live):
+                doc_ids, tfs = segment.postings(term)
+                if live is not None:
+                    is_live = live[doc_ids]
+                    doc_ids, tfs = doc_ids[is_live], tfs[is_live]
+                postings.append((doc_ids.astype(np.int64) + base, tfs.astype(np.float32)))
+            doc_freq = sum(len(doc_ids) for doc_ids, _ in postings)
+            if not doc_freq:
+                continue
+            idf = np.log1p((self._num_live - doc_freq + .5) / (doc_freq + .5))
+            for positions, tfs in postings:
+                norms = k1 * (1 - b + b * self._lengths[positions] / self._avg_length)
+                scores[positions] += idf * tfs * (k1 + 1) / (tfs + norms)
+        return scores
+
+    def search(self, query: str, limit: int = 10) -> List[Hit]:
+        """Return the articles having the highest scores for the query, up to the given limit."""
+        scores = self.scores(query)
+        positions = np.flatnonzero(scores > 0)
+        if len(positions) > limit:
+            positions = positions[np.argpartition(-scores[positions], limit - 1)[:limit]]
+        positions = positions[np.argsort(-scores[positions], kind='stable')]
+        hits = []
+        for position in positions:
+            segment_index = int(np.searchsorted(self._bases, position, side='right')) - 1
+            segment, doc_id = self._segments[segment_index], int(position - self._bases[segment_index])
+            hits.append(Hit(url_id=str(segment.url_ids[doc_id]), title=segment.title(doc_id),
+                            score=float(scores[position])))
+        return hits
+
+
+def build_segment(df: 'pd.DataFrame') -> Segment:
+    """Return the segment of the articles of the dataframe, which needn't have abstracts."""
+    abstracts = df['Abstract'].fillna('').astype(str).tolist() if ('Abstract' in df) else [''] * len(df)
+    return Segment.build(df['URL_ID'].astype(str).tolist(), df['Title'].astype(str).tolist(), abstracts)
+
+
+class TextIndexStore:
+    """Store of the full-text index of the articles as a directory of segments.
+
+    A write replaces all segments with a single segment, whereas an append adds a segment of only the new or updated
+    articles. The segments are compacted into one when their number exceeds `config.TEXT_INDEX_MAX_SEGMENTS`.
+    """
+
+    def __init__(self, path: Path = config.DATA_ARTICLES_INDEX_PATH):
+        self._path = path
+
+    @property
+    def _segment_paths(self) -> List[Path]:
+        """Return the paths of the segments, from the oldest to the newest."""
+        return sorted(path for path in self._path.glob('segment-*') if path.suffix != '.tmp')
+
+    def _write_segment(self, segment: Segment) -> Path:
+        path = self._path / f'segment-{time.time_ns()}'
+        path_tmp = path.with_suffix('.tmp')
+        segment.save(path_tmp)
+        os.replace(path_tmp, path)
+        return path
+
+    def _replace(self, segment: Segment) -> Path:
+        paths = self._segment_paths
+        path = self._write_segment(segment)
+        for old_path in paths:
+            shutil.rmtree(old_path)
+        return path
+
+    def exists(self) -> bool:
+        return bool(self._segment_paths)
+
+    def load(self) -> TextIndex:
+        return TextIndex([Segment.load(path) for path in self._segment_paths])
+
+    def write(self, df: 'pd.DataFrame') -> None:
+        """Replace the index with that of the given articles."""
+        path = self._replace(build_segment(df))
+        log.info('Wrote text index of %s articles to %s.', len(df), path)
+
+    def append(self, df: 'pd.DataFrame') -> None:
+        """Index the given new or updated articles."""
+        if df.empty:
+            log.info('No articles were appended to %s.', self._path)
+            return
+        path = self._write_segment(build_segment(df))
+        log.info('Appended text index of %s articles to %s.', len(df), path)
+        if len(self._segment_paths) > config.TEXT_INDEX_MAX_SEGMENTS:
+            path = self._replace(self.load().compacted())
+            log.info('Compacted text index to %s.', path)
@@ -0,0 +1,86 @@
+import hashlib
+import logging
+import os
+from pathlib import Path
+import struct
+import threading
+import time
+from typing import Optional
+
+from arxivmlrev.util.humanize import humanize_bytes
+
+log = logging.getLogger(__name__)
+
+_HEADER = struct.Struct('!d')  # Expiration time in seconds since the epoch.
+
+
+class DiskCache:
+    """Persistent cache of bytes values by string keys.
+
+    Each entry is stored in its own file, with its own expiration time. When the total size of the entries exceeds the
+    maximum size, the least recently used entries are evicted.
+    """
+
+    def __init__(self, directory: Path, *, max_size: int, ttl: float):
+        self._directory = directory
+        self._max_size = max_size
+        self._ttl = ttl
+
+    def _path(self, key: str) -> Path:
+        return self._directory / hashlib.sha256(key.encode()).hexdigest()
+
+    def _evict(self) -> None:
+        entries = []
+        for entry in os.scandir(self._directory):
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        size = sum(e[1] for e in entries)
+        if size <= self._max_size:
+            return
+        entries.sort()
+        num_evicted = 0
+        for _, entry_size, path in entries:
+            if size <= self._max_size:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+            num_evicted += 1
+        log.info('Evicted %s entries from cache %s, reducing its size to %s.',
+                 num_evicted, self._directory, humanize_bytes(size))
+
+    def get(self, key: str, *, ignore_expiration: bool = False) -> Optional[bytes]:
+        """Return the value of the key if it exists and is unexpired, otherwise None."""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        if len(data) < _HEADER.size:  # The entry was truncated, such as by a crash while it was written.
+            log.warning('Removing truncated entry %s of cache %s.', path.name, self._directory)
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            return None
+        expiration_time, = _HEADER.unpack_from(data)
+        if (not ignore_expiration) and (expiration_time < time.time()):
+            return None
+        try:
+            os.utime(path)  # Marks the entry as recently used.
+        except FileNotFoundError:
+            pass
+        return data[_HEADER.size:]
+
+    def set(self, key: str, value: bytes, *, ttl: Optional[float] = None) -> None:
+        """Set the value of the key, expiring it after the given or default time-to-live in seconds."""
+        expiration_time = time.time() + (self._ttl if ttl is None else ttl)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        path_tmp = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+        path_tmp.write_bytes(_HEADER.pack(expiration_time) + value)
+        os.replace(path_tmp, path)
+        self._evict()
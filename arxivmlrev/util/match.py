@@ -0,0 +1,46 @@
+from typing import Dict, Iterable, List, Optional, Pattern, Sequence
+
+
+class TermsMatcher:
+    """Matcher of a title against an ordered list of term regular expressions, returning the first term to match.
+
+    Rather than searching the title with every regex, only the regexes of the terms whose first word is a word of the
+    title are searched. This requires each regex to match its term only as whole words, case-insensitively. Titles must
+    have single spaces between their words, as is the case for alphanumeric titles.
+    """
+
+    def __init__(self, terms: Sequence[str], regexes: Sequence[Pattern]):
+        assert len(terms) == len(regexes)
+        self._regexes = list(regexes)
+        self._index: Dict[str, List[int]] = {}
+        for term_index, term in enumerate(terms):
+            first_word = term.split(' ', 1)[0].lower()
+            self._index.setdefault(first_word, []).append(term_index)
+
+    def _match_all(self, title: str) -> Optional[str]:
+        for regex in self._regexes:
+            match = regex.search(title)
+            if match:
+                return match.group()
+        return None
+
+    def match(self, title: str) -> Optional[str]:
+        """Return the matching string, if any, of the title against the term regexes in their order."""
+        if not title.isascii():
+            # Note: Case-insensitive matching of non-ASCII characters can differ from str.lower, and so all regexes are
+            # used.
+            return self._match_all(title)
+        index = self._index
+        term_indexes = [i for word in set(title.lower().split(' ')) for i in index.get(word, ())]
+        term_indexes.sort()
+        regexes = self._regexes
+        for term_index in term_indexes:
+            match = regexes[term_index].search(title)
+            if match:
+                return match.group()
+        return None
+
+    def match_many(self, titles: Iterable[str]) -> List[Optional[str]]:
+        """Return the matching string, if any, of each of the titles."""
+        match = self.match
+        return [match(title) for title in titles]
@@ -0,0 +1,73 @@
+import fcntl
+import logging
+import math
+from pathlib import Path
+import threading
+import time
+from types import TracebackType
+from typing import BinaryIO, Optional, Type, Union
+
+from arxivmlrev.util.time import verbose_sleep
+
+log = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Thread-safe context manager which allows one request at a time, with a minimum interval between requests.
+
+    This is equivalent to a token bucket having a capacity of one token, with the token being refilled the given number
+    of seconds after the completion of the previous request.
+
+    If a path is given, the rate limit is also shared with other processes using the same path. The file is then locked
+    for the duration of each request, and it stores the completion time of the previous request.
+    """
+
+    def __init__(self, interval: Union[int, float], *, path: Optional[Path] = None):
+        self._interval = interval
+        self._path = path
+        self._lock = threading.Lock()
+        self._last_completion_time = -math.inf
+        self._file: Optional[BinaryIO] = None
+
+    def __enter__(self) -> None:
+        self._lock.acquire()
+        try:
+            if self._path is None:
+                sleep_time = self._last_completion_time + self._interval - time.monotonic()
+            else:
+                self._path.parent.mkdir(parents=True, exist_ok=True)
+                self._file = file = open(self._path, 'a+b')
+                fcntl.flock(file, fcntl.LOCK_EX)
+                file.seek(0)
+                try:
+                    last_completion_time = float(file.read() or -math.inf)
+                except ValueError:
+                    last_completion_time = -math.inf
+                sleep_time = last_completion_time + self._interval - time.time()
+            if sleep_time > 0:
+                verbose_sleep(sleep_time)
+        except BaseException:
+            self._close_file()
+            self._lock.release()
+            raise
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], exc_val: Optional[BaseException],
+                 exc_tb: Optional[TracebackType]) -> None:
+        self._last_completion_time = time.monotonic()
+        try:
+            file = self._file
+            if file is not None:
+                file.seek(0)
+                file.truncate()
+                file.write(repr(time.time()).encode())
+                file.flush()
+        finally:
+            self._close_file()
+            self._lock.release()
+
+    def _close_file(self) -> None:
+        """Close the file, if any, which also unlocks it for other processes."""
+        file = self._file
+        if file is not None:
+            self._file = None
+            file.close()
@@ -1,10 +1,24 @@
+import datetime
 import logging
 import time
 from typing import Union
 
+from dateutil.parser import parse as dateutil_parse
+
 log = logging.getLogger(__name__)
 
 
+def parse_datetime(text: str) -> datetime.datetime:
+    """Return the datetime of an ISO 8601 string, such as 2019-01-31T18:59:59Z as returned by the arXiv API.
+
+    The fixed format of the arXiv API is parsed much faster than by dateutil, which remains as a fallback.
+    """
+    try:
+        return datetime.datetime.fromisoformat(text.replace('Z', '+00:00', 1))
+    except ValueError:
+        return dateutil_parse(text)
+
+
 def verbose_sleep(seconds: Union[int, float]) -> None:
     log.info(f'Sleeping for {seconds:.1f}s')
     time.sleep(seconds)
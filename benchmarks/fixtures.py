@@ -0,0 +1,62 @@
+"""Synthetic arXiv API fixtures, as Atom pages and as parsed entries, derived from the CSV data file."""
+import csv
+from typing import Iterator, List, Sequence
+from xml.sax.saxutils import escape, quoteattr
+
+from arxivmlrev import config
+
+_ABSTRACT_NUM_SENTENCES = 8  # This approximates the length of a typical abstract.
+
+
+def entries(scale: int) -> List[dict]:
+    """Return synthetic entries having the fields of parsed arXiv API results, in reverse order of their update.
+
+    Each article in the CSV data file is repeated `scale` times, with each repetition having a distinct URL ID.
+    """
+    with config.DATA_ARTICLES_CSV_PATH.open(newline='') as file:
+        articles = list(csv.DictReader(file))
+    entries_: List[dict] = []
+    for article in articles:
+        categories = article['Categories'].split(', ')
+        abstract = ' '.join([f'{article["Title"]}.'] * _ABSTRACT_NUM_SENTENCES)
+        for repetition in range(scale):
+            url_id = article['URL_ID'] if (repetition == 0) else f'{article["URL_ID"]}.{repetition}'
+            url = f'http://arxiv.org/abs/{url_id}v{article["Version"]}'
+            entries_.append({
+                'id': url,
+                'arxiv_url': url,
+                'title': article['Title'],
+                'summary': abstract,
+                'published': f'{article["Published"]}T10:00:00Z',
+                'updated': f'{article["Updated"]}T11:00:00Z',
+                'tags': [{'term': category} for category in categories],
+                'arxiv_primary_category': {'term': categories[0]},
+            })
+    entries_.sort(key=lambda entry: entry['updated'], reverse=True)
+    return entries_
+
+
+def atom_page(entries_: Sequence[dict], *, total_results: int) -> bytes:
+    """Return an Atom page of the arXiv API having the given entries."""
+    parts = ['<?xml version="1.0" encoding="UTF-8"?>\n<feed xmlns="http://www.w3.org/2005/Atom" '
+             'xmlns:arxiv="http://arxiv.org/schemas/atom" xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">\n'
+             f'  <opensearch:totalResults>{total_results}</opensearch:totalResults>\n']
+    for entry in entries_:
+        parts.append(
+            '  <entry>\n'
+            f'    <id>{escape(entry["id"])}</id>\n'
+            f'    <updated>{entry["updated"]}</updated>\n'
+            f'    <published>{entry["published"]}</published>\n'
+            f'    <title>{escape(entry["title"])}</title>\n'
+            f'    <summary>{escape(entry["summary"])}</summary>\n'
+            f'    <link href={quoteattr(entry["arxiv_url"])} rel="alternate" type="text/html"/>\n'
+            f'    <arxiv:primary_category term={quoteattr(entry["arxiv_primary_category"]["term"])}/>\n'
+            + ''.join(f'    <category term={quoteattr(tag["term"])}/>\n' for tag in entry['tags'])
+            + '  </entry>\n')
+    parts.append('</feed>\n')
+    return ''.join(parts).encode()
+
+
+def atom_pages(entries_: Sequence[dict], *, page_size: int = config.MAX_RESULTS_PER_QUERY) -> Iterator[bytes]:
+    for start in range(0, len(entries_), page_size):
+        yield atom_page(entries_[start:start + page_size], total_results=len(entries_))
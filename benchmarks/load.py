@@ -0,0 +1,131 @@
+"""Load test a running feed server, reporting its sustained requests per second and its latency percentiles.
+
+Each client process holds persistent connections, with a thread per connection sending requests back to back. The
+requests cycle through feed variants, each of which is requested once before the test, so that it is rendered.
+"""
+import collections
+import http.client
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from typing import Counter, List, Tuple
+import urllib.parse
+
+import fire
+
+from arxivmlrev import config
+
+log = logging.getLogger(__name__)
+
+READINESS_TIMEOUT = 600  # Seconds.
+VARIANTS = ['', '?count=100', '?category=cs.LG', '?category=cs.CV&count=50', '?term=survey', '?year=2021',
+            '?q=graph+neural+networks', '?q=deep+reinforcement+learning&count=10']
+
+
+def _connection(url: str) -> http.client.HTTPConnection:
+    return http.client.HTTPConnection(urllib.parse.urlsplit(url).netloc, timeout=60)
+
+
+def _get(url: str) -> int:
+    parts = urllib.parse.urlsplit(url)
+    connection = _connection(url)
+    try:
+        connection.request('GET', f'{parts.path}?{parts.query}' if parts.query else parts.path)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+    finally:
+        connection.close()
+
+
+def _wait_until_ready(url: str) -> None:
+    readiness_url = urllib.parse.urljoin(url, '/readyz')
+    deadline = time.monotonic() + READINESS_TIMEOUT
+    while True:
+        try:
+            status = _get(readiness_url)
+        except OSError:
+            status = None
+        if status == 200:
+            return
+        if time.monotonic() > deadline:
+            raise TimeoutError(f'The server at {url} is not ready after {READINESS_TIMEOUT}s, with status {status}.')
+        time.sleep(1)
+
+
+def _run_connection(url: str, seconds: float, latencies: List[float], statuses: List[int]) -> None:
+    """Send requests over a persistent connection for the given duration, appending the latencies of the successful
+    requests, and the statuses of all requests, with 0 being a connection error."""
+    path = urllib.parse.urlsplit(url).path
+    connection = _connection(url)
+    deadline = time.perf_counter() + seconds
+    num_requests = 0
+    while (start := time.perf_counter()) < deadline:
+        variant = VARIANTS[num_requests % len(VARIANTS)]
+        num_requests += 1
+        try:
+            connection.request('GET', path + variant)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            statuses.append(0)
+            connection.close()
+            connection = _connection(url)
+            continue
+        statuses.append(response.status)
+        if response.status == 200:
+            latencies.append(time.perf_counter() - start)
+    connection.close()
+
+
+def _run_client(url: str, seconds: float, connections: int) -> Tuple[List[float], Counter[int]]:
+    """Return the latencies of the successful requests of a client process, and the counts of the statuses of all of
+    its requests."""
+    latencies: List[List[float]] = [[] for _ in range(connections)]
+    statuses: List[List[int]] = [[] for _ in range(connections)]
+    threads = [threading.Thread(target=_run_connection, args=(url, seconds, latencies[num], statuses[num]))
+               for num in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return [latency for latencies_ in latencies for latency in latencies_], \
+        collections.Counter(status for statuses_ in statuses for status in statuses_)
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def main(url: str = f'http://127.0.0.1:{config.SERVER_PORT}/', *, seconds: float = 30,
+         processes: int = os.cpu_count() or 1, connections: int = 8) -> None:
+    """Load test the feed server at the given URL for the given duration, with the given number of client processes,
+    each having the given number of connections.
+
+    The server is started separately, such as by `python -m arxivmlrev serve`.
+    """
+    _wait_until_ready(url)
+    for variant in VARIANTS:
+        status = _get(url + variant)
+        if status != 200:
+            log.warning('Warming up variant %s returned status %s.', variant or '(default)', status)
+    log.info('Load testing %s for %ss with %s client processes having %s connections each.', url, seconds, processes,
+             connections)
+    with multiprocessing.get_context('spawn').Pool(processes) as pool:
+        clients = pool.starmap(_run_client, [(url, seconds, connections)] * processes)
+
+    latencies = sorted(latency for client_latencies, _ in clients for latency in client_latencies)
+    statuses: Counter[int] = sum((client_statuses for _, client_statuses in clients), collections.Counter())
+    if not latencies:
+        log.error('No requests succeeded, with statuses %s.', dict(statuses))
+        return
+    log.info('Sent %s requests at %.0f requests/s, with statuses %s.', sum(statuses.values()),
+             len(latencies) / seconds, dict(sorted(statuses.items())))
+    log.info('Latency percentiles are p50 %.1fms, p90 %.1fms, p99 %.1fms, and max %.1fms.',
+             *(_percentile(latencies, fraction) * 1000 for fraction in (.5, .9, .99, 1)))
+
+
+if __name__ == '__main__':
+    fire.Fire(main)
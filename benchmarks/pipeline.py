@@ -0,0 +1,239 @@
+"""Benchmark the stages of the search, filter, and render pipeline with synthetic arXiv API fixtures.
+
+Each stage is timed, and then separately run with tracemalloc to measure its peak memory. The measurements are compared
+with the stored baseline, and the process exits with an error if any of them regressed beyond the tolerance.
+"""
+import contextlib
+import json
+import logging
+from pathlib import Path
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Sequence, Tuple, Union
+
+import fire
+
+from arxivmlrev import config, duplicates, query
+from arxivmlrev.atom import AtomFeedParser
+from arxivmlrev.feed import Feed
+from arxivmlrev.result import Result
+from arxivmlrev.results import Results
+from arxivmlrev.search import Searcher
+from arxivmlrev.text_index import TextIndex
+from benchmarks import fixtures
+
+log = logging.getLogger(__name__)
+
+BASELINE_PATH = Path(__file__).with_name('baseline.json')
+MIN_REGRESSION_SECONDS = 0.05  # Smaller differences are regarded as noise.
+MIN_REGRESSION_MB = 1.0
+FIND_QUERIES = ['graph neural networks', 'survey', 'deep reinforcement learning', 'federated learning privacy']
+
+
+class Measurement(NamedTuple):
+    seconds: float
+    peak_mb: float
+    num_items: int
+
+    @property
+    def throughput(self) -> float:
+        """Return the number of items processed per second."""
+        return self.num_items / self.seconds if self.seconds else float('inf')
+
+
+class ReplayQuery:
+    """Replacement of the arXiv API query function which replays the given entries."""
+
+    def __init__(self, entries: Sequence[dict]):
+        self._entries = {'lastUpdatedDate': entries,
+                         'submittedDate': sorted(entries, key=lambda entry: entry['published'], reverse=True)}
+        self._entries_by_url_id = {Result(entry).url_id: entry for entry in entries}
+
+    def __call__(self, *, query: str, id_list: Sequence[str], start: int, max_results: int, sort_by: str) \
+            -> Tuple[List[dict], int]:
+        if id_list:
+            entries = [self._entries_by_url_id[url_id] for url_id in id_list if url_id in self._entries_by_url_id]
+        else:
+            entries = self._entries[sort_by]
+        return list(entries[start:start + max_results]), len(entries)
+
+
+def _stages(scale: int) -> Iterator[Tuple[str, Callable[[], Any], int]]:
+    """Yield the stages of the pipeline, with each being a callable along with the number of items it processes.
+
+    The fixtures of the stages are created once they are needed, and are deleted once they are no longer needed, so
+    that the largest scale fits in memory.
+    """
+    entries = fixtures.entries(scale)
+    pages = list(fixtures.atom_pages(entries))
+
+    def parse() -> None:
+        for page in pages:
+            for _ in AtomFeedParser().parse([page]):
+                pass
+
+    yield 'parse', parse, len(entries)
+    del pages
+
+    def result() -> None:
+        for entry in entries:
+            Result(entry).to_dict
+
+    def filter_() -> None:
+        for _ in Searcher._filter_results(entries):
+            pass
+
+    yield 'result', result, len(entries)
+    yield 'filter', filter_, len(entries)
+
+    original_query = query._query
+    query._query = ReplayQuery(entries)
+
+    def search() -> None:
+        Searcher().search()
+
+    yield 'search', search, len(entries)
+    df = Searcher().search()  # This is the frame used by the rendering stages.
+    query._query = original_query
+    del entries
+
+    def write_md() -> None:
+        results = Results.__new__(Results)
+        results._df_results = df
+        results.write_md()
+
+    def feed() -> None:
+        Feed._output(df, generated=time.time())
+
+    def duplicates_() -> None:
+        duplicates.clusters(df['Title'].tolist())
+
+    def index() -> None:
+        TextIndex.from_frame(df)
+
+    yield 'write_md', write_md, len(df)
+    yield 'feed', feed, len(df)
+    yield 'duplicates', duplicates_, len(df)
+    yield 'index', index, len(df)
+
+    text_index = TextIndex.from_frame(df)
+
+    def find() -> None:
+        for query_ in FIND_QUERIES:
+            text_index.search(query_)
+
+    yield 'find', find, len(FIND_QUERIES)
+
+
+@contextlib.contextmanager
+def _benchmark_config() -> Iterator[None]:
+    """Configure the pipeline for benchmarking, and restore its configuration afterwards.
+
+    The cache directory, the paths within it, and the markdown file are moved to a temporary directory, so that the
+    checkpoints of the replayed searches can't be resumed by a real search. Queries don't back off between their
+    attempts, as this would make the timings random, and the query cache is off.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        settings: Dict[str, Any] = {name: Path(directory, value.relative_to(config.CACHE_DIR))
+                                    for name, value in vars(config).items()
+                                    if isinstance(value, Path) and value.is_relative_to(config.CACHE_DIR)}
+        settings.update(DATA_ARTICLES_MD_PATH=Path(directory, config.DATA_ARTICLES_MD_PATH.name), QUERY_BACKEND='arxiv',
+                        QUERY_BACKOFF_MAX=0)
+        original_settings = {name: getattr(config, name) for name in settings}
+        original_query_cache = query._QUERY_CACHE
+        for name, value in settings.items():
+            setattr(config, name, value)
+        query._QUERY_CACHE = query.QueryCache('off')
+        try:
+            yield
+        finally:
+            query._QUERY_CACHE = original_query_cache
+            for name, value in original_settings.items():
+                setattr(config, name, value)
+
+
+def _measure(stage: Callable[[], Any], num_items: int, *, repeat: int) -> Measurement:
+    """Return the fastest time of the given number of runs of the stage, along with the peak memory of another run."""
+    seconds = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        stage()
+        seconds = min(seconds, time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        stage()
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+    finally:
+        tracemalloc.stop()
+    return Measurement(seconds=seconds, peak_mb=peak_mb, num_items=num_items)
+
+
+def _regressions(measurements: Dict[str, Dict[str, Measurement]], baseline: Dict[str, Dict[str, Dict[str, float]]],
+                 tolerance: float) -> List[str]:
+    """Return the regressions of the measurements relative to the baseline, including any missing baselines.
+
+    The peak memory of the baseline is scaled to the number of items of the measurement, as this number depends on the
+    CSV data file from which the fixtures are derived.
+    """
+    regressions = []
+    for scale, stages in measurements.items():
+        for stage, measurement in stages.items():
+            base = baseline.get(scale, {}).get(stage)
+            if base is None:
+                regressions.append(f'{stage} at scale {scale}: there is no baseline. It can be recorded using '
+                                   '--update_baseline.')
+                continue
+            base_peak_mb = base['peak_mb'] * measurement.num_items / base['num_items']
+            for name, value, base_value, min_difference in (
+                    ('seconds', measurement.seconds, base['seconds'], MIN_REGRESSION_SECONDS),
+                    ('peak_mb', measurement.peak_mb, base_peak_mb, MIN_REGRESSION_MB)):
+                if (value > base_value * (1 + tolerance)) and ((value - base_value) > min_difference):
+                    regressions.append(f'{stage} at scale {scale}: {name} regressed from {base_value:.3f} to '
+                                       f'{value:.3f}.')
+    return regressions
+
+
+def main(scales: Union[int, Sequence[int]] = (1, 10), *, repeat: int = 3, tolerance: float = 0.5,
+         update_baseline: bool = False) -> None:
+    """Benchmark the pipeline at the given multiples of the number of articles in the CSV data file.
+
+    A regression is a measurement exceeding its baseline by more than the given fraction of it. A stage without a
+    baseline also fails. As baselines are specific to a machine, they are to be updated using `--update_baseline` when
+    the machine changes.
+    """
+    logging.getLogger(config.PACKAGE_NAME).setLevel(logging.ERROR)
+    scales = [scales] if isinstance(scales, int) else list(scales)
+    measurements: Dict[str, Dict[str, Measurement]] = {}
+    with _benchmark_config():
+        for scale in scales:
+            log.info('Preparing fixtures at scale %s.', scale)
+            measurements[str(scale)] = stage_measurements = {}
+            for stage_name, stage, num_items in _stages(scale):
+                measurement = stage_measurements[stage_name] = _measure(stage, num_items, repeat=repeat)
+                log.info('Scale %3s: %-8s processed %7s items in %7.3fs at %9.0f items/s, with peak memory '
+                         '%7.1fMB.', scale, stage_name, num_items, measurement.seconds, measurement.throughput,
+                         measurement.peak_mb)
+
+    baseline = json.loads(BASELINE_PATH.read_text()) if BASELINE_PATH.exists() else {}
+    if update_baseline:
+        for scale, stage_measurements in measurements.items():
+            baseline[scale] = {stage: {'num_items': m.num_items, 'peak_mb': round(m.peak_mb, 2),
+                                       'seconds': round(m.seconds, 4)}
+                               for stage, m in stage_measurements.items()}
+        BASELINE_PATH.write_text(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+        log.info('Updated baseline %s.', BASELINE_PATH)
+        return
+
+    regressions = _regressions(measurements, baseline, tolerance)
+    for regression in regressions:
+        log.error('Regression: %s', regression)
+    if regressions:
+        sys.exit(1)
+    log.info('There are no regressions relative to the baseline.')
+
+
+if __name__ == '__main__':
+    fire.Fire(main)
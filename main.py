@@ -1,16 +1,33 @@
 import logging
-from typing import Dict, Tuple
+import threading
+from typing import TYPE_CHECKING, Optional
 
-import flask
+from arxivmlrev.feed import Feed, FeedRefresher
+from arxivmlrev.response import Response, feed_request_response
 
-from arxivmlrev.feed import Feed
+if TYPE_CHECKING:
+    import flask
 
 log = logging.getLogger(__name__)
 feed = Feed()
+_refresher: Optional[FeedRefresher] = None
+_refresher_lock = threading.Lock()
 
 
-def serve(request: flask.Request) -> Tuple[bytes, int, Dict[str, str]]:
+def _start_refresher() -> None:
+    """Start the background refresh of the feed index once, on the first request, and so not on import."""
+    global _refresher
+    if _refresher is None:
+        with _refresher_lock:
+            if _refresher is None:
+                _refresher = FeedRefresher(feed)
+                _refresher.start()
+
+
+def serve(request: 'flask.Request') -> Response:
+    """Respond with the feed variant of the query arguments category, term, year, q, and count, all being optional."""
+    _start_refresher()
     hget = request.headers.get
     log.info('Received request from %s from %s, %s, %s.', hget('X-Appengine-User-Ip'),
              hget('X-Appengine-City'), hget('X-Appengine-Region'), hget('X-Appengine-Country'))
-    return feed.feed(), 200, {'Content-Type': 'text/xml; charset=utf-8'}
+    return feed_request_response(feed, request.args, request.headers)
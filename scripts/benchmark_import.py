@@ -0,0 +1,40 @@
+"""Benchmark the cold-start import time of the serverless entry point, with each import being in a new process."""
+import logging
+import os
+from pathlib import Path
+import re
+import statistics
+import subprocess
+import sys
+
+from arxivmlrev import config
+
+log = logging.getLogger(__name__)
+
+MODULE = sys.argv[1] if len(sys.argv) > 1 else 'main'
+NUM_RUNS = 10
+NUM_TOP_IMPORTS = 15
+ROOT_DIR = Path(__file__).parents[1]
+
+code = f'import time; start = time.perf_counter(); import {MODULE}; print("Seconds:", time.perf_counter() - start)'
+env = {**os.environ, 'PYTHONPATH': str(ROOT_DIR)}
+durations = []
+for _ in range(NUM_RUNS):
+    process = subprocess.run([sys.executable, '-c', code], capture_output=True, check=True, cwd=ROOT_DIR, env=env,
+                             text=True)
+    seconds = re.search(r'^Seconds: (\S+)$', process.stdout, re.MULTILINE)
+    assert seconds
+    durations.append(float(seconds[1]))
+log.info('Importing %s takes a median of %.0fms and a minimum of %.0fms over %s runs. Config snapshot exists: %s',
+         MODULE, statistics.median(durations) * 1000, min(durations) * 1000, NUM_RUNS,
+         config.CONFIG_SNAPSHOT_PATH.exists())
+
+process = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {MODULE}'], capture_output=True,
+                         check=True, cwd=ROOT_DIR, env=env, text=True)
+imports = []
+for line in process.stderr.split('\n'):
+    match = re.fullmatch(r'import time:\s+\d+ \|\s+(\d+) \|( *)(\S+)', line)
+    if match:
+        imports.append((int(match[1]), len(match[2]) // 2, match[3]))
+for cumulative_us, depth, module in sorted(imports, reverse=True)[:NUM_TOP_IMPORTS]:
+    log.info('%6.1fms cumulative import time of %s%s', cumulative_us / 1000, '.' * depth, module)
@@ -0,0 +1,5 @@
+from arxivmlrev import instrument
+from arxivmlrev.results import Results
+
+with instrument.run('publish'):
+    Results.publish()
@@ -1,3 +1,5 @@
+from arxivmlrev import instrument
 from arxivmlrev.results import Results
 
-Results.publish_md()
+with instrument.run('publish_md'):
+    Results.publish_md()
@@ -1,3 +1,5 @@
+from arxivmlrev import instrument
 from arxivmlrev.results import Results
 
-Results().refresh()
+with instrument.run('refresh'):
+    Results().refresh()
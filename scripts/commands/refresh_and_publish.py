@@ -1,3 +1,5 @@
+from arxivmlrev import instrument
 from arxivmlrev.results import Results
 
-Results().refresh_and_publish()
+with instrument.run('refresh_and_publish'):
+    Results().refresh_and_publish()
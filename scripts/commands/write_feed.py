@@ -1,3 +1,5 @@
+from arxivmlrev import instrument
 from arxivmlrev.results import Results
 
-Results().write_feed()
+with instrument.run('write_feed'):
+    Results().write_feed()
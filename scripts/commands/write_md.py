@@ -1,3 +1,5 @@
+from arxivmlrev import instrument
 from arxivmlrev.results import Results
 
-Results().write_md()
+with instrument.run('write_md'):
+    Results().write_md()
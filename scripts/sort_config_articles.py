@@ -1,24 +1,33 @@
 import logging
 
-import arxiv
-
 from arxivmlrev import config
+from arxivmlrev.query import query_id_list
 from arxivmlrev.result import Result
 
 log = logging.getLogger(__name__)
 
+
+class ArxivResultsMissing(Exception):
+    pass
+
+
 df = config.CONFIG_ARTICLES.copy()
 url_ids = df['URL_ID'].tolist()
 num_url_ids = len(url_ids)
-assert 0 < num_url_ids <= 2000
+assert num_url_ids > 0
 
 log.info('Querying arXiv for metadata of %s IDs.', num_url_ids)
-results = arxiv.query(id_list=url_ids, max_results=num_url_ids, sort_by='submittedDate')
-assert len(results) == num_url_ids
+results = [Result(result) for result in query_id_list(url_ids, sort_by='submittedDate')]
 log.info('Queried arXiv for metadata of %s IDs.', len(results))
+missing_url_ids = sorted(set(url_ids) - {result.url_id for result in results})
+if missing_url_ids:
+    # Note: The ID query accepts IDs which arXiv reports as not existing, such as if they are withdrawn.
+    msg = f'arXiv returned no results for {len(missing_url_ids)} of {num_url_ids} IDs, which are to be removed from ' \
+          f'the config articles file if they no longer exist: {", ".join(missing_url_ids)}'
+    log.error(msg)
+    raise ArxivResultsMissing(msg)
 
 for result in results:
-    result = Result(result)
     df.loc[df.URL_ID == result.url_id, 'Title'] = result.title
 
 df = df.sort_values(['Presence', 'URL_ID'], ascending=False).drop_duplicates('URL_ID')
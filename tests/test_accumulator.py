@@ -0,0 +1,56 @@
+import sys
+import threading
+from typing import Iterator, List
+
+import pytest
+
+from arxivmlrev.accumulator import ResultsAccumulator
+from arxivmlrev.result import Result
+
+
+@pytest.fixture
+def frequent_thread_switches() -> Iterator[None]:
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    yield
+    sys.setswitchinterval(switch_interval)
+
+
+def _results(thread_num: int, num_results: int) -> List[Result]:
+    results = []
+    for num in range(num_results):
+        url = f'http://arxiv.org/abs/21{thread_num:02}.{num:05}v{1 + num % 2}'
+        results.append(Result({
+            'id': url,
+            'arxiv_url': url,
+            'title': f'A survey {thread_num}.{num}',
+            'summary': f'An abstract {thread_num}.{num}.',
+            'published': '2021-01-01T10:00:00Z',
+            'updated': '2021-02-01T11:00:00Z',
+            'tags': [{'term': 'cs.LG'}],
+            'arxiv_primary_category': {'term': 'cs.LG'},
+        }))
+    return results
+
+
+@pytest.mark.usefixtures('frequent_thread_switches')
+def test_concurrent_adds_keep_rows_aligned() -> None:
+    accumulator = ResultsAccumulator()
+    threads_results = [_results(thread_num, 5000) for thread_num in range(4)]
+
+    def add(results: List[Result]) -> None:
+        for result in results:
+            accumulator.add(result, source='corpus')
+
+    threads = [threading.Thread(target=add, args=(results,)) for results in threads_results]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    df = accumulator.to_frame()
+    assert len(df) == len(accumulator) == 4 * 5000
+    for url_id, title, abstract in zip(df['URL_ID'], df['Title'], df['Abstract']):
+        thread_num, num = url_id[2:4], url_id[5:]
+        assert title == f'A survey {int(thread_num)}.{int(num)}'
+        assert abstract == f'An abstract {int(thread_num)}.{int(num)}.'
@@ -0,0 +1,93 @@
+from typing import List
+
+import arxiv
+import feedparser
+import pytest
+
+from arxivmlrev.atom import AtomFeedParser
+from arxivmlrev.result import Result
+
+_FEED = b'''<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <link href="http://arxiv.org/api/query?search_query%3Dti%3Asurvey%26id_list%3D%26start%3D0%26max_results%3D2"
+    rel="self" type="application/atom+xml"/>
+  <title type="html">ArXiv Query: search_query=ti:survey&amp;id_list=&amp;start=0&amp;max_results=2</title>
+  <id>http://arxiv.org/api/Kx7bWbE2eVbNBbyUKUQSLjzd8xQ</id>
+  <updated>2021-03-01T00:00:00-05:00</updated>
+  <opensearch:totalResults xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">1234</opensearch:totalResults>
+  <opensearch:startIndex xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">0</opensearch:startIndex>
+  <opensearch:itemsPerPage xmlns:opensearch="http://a9.com/-/spec/opensearch/1.1/">2</opensearch:itemsPerPage>
+  <entry>
+    <id>http://arxiv.org/abs/2101.00001v2</id>
+    <updated>2021-02-01T11:00:00Z</updated>
+    <published>2021-01-01T10:00:00Z</published>
+    <title>A Survey of Deep Learning on Graphs: Methods &amp; Applications of
+  Graph Neural Networks</title>
+    <summary>  We review deep learning on graphs. Its methods &lt;and&gt; applications are
+compared, with "quotes" &amp; ampersands.
+</summary>
+    <author>
+      <name>A. Author</name>
+    </author>
+    <author>
+      <name>B. Author</name>
+      <arxiv:affiliation xmlns:arxiv="http://arxiv.org/schemas/atom">University</arxiv:affiliation>
+    </author>
+    <arxiv:comment xmlns:arxiv="http://arxiv.org/schemas/atom">20 pages, 3 figures</arxiv:comment>
+    <link href="http://arxiv.org/abs/2101.00001v2" rel="alternate" type="text/html"/>
+    <link title="pdf" href="http://arxiv.org/pdf/2101.00001v2" rel="related" type="application/pdf"/>
+    <arxiv:primary_category xmlns:arxiv="http://arxiv.org/schemas/atom" term="cs.LG"
+      scheme="http://arxiv.org/schemas/atom"/>
+    <category term="cs.LG" scheme="http://arxiv.org/schemas/atom"/>
+    <category term="stat.ML" scheme="http://arxiv.org/schemas/atom"/>
+    <category term="I.2.6; I.5.1" scheme="http://arxiv.org/schemas/atom"/>
+    <category term="cs.AI" scheme="http://arxiv.org/schemas/atom"/>
+  </entry>
+  <entry>
+    <id>http://arxiv.org/abs/cs/0112017v1</id>
+    <updated>2001-12-19T10:41:56Z</updated>
+    <published>2001-12-19T10:41:56Z</published>
+    <title>Machine Learning in Automated Text Categorization</title>
+    <summary>  The automated categorization (or classification) of texts into predefined
+categories has witnessed a booming interest in the last ten years.
+</summary>
+    <author>
+      <name>Fabrizio Sebastiani</name>
+    </author>
+    <arxiv:journal_ref xmlns:arxiv="http://arxiv.org/schemas/atom">ACM Computing Surveys 34(1), 2002</arxiv:journal_ref>
+    <link href="http://arxiv.org/abs/cs/0112017v1" rel="alternate" type="text/html"/>
+    <link title="pdf" href="http://arxiv.org/pdf/cs/0112017v1" rel="related" type="application/pdf"/>
+    <arxiv:primary_category xmlns:arxiv="http://arxiv.org/schemas/atom" term="cs.IR"
+      scheme="http://arxiv.org/schemas/atom"/>
+    <category term="cs.IR" scheme="http://arxiv.org/schemas/atom"/>
+    <category term="cs.LG" scheme="http://arxiv.org/schemas/atom"/>
+  </entry>
+</feed>
+'''
+
+
+def _chunks(data: bytes, size: int) -> List[bytes]:
+    return [data[start:start + size] for start in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize('chunk_size', [7, len(_FEED)])
+def test_entries_match_arxiv_package(chunk_size: int) -> None:
+    parser = AtomFeedParser()
+    entries = list(parser.parse(_chunks(_FEED, chunk_size)))
+    feed = feedparser.parse(_FEED)
+    search = arxiv.Search(query='ti:survey')
+    expected_entries = [search._process_result(entry) for entry in feed['entries']]  # As by `arxiv.Search.download`.
+
+    assert parser.total_results == int(feed['feed']['opensearch_totalresults']) == 1234
+    assert len(entries) == len(expected_entries) == 2
+    for entry, expected_entry in zip(entries, expected_entries):
+        result, expected_result = Result(entry), Result(expected_entry)
+        for field in Result.__slots__:
+            if field not in ('_title_whitelist_match', 'result'):
+                assert getattr(result, field) == getattr(expected_result, field), field
+        assert result.to_dict == expected_result.to_dict
+
+
+def test_error_entry_is_skipped() -> None:
+    feed = _FEED.replace(b'http://arxiv.org/abs/cs/0112017v1</id>', b'http://arxiv.org/api/errors#incorrect_id</id>')
+    assert [entry['id'] for entry in AtomFeedParser().parse([feed])] == ['http://arxiv.org/abs/2101.00001v2']
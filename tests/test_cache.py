@@ -0,0 +1,19 @@
+from pathlib import Path
+
+import pytest
+
+from arxivmlrev.util.cache import DiskCache
+
+
+@pytest.mark.parametrize('data', [b'', b'\0' * 5])
+def test_truncated_entry_is_a_miss(tmp_path: Path, data: bytes) -> None:
+    cache = DiskCache(tmp_path, max_size=1024, ttl=60)
+    cache.set('key', b'value')
+    assert cache.get('key') == b'value'
+    [path] = tmp_path.iterdir()
+    path.write_bytes(data)
+
+    assert cache.get('key') is None
+    assert not path.exists()
+    cache.set('key', b'value')
+    assert cache.get('key') == b'value'
@@ -0,0 +1,41 @@
+from pathlib import Path
+from typing import List
+
+from arxivmlrev.crawl import PageCheckpoint
+
+
+def _checkpoint(tmp_path: Path) -> PageCheckpoint:
+    return PageCheckpoint('titles', fingerprint='fingerprint', sort_by='lastUpdatedDate', directory=tmp_path)
+
+
+def _results(start: int, stop: int) -> List[dict]:
+    return [{'id': f'http://arxiv.org/abs/2101.{num:05}v1', 'title': f'Title {num}'} for num in range(start, stop)]
+
+
+def test_resume_after_partial_save(tmp_path: Path) -> None:
+    checkpoint = _checkpoint(tmp_path)
+    assert checkpoint.load() == (0, [])
+    checkpoint.save(100, _results(0, 3))
+    checkpoint.save(200, _results(3, 5))
+    with (tmp_path / 'titles.jsonl').open('ab') as file:
+        file.write(b'{"id": "http://arxiv.org/abs/2101.99999v1", "ti')  # A save which was interrupted.
+
+    checkpoint = _checkpoint(tmp_path)
+    assert checkpoint.load() == (200, _results(0, 5))
+    checkpoint.save(300, _results(5, 6))
+    checkpoint.save(400, _results(6, 8))
+    assert b'\0' not in (tmp_path / 'titles.jsonl').read_bytes()
+
+    checkpoint = _checkpoint(tmp_path)
+    assert checkpoint.load() == (400, _results(0, 8))
+
+
+def test_invalid_results_are_discarded(tmp_path: Path) -> None:
+    checkpoint = _checkpoint(tmp_path)
+    checkpoint.save(100, _results(0, 3))
+    (tmp_path / 'titles.jsonl').write_bytes(b'\0' * 64)
+
+    checkpoint = _checkpoint(tmp_path)
+    assert checkpoint.load() == (0, [])
+    assert not (tmp_path / 'titles.json').exists()
+    assert not (tmp_path / 'titles.jsonl').exists()
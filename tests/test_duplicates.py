@@ -0,0 +1,21 @@
+from typing import List
+
+import pytest
+
+from arxivmlrev import duplicates
+from arxivmlrev.accumulator import ResultsAccumulator
+
+
+@pytest.mark.parametrize('titles', [[], ['!!!'], ['!!!', '???'], ['A survey of deep learning']])
+def test_too_few_titles_have_no_clusters(titles: List[str]) -> None:
+    assert duplicates.clusters(titles) == []
+
+
+def test_titles_without_alphanumeric_characters_are_ignored() -> None:
+    titles = ['!!!', 'A survey of deep learning', '???', 'A Survey of Deep Learning.']
+    assert duplicates.clusters(titles) == [[1, 3]]
+
+
+def test_empty_search_is_unsuppressed() -> None:
+    df = ResultsAccumulator().to_frame()
+    assert duplicates.suppress(df).empty
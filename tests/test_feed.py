@@ -0,0 +1,81 @@
+import datetime
+from email.utils import format_datetime
+from pathlib import Path
+import time
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from arxivmlrev import config
+from arxivmlrev.accumulator import ResultsAccumulator
+from arxivmlrev.feed import Feed, FeedParams
+from arxivmlrev.feed_cache import FeedArtifact, FileFeedCache
+from arxivmlrev.feed_index import FeedIndex
+from arxivmlrev.result import Result
+from arxivmlrev.store import ArticlesStore
+
+
+def _index_artifact(generated: float) -> FeedArtifact:
+    accumulator = ResultsAccumulator()
+    for num in range(1, 6):
+        url = f'http://arxiv.org/abs/2101.{num:05}v1'
+        accumulator.add(Result({
+            'id': url,
+            'arxiv_url': url,
+            'title': f'A survey of deep learning {num}',
+            'summary': 'An abstract.',
+            'published': f'2021-01-{num:02}T10:00:00Z',
+            'updated': f'2021-02-{num:02}T11:00:00Z',
+            'tags': [{'term': 'cs.LG'}],
+            'arxiv_primary_category': {'term': 'cs.LG'},
+        }), source='test')
+    return FeedArtifact(body=FeedIndex.to_bytes(accumulator.to_frame()), generated=generated)
+
+
+def test_same_index_renders_same_etag(tmp_path: Path) -> None:
+    generated = time.time() - 60
+    cache = FileFeedCache(tmp_path / 'feed_index.cache')
+    cache.set(_index_artifact(generated))
+    params = FeedParams(category='cs.LG')
+
+    artifacts = [Feed(cache).artifact(params) for _ in range(2)]  # As if rendered by different processes.
+    assert artifacts[0].etag == artifacts[1].etag
+    build_date = format_datetime(datetime.datetime.fromtimestamp(generated, datetime.timezone.utc))
+    assert f'<lastBuildDate>{build_date}</lastBuildDate>'.encode() in artifacts[0].body
+
+
+def test_cached_index_is_read_once_until_replaced(tmp_path: Path) -> None:
+    cache = FileFeedCache(tmp_path / 'feed_index.cache')
+    assert cache.get() is None
+    generated = time.time() - 60
+    cache.set(_index_artifact(generated))
+    artifact = cache.get()
+    assert (artifact is not None) and (artifact.generated == generated)
+    assert FileFeedCache(tmp_path / 'feed_index.cache').get() == artifact
+    assert cache.get() is artifact
+
+    cache.set(_index_artifact(generated + 1))
+    artifact = cache.get()
+    assert (artifact is not None) and (artifact.generated == generated + 1)
+    assert cache.get() is artifact
+
+
+def test_index_has_stored_articles_older_than_latest_results(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    df_stored = FeedIndex.from_bytes(_index_artifact(time.time()).body)._df
+    df_stored['Published'] -= pd.DateOffset(years=2)
+    df_stored['Updated'] -= pd.DateOffset(years=2)
+    ArticlesStore(tmp_path / 'articles.parquet').write(df_stored)
+    monkeypatch.setattr(config, 'DATA_ARTICLES_STORE_PATH', tmp_path / 'articles.parquet')
+    monkeypatch.setattr(config, 'DATA_ARTICLES_CSV_PATH', tmp_path / 'articles.csv')  # It doesn't exist.
+    monkeypatch.setattr(config, 'METRICS_EXPORTERS', [])
+    df_latest = df_stored.head(1).copy()
+    df_latest['Version'] = 2
+    df_latest['Updated'] = pd.Timestamp('2021-03-01', tz='UTC')
+
+    feed = Feed(FileFeedCache(tmp_path / 'feed_index.cache'))
+    monkeypatch.setattr(feed, '_searcher', SimpleNamespace(search=lambda: df_latest))
+    index = FeedIndex.from_bytes(feed._search())
+    assert len(index) == len(df_stored)
+    assert index.select(FeedParams())['URL_ID'].iloc[0] == df_latest['URL_ID'].iloc[0]
+    assert len(index.select(FeedParams(year=2019))) == len(df_stored)
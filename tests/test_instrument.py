@@ -0,0 +1,32 @@
+import threading
+from typing import Any, Dict
+
+from arxivmlrev import instrument
+
+
+def test_concurrent_runs_are_recorded_separately() -> None:
+    started, recorded = threading.Event(), threading.Event()
+    render_report: Dict[str, Any] = {}
+
+    def render() -> None:
+        started.wait(10)
+        with instrument.run('render', exporters=[]) as run_:
+            instrument.record('render', wall_seconds=1.0)
+        render_report.update(run_.report(status='ok'))
+        recorded.set()
+
+    thread = threading.Thread(target=render)
+    thread.start()
+    with instrument.run('feed', exporters=[]) as run_:
+        instrument.record('fetch', wall_seconds=1.0)
+        started.set()
+        recorded.wait(10)
+        with instrument.ContextThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(lambda num: instrument.record('parse', wall_seconds=1.0), range(4)))
+    thread.join()
+
+    assert render_report['run'] == 'render'
+    assert set(render_report['stages']) == {'render'}
+    stages = run_.report(status='ok')['stages']
+    assert set(stages) == {'fetch', 'parse'}
+    assert stages['parse']['calls'] == 4
@@ -0,0 +1,16 @@
+import threading
+from typing import List
+
+import pytest
+
+import main
+
+
+def test_refresher_is_started_once_by_first_request(monkeypatch: pytest.MonkeyPatch) -> None:
+    assert 'feed-refresher' not in [thread.name for thread in threading.enumerate()]  # It isn't started on import.
+    started: List[main.FeedRefresher] = []
+    monkeypatch.setattr(main.FeedRefresher, 'start', lambda self: started.append(self))
+    monkeypatch.setattr(main, '_refresher', None)
+    for _ in range(2):
+        main._start_refresher()
+    assert started == [main._refresher]
@@ -0,0 +1,113 @@
+import hashlib
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence
+
+import pytest
+
+from arxivmlrev.publish import GitHubPublisher, PublishIndex, git_blob_sha
+
+
+class FakeRepository:
+    """In-memory double of the parts of a GitHub repository which are used by `GitHubPublisher`."""
+
+    default_branch = 'master'
+
+    def __init__(self, files: Dict[str, bytes]):
+        self.files = dict(files)
+        self.head_sha = 'commit0'
+        self.commits: List[Dict[str, Any]] = []
+        self.uploaded: List[str] = []
+        self.num_requests = 0
+
+    def _tree_sha(self) -> str:
+        return hashlib.sha1(repr(sorted(self.files.items())).encode()).hexdigest()
+
+    def get_branch(self, name: str) -> SimpleNamespace:
+        self.num_requests += 1
+        return SimpleNamespace(name=name, commit=SimpleNamespace(sha=self.head_sha))
+
+    def get_git_commit(self, sha: str) -> SimpleNamespace:
+        self.num_requests += 1
+        assert sha == self.head_sha
+        return SimpleNamespace(sha=sha, tree=SimpleNamespace(sha=self._tree_sha()))
+
+    def get_git_tree(self, sha: str, recursive: bool = False) -> SimpleNamespace:
+        self.num_requests += 1
+        assert sha == self._tree_sha()
+        return SimpleNamespace(tree=[SimpleNamespace(path=path, sha=git_blob_sha(content), type='blob')
+                                     for path, content in self.files.items()])
+
+    def create_git_tree(self, elements: Sequence[Any], base_tree: SimpleNamespace) -> SimpleNamespace:
+        self.num_requests += 1
+        assert base_tree.sha == self._tree_sha()
+        files = dict(self.files)
+        for element in elements:
+            identity = element._identity
+            self.uploaded.append(identity['path'])
+            files[identity['path']] = identity['content'].encode()
+        return SimpleNamespace(files=files)
+
+    def create_git_commit(self, message: str, tree: SimpleNamespace, parents: Sequence[SimpleNamespace]) \
+            -> SimpleNamespace:
+        self.num_requests += 1
+        assert [parent.sha for parent in parents] == [self.head_sha]
+        sha = f'commit{len(self.commits) + 1}'
+        self.commits.append({'sha': sha, 'message': message, 'files': tree.files})
+        return SimpleNamespace(sha=sha)
+
+    def get_git_ref(self, ref: str) -> SimpleNamespace:
+        self.num_requests += 1
+        assert ref == f'heads/{self.default_branch}'
+
+        def edit(sha: str) -> None:
+            self.head_sha = sha
+            self.files = next(commit['files'] for commit in self.commits if commit['sha'] == sha)
+
+        return SimpleNamespace(edit=edit)
+
+
+def _publisher(repo: FakeRepository, tmp_path: Path) -> GitHubPublisher:
+    return GitHubPublisher('owner/repo', index=PublishIndex(tmp_path / 'publish_index.json'),
+                           repo=repo)  # type: ignore[arg-type]
+
+
+@pytest.fixture
+def repo() -> FakeRepository:
+    return FakeRepository({'README.md': b'readme\n', 'articles.csv': b'a,b\n'})
+
+
+def test_unchanged_index_makes_no_requests(repo: FakeRepository, tmp_path: Path) -> None:
+    publisher = _publisher(repo, tmp_path)
+    artifacts = {'README.md': b'readme 2\n', 'articles.csv': b'a,b\n'}
+    assert publisher.publish(artifacts) == 'commit1'
+    num_requests = repo.num_requests
+
+    assert publisher.publish(artifacts) is None
+    assert repo.num_requests == num_requests
+    assert len(repo.commits) == 1
+
+
+def test_changed_artifacts_are_published_in_one_commit(repo: FakeRepository, tmp_path: Path) -> None:
+    artifacts = {'README.md': b'readme 2\n', 'articles.csv': b'a,b\nc,d\n', 'articles.md': b'# Articles\n'}
+    commit_sha: Optional[str] = _publisher(repo, tmp_path).publish(artifacts, message='Refresh')
+    assert commit_sha == repo.head_sha == 'commit1'
+    assert len(repo.commits) == 1
+    assert repo.commits[0]['message'] == 'Refresh'
+    assert repo.files == artifacts
+
+
+def test_unchanged_blobs_are_not_uploaded(repo: FakeRepository, tmp_path: Path) -> None:
+    artifacts = {'README.md': b'readme\n', 'articles.csv': b'a,b\nc,d\n'}
+    assert _publisher(repo, tmp_path).publish(artifacts) == 'commit1'
+    assert repo.uploaded == ['articles.csv']
+
+
+def test_up_to_date_remote_makes_no_commit(repo: FakeRepository, tmp_path: Path) -> None:
+    publisher = _publisher(repo, tmp_path)
+    assert publisher.publish(dict(repo.files)) is None
+    assert (not repo.commits) and (not repo.uploaded)
+
+    num_requests = repo.num_requests
+    assert publisher.publish(dict(repo.files)) is None
+    assert repo.num_requests == num_requests
@@ -0,0 +1,52 @@
+from pathlib import Path
+from types import TracebackType
+from typing import Generator, Iterator, Optional, Type, cast
+
+import pytest
+
+from arxivmlrev import config, query
+from arxivmlrev.util.ratelimit import RateLimiter
+
+_ENTRY = '<entry><id>http://arxiv.org/abs/2101.{num:05}v1</id><title>A survey {num}</title></entry>'
+_FEED = ('<feed xmlns="http://www.w3.org/2005/Atom">' + ''.join(_ENTRY.format(num=num) for num in range(3)) +
+         '</feed>').encode()
+
+
+class FakeResponse:
+    """Double of a streamed response of `requests.get`, which yields its content in chunks of one entry."""
+
+    def __init__(self) -> None:
+        self.is_closed = False
+
+    def __enter__(self) -> 'FakeResponse':
+        return self
+
+    def __exit__(self, exc_type: Optional[Type[BaseException]], exc_val: Optional[BaseException],
+                 exc_tb: Optional[TracebackType]) -> None:
+        self.is_closed = True
+
+    def raise_for_status(self) -> None:
+        pass
+
+    def iter_content(self, chunk_size: int) -> Iterator[bytes]:
+        yield from _FEED.partition(b'</entry>')[:2]
+        yield from _FEED.partition(b'</entry>')[2:]
+
+
+def test_streamed_query_does_not_hold_rate_limiter_while_yielding(tmp_path: Path,
+                                                                   monkeypatch: pytest.MonkeyPatch) -> None:
+    response = FakeResponse()
+    limiter = RateLimiter(0, path=tmp_path / 'rate_limit')
+    monkeypatch.setattr(config, 'QUERY_BACKEND', 'stream')
+    monkeypatch.setattr(config, 'QUERY_CACHE_DIR', tmp_path / 'cache')
+    monkeypatch.setattr(query, '_QUERY_CACHE', query.QueryCache('off'))
+    monkeypatch.setattr(query, 'RATE_LIMITER', limiter)
+    monkeypatch.setattr(query.requests, 'get', lambda *args, **kwargs: response)
+
+    results = cast(Generator[dict, None, None],
+                   query.iter_query(query='ti:survey', max_results=3, sort_by='submittedDate'))
+    assert next(results)['id'] == 'http://arxiv.org/abs/2101.00000v1'
+    assert not limiter._lock.locked()  # Another thread or process can query meanwhile.
+    assert not response.is_closed
+    results.close()
+    assert response.is_closed
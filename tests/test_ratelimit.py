@@ -0,0 +1,26 @@
+from pathlib import Path
+import time
+
+import pytest
+
+from arxivmlrev.util.ratelimit import RateLimiter
+
+
+def test_failed_entry_releases_lock(tmp_path: Path) -> None:
+    (tmp_path / 'file').touch()
+    limiter = RateLimiter(0, path=tmp_path / 'file' / 'rate_limit')  # Its directory can't be created.
+    for _ in range(2):
+        with pytest.raises(OSError):
+            with limiter:
+                pass
+    assert not limiter._lock.locked()
+
+
+def test_interval_is_shared_by_path(tmp_path: Path) -> None:
+    path = tmp_path / 'rate_limit'
+    with RateLimiter(0.2, path=path):
+        pass
+    start = time.monotonic()
+    with RateLimiter(0.2, path=path):
+        pass
+    assert time.monotonic() - start >= 0.1
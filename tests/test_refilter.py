@@ -0,0 +1,30 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from arxivmlrev import config, refilter
+
+
+def test_widened_query_terms_are_warned(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(config, 'DATA_CORPUS_QUERY_PATH', tmp_path / 'corpus.query.json')
+    assert len(refilter.query_warnings(refilter.read_corpus_query_terms())) == 1
+
+    refilter.write_corpus_query_terms(full=False)  # The terms of the corpus remain unknown.
+    assert refilter.read_corpus_query_terms() is None
+    refilter.write_corpus_query_terms(full=True)
+    assert refilter.query_warnings(refilter.read_corpus_query_terms()) == []
+
+    terms = refilter.query_terms()
+    added_category, added_whitelisted_term = terms['categories'][0], terms['whitelisted terms'][-1]
+    corpus_terms = {'categories': terms['categories'][1:], 'whitelisted terms': terms['whitelisted terms'][:-1],
+                    'blacklisted terms': sorted(terms['blacklisted terms'] + ['removed term'])}
+    warnings = refilter.query_warnings(corpus_terms)
+    assert [warning.split('"')[1] for warning in warnings] == [added_category, added_whitelisted_term, 'removed term']
+    assert [warning.split('"')[0] for warning in warnings] == ['! The added category ', '! The added whitelisted term ',
+                                                               '! The removed blacklisted term ']
+
+    # An incremental refresh doesn't search the preexisting articles matching only the widened terms.
+    config.DATA_CORPUS_QUERY_PATH.write_text(json.dumps(corpus_terms))
+    refilter.write_corpus_query_terms(full=False)
+    assert refilter.query_warnings(refilter.read_corpus_query_terms()) == warnings
@@ -0,0 +1,49 @@
+import datetime
+from email.utils import parsedate_to_datetime
+from xml.etree import ElementTree
+
+import pandas as pd
+
+from arxivmlrev import config
+from arxivmlrev.render import rss
+
+
+def _articles() -> pd.DataFrame:
+    return pd.DataFrame({
+        'URL_ID': ['2101.00001', 'cs/0112017'],
+        'Version': [2, 1],
+        'Published': pd.to_datetime(['2020-12-31T23:00:00Z', '2001-12-19T10:41:56Z'], utc=True),
+        'Updated': pd.to_datetime(['2021-02-01T11:00:00-05:00', '2001-12-19T10:41:56Z'], utc=True)
+        .tz_convert('America/New_York'),
+        'Title': ['Graphs & <Networks>: a "survey"', 'Text categorization\x0b review'],
+        'Match': ['survey', 'review'],
+        'Categories': ['cs.LG, stat.ML', 'cs.IR'],
+        'Abstract': ['We compare A < B & C > D.\x00', None],
+    })
+
+
+def test_feed_is_well_formed_and_escaped() -> None:
+    channel = ElementTree.fromstring(rss(_articles(), generated=0, title='Reviews: "a & b" <c>')).find('channel')
+    assert channel is not None
+    assert channel.findtext('title') == 'Reviews: "a & b" <c>'
+    assert channel.findtext('link') == config.REPO_URL
+    items = channel.findall('item')
+    assert [item.findtext('title') for item in items] == ['Graphs & <Networks>: a "survey" (2020-2021) (cs.LG)',
+                                                          'Text categorization review (2001) (cs.IR)']
+    assert [item.findtext('description') for item in items] == ['We compare A < B & C > D.', '']
+    assert [item.findtext('link') for item in items] == ['http://arxiv.org/abs/2101.00001v2',
+                                                         'http://arxiv.org/abs/cs/0112017v1']
+    assert [item.findtext('guid') for item in items] == [item.findtext('link') for item in items]
+    assert [[category.text for category in item.iterfind('category')] for item in items] == \
+        [['cs.LG', 'stat.ML'], ['cs.IR']]
+
+
+def test_dates_are_rfc_822_in_utc() -> None:
+    df = _articles()
+    generated = datetime.datetime(2021, 3, 1, 12, 30, 15, tzinfo=datetime.timezone.utc)
+    channel = ElementTree.fromstring(rss(df, generated=generated.timestamp())).find('channel')
+    assert channel is not None
+    assert channel.findtext('lastBuildDate') == 'Mon, 01 Mar 2021 12:30:15 +0000'
+    pub_dates = [item.findtext('pubDate') or '' for item in channel.iterfind('item')]
+    assert pub_dates == ['Mon, 01 Feb 2021 16:00:00 +0000', 'Wed, 19 Dec 2001 10:41:56 +0000']
+    assert [parsedate_to_datetime(pub_date) for pub_date in pub_dates] == df['Updated'].tolist()
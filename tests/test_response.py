@@ -0,0 +1,44 @@
+from email.utils import formatdate
+from typing import Dict
+
+import pytest
+
+from arxivmlrev.feed_cache import FeedArtifact
+from arxivmlrev.response import feed_response
+
+_ARTIFACT = FeedArtifact(body=b'<rss/>', generated=1614600000.75)  # The fraction of a second isn't in Last-Modified.
+_ETAG = _ARTIFACT.etag
+
+
+@pytest.mark.parametrize('headers', [
+    {'If-None-Match': _ETAG},
+    {'If-None-Match': f'W/{_ETAG}'},
+    {'If-None-Match': f'"other", {_ETAG}'},
+    {'If-None-Match': f'"other",W/{_ETAG} , "another"'},
+    {'If-None-Match': '*'},
+    {'If-Modified-Since': formatdate(_ARTIFACT.generated, usegmt=True)},
+    {'If-Modified-Since': formatdate(_ARTIFACT.generated + 60, usegmt=True)},
+    {'If-None-Match': _ETAG, 'If-Modified-Since': formatdate(_ARTIFACT.generated - 60, usegmt=True)},
+])
+def test_unmodified_feed_is_not_sent(headers: Dict[str, str]) -> None:
+    body, status, response_headers = feed_response(_ARTIFACT, headers)
+    assert (body, status) == (b'', 304)
+    assert response_headers['ETag'] == _ETAG
+    assert response_headers['Last-Modified'] == 'Mon, 01 Mar 2021 12:00:00 GMT'
+    assert 'Content-Type' not in response_headers
+
+
+@pytest.mark.parametrize('headers', [
+    {},
+    {'If-None-Match': '"other"'},
+    {'If-None-Match': '"other", W/"another"'},
+    {'If-None-Match': _ETAG.strip('"')},
+    {'If-Modified-Since': formatdate(_ARTIFACT.generated - 1, usegmt=True)},
+    {'If-Modified-Since': 'not a date'},
+    {'If-None-Match': '"other"', 'If-Modified-Since': formatdate(_ARTIFACT.generated + 60, usegmt=True)},
+])
+def test_modified_feed_is_sent(headers: Dict[str, str]) -> None:
+    body, status, response_headers = feed_response(_ARTIFACT, headers)
+    assert (body, status) == (_ARTIFACT.body, 200)
+    assert response_headers['ETag'] == _ETAG
+    assert response_headers['Content-Type'] == 'text/xml; charset=utf-8'
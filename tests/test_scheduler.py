@@ -0,0 +1,90 @@
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import pytest
+
+from arxivmlrev import config, query, scheduler
+from arxivmlrev.scheduler import QueryScheduler
+
+
+class FakeQuery:
+    """Double of `query_with_total` which returns the scripted responses of each offset in turn."""
+
+    def __init__(self, responses: Dict[int, List[Tuple[int, Optional[int]]]]):
+        self._responses = responses  # Numbers of results and reported totals by offset.
+        self.starts: List[int] = []
+
+    def __call__(self, *, query: str, start: int, max_results: int, sort_by: str, refresh: bool) \
+            -> Tuple[List[dict], Optional[int]]:
+        self.starts.append(start)
+        num_results, total = self._responses[start].pop(0)
+        return [{'id': f'{start + num}'} for num in range(min(num_results, max_results))], total
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(scheduler, 'verbose_sleep', lambda seconds: None)
+
+
+def _fetch_all(query_scheduler: QueryScheduler) -> int:
+    start = 0
+    while True:
+        page = query_scheduler.fetch(start)
+        start += len(page.results)
+        if page.is_last:
+            return start
+
+
+def test_short_page_before_total_continues(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake_query = FakeQuery({0: [(300, 700)], 300: [(400, 700)]})
+    monkeypatch.setattr(scheduler, 'query_with_total', fake_query)
+    assert _fetch_all(QueryScheduler(query='q', sort_by='submittedDate', max_page_size=400)) == 700
+    assert fake_query.starts == [0, 300]
+
+
+def test_unknown_total_is_confirmed_once(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake_query = FakeQuery({0: [(300, None)], 300: [(100, None)], 400: [(0, None)]})
+    monkeypatch.setattr(scheduler, 'query_with_total', fake_query)
+    assert _fetch_all(QueryScheduler(query='q', sort_by='submittedDate', max_page_size=400)) == 400
+    assert fake_query.starts == [0, 300, 400]
+
+
+def test_empty_first_page_is_retried(monkeypatch: pytest.MonkeyPatch) -> None:
+    fake_query = FakeQuery({0: [(0, None), (200, 200)]})
+    monkeypatch.setattr(scheduler, 'query_with_total', fake_query)
+    assert _fetch_all(QueryScheduler(query='q', sort_by='submittedDate', max_page_size=400)) == 200
+    assert fake_query.starts == [0, 0]
+
+    fake_query = FakeQuery({0: [(0, None)]})
+    monkeypatch.setattr(scheduler, 'query_with_total', fake_query)
+    assert _fetch_all(QueryScheduler(query='q', sort_by='submittedDate', max_page_size=400, may_be_empty=True)) == 0
+    assert fake_query.starts == [0]
+
+
+def test_replay_with_adapted_page_sizes_is_cached(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    def fake_query(*, query: str, id_list: List[str], start: int, max_results: int, sort_by: str) \
+            -> Tuple[List[dict], Optional[int]]:
+        fetched_sizes.append(max_results)
+        return [{'id': f'{num}'} for num in range(start, min(start + max_results, 1000))], 1000
+
+    fetched_sizes: List[int] = []
+    monkeypatch.setattr(config, 'QUERY_CACHE_DIR', tmp_path)
+    monkeypatch.setattr(query, '_query', fake_query)
+    monkeypatch.setattr(query, '_QUERY_CACHE', query.QueryCache('on'))
+    monkeypatch.setattr(config, 'QUERY_PAGE_TARGET_SECONDS', -1)  # Every page is slow, and so the page size is halved.
+    assert _fetch_all(QueryScheduler(query='q', sort_by='submittedDate', max_page_size=400)) == 1000
+    assert fetched_sizes == [400, 200, 100, 100, 100, 100]
+
+    monkeypatch.setattr(query, '_QUERY_CACHE', query.QueryCache('replay'))
+    monkeypatch.setattr(config, 'QUERY_PAGE_TARGET_SECONDS', 60)  # The page size is instead increased.
+    page_sizes = []
+    start = 0
+    query_scheduler = QueryScheduler(query='q', sort_by='submittedDate', max_page_size=400)
+    while start < 1000:
+        page_sizes.append(query_scheduler.page_size)
+        page = query_scheduler.fetch(start)
+        assert page.results
+        start += len(page.results)
+    assert start == 1000
+    assert page_sizes == [400, 400, 400, 400, 400, 400]
+    assert len(fetched_sizes) == 6
@@ -0,0 +1,49 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from arxivmlrev import config, store
+from arxivmlrev.store import ArticlesStore
+
+
+def _articles(num_articles: int, *, version: int = 1) -> pd.DataFrame:
+    return pd.DataFrame({
+        'URL_ID': [f'2101.{num:05}' for num in range(num_articles)],
+        'Version': version,
+        'Published': pd.Timestamp('2021-01-01 10:00', tz='UTC'),
+        'Updated': [pd.Timestamp('2021-02-01 11:00', tz='UTC') + pd.Timedelta(days=num) for num in range(num_articles)],
+        'Title': [f'A survey {num}' for num in range(num_articles)],
+        'Match': 'survey',
+        'Categories': 'cs.LG',
+        'Abstract': [f'An abstract {num}.' for num in range(num_articles)],
+    })
+
+
+def test_append_of_stored_articles_is_rewritten(tmp_path: Path) -> None:
+    articles_store = ArticlesStore(tmp_path / 'articles.parquet')
+    articles_store.write(_articles(3))
+    articles_store.append(_articles(5).tail(2))
+    assert len(articles_store._parts) == 2
+
+    articles_store.append(_articles(2, version=2))
+    assert len(articles_store._parts) == 1
+    df = articles_store.read()
+    assert sorted(df['URL_ID']) == [f'2101.{num:05}' for num in range(5)]
+    assert df.set_index('URL_ID')['Version'].to_dict() == {'2101.00000': 2, '2101.00001': 2, '2101.00002': 1,
+                                                           '2101.00003': 1, '2101.00004': 1}
+
+
+def test_store_is_read_only_if_it_matches_csv(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(config, 'DATA_ARTICLES_STORE_PATH', tmp_path / 'articles.parquet')
+    monkeypatch.setattr(config, 'DATA_ARTICLES_CSV_PATH', tmp_path / 'articles.csv')
+    df = _articles(3)
+    ArticlesStore(config.DATA_ARTICLES_STORE_PATH).write(df)
+    df[config.DATA_ARTICLES_CSV_COLUMNS].to_csv(config.DATA_ARTICLES_CSV_PATH, index=False, date_format='%Y-%m-%d')
+    assert store.read_articles()['Abstract'].notna().all()
+
+    df.loc[0, 'Title'] = 'A changed survey'
+    df[config.DATA_ARTICLES_CSV_COLUMNS].to_csv(config.DATA_ARTICLES_CSV_PATH, index=False, date_format='%Y-%m-%d')
+    df_read = store.read_articles()
+    assert 'A changed survey' in df_read['Title'].tolist()
+    assert 'Abstract' not in df_read
@@ -0,0 +1,76 @@
+import math
+from pathlib import Path
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from arxivmlrev import config
+from arxivmlrev.text_index import TextIndex, TextIndexStore, tokenize
+
+_ARTICLES = {  # URL ID to title and abstract.
+    '2101.00001': ('A survey of graph neural networks', 'We review message passing on graphs.'),
+    '2101.00002': ('Deep learning: a review', 'Graph neural networks are among the reviewed methods.'),
+    '2101.00003': ('Reinforcement learning survey', 'A survey of the survey literature on reinforcement learning.'),
+    '2101.00004': ('Federated learning', 'Privacy of learning on devices.'),
+}
+
+
+def _frame(articles: Dict[str, Tuple[str, str]]) -> pd.DataFrame:
+    return pd.DataFrame([{'URL_ID': url_id, 'Title': title, 'Abstract': abstract}
+                         for url_id, (title, abstract) in articles.items()])
+
+
+def _bm25(articles: Dict[str, Tuple[str, str]], query: str) -> Dict[str, float]:
+    """Return the BM25 scores of the articles for the query, as per its textbook definition."""
+    k1, b = config.TEXT_INDEX_BM25_K1, config.TEXT_INDEX_BM25_B
+    docs = {url_id: tokenize(title) * config.TEXT_INDEX_TITLE_WEIGHT + tokenize(abstract)
+            for url_id, (title, abstract) in articles.items()}
+    avg_length = sum(len(tokens) for tokens in docs.values()) / len(docs)
+    scores = dict.fromkeys(docs, 0.)
+    for term in set(tokenize(query)):
+        doc_freq = sum(term in tokens for tokens in docs.values())
+        idf = math.log(1 + (len(docs) - doc_freq + .5) / (doc_freq + .5))
+        for url_id, tokens in docs.items():
+            tf = tokens.count(term)
+            scores[url_id] += idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * len(tokens) / avg_length))
+    return scores
+
+
+@pytest.mark.parametrize('query', ['survey', 'graph neural networks', 'learning', 'privacy devices', 'absent'])
+def test_scores_match_bm25(query: str) -> None:
+    scores = TextIndex.from_frame(_frame(_ARTICLES)).scores(query)
+    np.testing.assert_allclose(scores, list(_bm25(_ARTICLES, query).values()), rtol=1e-5)
+
+
+def test_title_words_outrank_abstract_words() -> None:
+    hits = TextIndex.from_frame(_frame(_ARTICLES)).search('graph neural networks')
+    assert [hit.url_id for hit in hits] == ['2101.00001', '2101.00002']
+    assert hits[0].title == 'A survey of graph neural networks'
+
+
+def test_compacted_index_matches_index_of_live_articles(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    updated_articles = {'2101.00002': ('Deep learning: a survey', 'Transformers are among the surveyed methods.'),
+                        '2101.00005': ('Graph transformers', 'A survey of attention on graphs.')}
+    live_articles = {**_ARTICLES, **updated_articles}
+    monkeypatch.setattr(config, 'TEXT_INDEX_MAX_SEGMENTS', 2)
+    store = TextIndexStore(tmp_path / 'articles.index')
+    store.write(_frame(_ARTICLES))
+    store.append(_frame(updated_articles))
+    segmented_index = store.load()
+    store.append(_frame({}))
+    store.append(_frame({'2101.00004': _ARTICLES['2101.00004']}))  # This exceeds the maximum number of segments.
+    compacted_index = store.load()
+    assert len(store._segment_paths) == 1
+    assert len(compacted_index) == len(live_articles)
+
+    for query in ('survey', 'graph transformers', 'deep learning review'):
+        expected_scores = _bm25(live_articles, query)
+        for text_index in (segmented_index, compacted_index):
+            hits = text_index.search(query, limit=len(live_articles))
+            assert {hit.url_id: hit.score for hit in hits} == \
+                pytest.approx({url_id: score for url_id, score in expected_scores.items() if score > 0}, rel=1e-5)
+        assert [hit.title for hit in compacted_index.search(query)] == \
+            [live_articles[hit.url_id][0] for hit in compacted_index.search(query)]
+    assert sorted(compacted_index.compacted().url_ids.tolist()) == sorted(live_articles)